@@ -2,4 +2,85 @@ APP_TITLE = "PrismDB Studio"  # Updated Name
 APP_VERSION = "1.0.4"
 WINDOW_SIZE = (1100, 700)
 DEFAULT_URI = "mongodb://localhost:27017/dbname"
-PAGE_SIZE = 5
\ No newline at end of file
+PAGE_SIZE = 5
+
+# --- Import ---
+IMPORT_BATCH_SIZE = 1000
+BULK_LOAD_WRITE_CONCERN = {"w": 1, "j": False}
+
+# --- Verification ---
+VERIFY_RANGES = 16
+VERIFY_LEAF_SIZE = 100
+VERIFY_MAX_DEPTH = 12
+
+# --- Collection Copy / Sync ---
+COPY_READERS = 4
+COPY_BATCH_SIZE = 1000
+SYNC_BATCH_SIZE = 500
+SYNC_FLUSH_INTERVAL = 0.5  # seconds a partial batch may wait before it is applied
+COPY_LOG_INTERVAL = 5  # seconds between progress lines in the System Logs
+
+# --- Background Jobs ---
+MAX_CONCURRENT_JOBS = 3
+JOB_POLL_INTERVAL_MS = 200
+JOB_CANCEL_GRACE = 10  # seconds before a job that ignores cancel is terminated
+JOB_SHUTDOWN_WAIT = 3  # seconds closing the app waits for index rebuilds to finish
+POOL_SIZE = 2  # warm worker processes per connection; further jobs start a fresh process
+POOL_IDLE_TIMEOUT = 600  # seconds an idle pool process stays alive
+
+# --- Schema Scan ---
+SCHEMA_SAMPLE_SIZE = 1000  # max documents sampled per collection
+SCHEMA_ROUND_SIZE = 200  # documents per sampling round
+SCHEMA_STABLE_ROUNDS = 2  # stop once this many rounds add no new field
+SCHEMA_MAX_DEPTH = 5
+SCHEMA_ARRAY_SAMPLE = 20  # elements inspected per array
+SCHEMA_SCAN_THREADS = 8
+SCHEMA_HLL_PRECISION = 10  # 1 KB per field sketch, ~3% distinct-count error
+SCHEMA_STATS_MAX_AGE = 3600  # seconds before stored schema stats are resampled
+
+# --- Relationship Detection ---
+FK_SAMPLE_SIZE = 200  # source documents sampled per collection
+FK_LOOKUP_BATCH = 500  # values per $in lookup
+FK_MIN_CONFIDENCE = 0.8  # share of sampled values found in the target
+
+# --- Aggregation Builder ---
+AGG_PREVIEW_LIMIT = 20  # rows shown per stage preview
+AGG_CACHE_DOCS = 500  # prefix results up to this size are cached whole
+AGG_CACHE_ENTRIES = 32
+AGG_CACHE_TTL = 300  # seconds before a cached prefix is recomputed
+AGG_CACHE_MAX_BYTES = 8 * 1024 * 1024  # larger prefix results are not replayed via $documents
+AGG_COMPARE_TIMEOUT_MS = 30000  # maxTimeMS for each explain run when comparing rewrites
+AGG_SAMPLE_SIZE = 10000  # default documents in a sampled-input run
+AGG_SAMPLE_PREFIX = "__prismdb_sample_"  # temporary sample collections, hidden from the sidebar
+AGG_RUN_ROW_CAP = 1000  # default rows fetched by Run Pipeline
+AGG_RUN_BATCH_SIZE = 500  # cursor batchSize for full runs
+AGG_RUN_FLUSH_SECONDS = 0.25  # longest wait before received rows are shown
+
+# --- Materialized Views ---
+MATVIEW_HISTORY = 50  # refresh records kept per view
+MATVIEW_CHECK_INTERVAL_MS = 60000  # how often a connection tab looks for views due a refresh
+
+# --- Dashboard ---
+DASHBOARD_POLL_SECONDS = 2
+DASHBOARD_HISTORY_SECONDS = 24 * 3600  # ring buffer span; fixed memory however long it runs
+DASHBOARD_WINDOWS = [("5 min", 300), ("15 min", 900), ("1 hour", 3600), ("6 hours", 21600), ("24 hours", 86400)]
+# Storage engine health: (warning, critical) levels, reached from below
+WT_THRESHOLDS = {
+    "wt_cache_fill_pct": (80, 95),  # WiredTiger's eviction target and trigger
+    "wt_cache_dirty_pct": (5, 20),  # dirty target and trigger
+    "wt_read_used_pct": (75, 95),
+    "wt_write_used_pct": (75, 95),
+    "wt_checkpoint_ms": (30000, 60000),  # checkpoints run every 60 s
+    "wt_evict_app": (1, 100),  # pages/s evicted by application threads
+    "wt_working_set_pct": (80, 100),  # working set estimate / cache size
+}
+WT_WORKING_SET_SECONDS = 300  # data read into cache over this span counts as working set
+
+# --- Current Operations ---
+CURRENTOP_POLL_SECONDS = 2
+CURRENTOP_SLOW_SECONDS = 5  # operations running longer are shown in bold
+
+# --- Profiler ---
+PROFILER_POLL_SECONDS = 5
+PROFILER_BATCH = 5000  # profile entries read per poll at most
+PROFILER_LATENCY_SAMPLES = 1000  # latency reservoir per query shape, for percentiles
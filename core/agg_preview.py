@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+import bson
+from pymongo.errors import OperationFailure
+from config.settings import (
+    AGG_PREVIEW_LIMIT,
+    AGG_CACHE_DOCS,
+    AGG_CACHE_ENTRIES,
+    AGG_CACHE_TTL,
+    AGG_CACHE_MAX_BYTES,
+)
+from utils.pipeline_tools import (
+    ONE_TO_ONE_STAGES,
+    WRITE_STAGES,
+    stage_name,
+    prefix_key,
+    inject_limit,
+)
+
+
+class PrefixCache:
+    """
+    LRU of pipeline prefix results keyed by prefix_key(). An entry is
+    complete when it holds the prefix's whole output, so any later stages
+    can be replayed on it; otherwise it holds the first documents only.
+    """
+
+    def __init__(self, entries=AGG_CACHE_ENTRIES, ttl=AGG_CACHE_TTL):
+        self.entries = entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()  # the preview thread writes, the GUI clears
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            docs, complete, created = entry
+            if time.time() - created > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return docs, complete
+
+    def put(self, key, docs, complete):
+        if complete and sum(len(bson.encode(d)) for d in docs) > AGG_CACHE_MAX_BYTES:
+            # Too big to send back as $documents; keep what the preview shows
+            docs, complete = docs[:AGG_PREVIEW_LIMIT], False
+        with self._lock:
+            self._data[key] = (docs, complete, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def _fetch(source, pipeline):
+    """Runs with one extra document allowed, so truncation can be detected."""
+    docs = list(source.aggregate(inject_limit(pipeline, AGG_CACHE_DOCS + 1)))
+    return docs[:AGG_CACHE_DOCS], len(docs) <= AGG_CACHE_DOCS
+
+
+def preview_stage(collection, stages, index, cache, limit=AGG_PREVIEW_LIMIT, replay=True):
+    """
+    First `limit` documents out of stages[:index + 1].
+
+    Served from the cache when that exact prefix ran before. Otherwise the
+    longest cached shorter prefix is replayed through the remaining stages
+    with $documents (MongoDB 5.1+): a complete one for any stages, a partial
+    one only when the remaining stages are one-to-one. Failing both, the
+    prefix runs on the collection with a $limit injected as early as it is
+    safe. Returns (docs, info).
+    """
+    prefix = stages[: index + 1]
+    if any(stage_name(s) in WRITE_STAGES for s in prefix):
+        raise ValueError("Previews never run $out/$merge stages.")
+
+    ns = collection.full_name
+    start = time.time()
+    info = {"source": "collection", "from_stage": None, "replay": replay}
+    key = prefix_key(ns, prefix)
+
+    hit = cache.get(key)
+    if hit is not None:
+        docs, complete = hit
+        info.update(source="cache", complete=complete)
+    else:
+        docs = None
+        for j in range(index - 1, -1, -1) if replay else ():
+            entry = cache.get(prefix_key(ns, stages[: j + 1]))
+            if entry is None:
+                continue
+            cached, cached_complete = entry
+            rest = prefix[j + 1 :]
+            one_to_one = all(stage_name(s) in ONE_TO_ONE_STAGES for s in rest)
+            if not cached_complete and not one_to_one:
+                continue
+            try:
+                docs, complete = _fetch(collection.database, [{"$documents": cached}] + rest)
+            except OperationFailure:
+                # $documents needs MongoDB 5.1+; stop trying on this server
+                info["replay"] = False
+                docs = None
+                break
+            complete = complete and cached_complete
+            info.update(source="replay", from_stage=j)
+            break
+
+        if docs is None:
+            docs, complete = _fetch(collection, prefix)
+        cache.put(key, docs, complete)
+        info["complete"] = complete
+
+    info["ms"] = (time.time() - start) * 1000
+    return docs[:limit], info
@@ -0,0 +1,221 @@
+from config.settings import AGG_COMPARE_TIMEOUT_MS
+from utils.pipeline_tools import WRITE_STAGES, stage_name
+
+# Plan stages of the query layer worth flagging
+SCAN_STAGES = {"COLLSCAN"}
+SORT_STAGES = {"SORT"}
+
+# Stages the server rewrites before running them, as they appear in explain
+STAGE_EXPANSIONS = {
+    "$sortByCount": ("$group", "$sort"),
+    "$count": ("$group", "$project"),
+    "$bucket": ("$group", "$sort"),
+    "$set": ("$addFields",),
+    "$unset": ("$project",),
+    "$replaceWith": ("$replaceRoot",),
+}
+
+
+def explain_pipeline(collection, stages, max_time_ms=None):
+    """Runs the pipeline under explain("executionStats") and returns the raw output."""
+    if any(stage_name(s) in WRITE_STAGES for s in stages):
+        raise ValueError("Profiling does not run $out/$merge stages.")
+    extra = {"maxTimeMS": max_time_ms} if max_time_ms else {}
+    return collection.database.command(
+        "explain",
+        {"aggregate": collection.name, "pipeline": stages, "cursor": {}},
+        verbosity="executionStats",
+        **extra,
+    )
+
+
+def _plan_stages(plan):
+    """Every stage name in a (classic or SBE) winning plan tree."""
+    if not isinstance(plan, dict):
+        return []
+    if "queryPlan" in plan:
+        plan = plan["queryPlan"]
+    names = [plan.get("stage")] if plan.get("stage") else []
+    for key in ("inputStage", "outerStage", "innerStage"):
+        names += _plan_stages(plan.get(key))
+    for child in plan.get("inputStages", []):
+        names += _plan_stages(child)
+    return names
+
+
+def _sort_spilled(exec_stage):
+    if not isinstance(exec_stage, dict):
+        return False
+    if exec_stage.get("stage") == "SORT" and (exec_stage.get("usedDisk") or exec_stage.get("spills")):
+        return True
+    children = [exec_stage.get(k) for k in ("inputStage", "outerStage", "innerStage")]
+    return any(_sort_spilled(c) for c in children + exec_stage.get("inputStages", []))
+
+
+def _cursor_stats(query_planner, execution_stats):
+    plan = _plan_stages(query_planner.get("winningPlan", {}))
+    return {
+        "ms": execution_stats.get("executionTimeMillis", 0),
+        "n_out": execution_stats.get("nReturned"),
+        "docs_examined": execution_stats.get("totalDocsExamined"),
+        "keys_examined": execution_stats.get("totalKeysExamined"),
+        "collscan": bool(SCAN_STAGES & set(plan)),
+        "memory_sort": bool(SORT_STAGES & set(plan)),
+        "spilled": _sort_spilled(execution_stats.get("executionStages")),
+        "plan": " <- ".join(plan),
+    }
+
+
+def _memory(entry):
+    """Peak memory a stage reports, in bytes (the field depends on stage and version)."""
+    acc = entry.get("maxAccumulatorMemoryUsageBytes")
+    if isinstance(acc, dict) and acc:
+        return sum(acc.values())
+    for key in ("maxMemoryUsageBytes", "totalDataSizeSortedBytesEstimate", "peakTrackedMemBytes"):
+        if entry.get(key):
+            return entry[key]
+    return None
+
+
+def _parse_shard(explain):
+    """[(stage name, stats)] in execution order for one shard or an unsharded server."""
+    if "stages" not in explain:
+        # The whole pipeline ran inside the query layer
+        planner = explain.get("queryPlanner", {})
+        return [("$cursor", _cursor_stats(planner, explain.get("executionStats", {})))]
+
+    rows = []
+    previous_ms = 0
+    for entry in explain["stages"]:
+        name = next(k for k in entry if k.startswith("$"))
+        cumulative = entry.get("executionTimeMillisEstimate", 0)
+        if name == "$cursor":
+            body = entry["$cursor"]
+            stats = _cursor_stats(body.get("queryPlanner", {}), body.get("executionStats", {}))
+            cumulative = entry.get("executionTimeMillisEstimate", stats["ms"])
+        else:
+            stats = {
+                "memory": _memory(entry),
+                "spilled": bool(entry.get("usedDisk") or entry.get("spills")),
+                # A $sort left in the pipeline could not use an index
+                "memory_sort": name == "$sort",
+            }
+        stats["n_out"] = entry.get("nReturned", stats.get("n_out"))
+        # Stage times in aggregate explain are cumulative
+        stats["ms"] = max(0, cumulative - previous_ms)
+        previous_ms = cumulative
+        rows.append((name, stats))
+    return rows
+
+
+def _merge_shards(per_shard):
+    """Stage-wise merge: documents add up, the slowest shard's time counts."""
+    merged = []
+    for rows in zip(*per_shard):
+        name = rows[0][0]
+        stats = dict(rows[0][1])
+        stats["ms"] = max(r[1].get("ms") or 0 for r in rows)
+        stats["n_out"] = sum(r[1].get("n_out") or 0 for r in rows)
+        for flag in ("collscan", "memory_sort", "spilled"):
+            stats[flag] = any(r[1].get(flag) for r in rows)
+        merged.append((name, stats))
+    return merged
+
+
+def _add_stage(total, stats):
+    """Folds one more explain stage into a user stage that the server expanded."""
+    total["ms"] = (total.get("ms") or 0) + (stats.get("ms") or 0)
+    if stats.get("n_out") is not None:
+        total["n_out"] = stats["n_out"]  # the last expanded stage's output is the stage's
+    memory = [m for m in (total.get("memory"), stats.get("memory")) if m is not None]
+    total["memory"] = sum(memory) if memory else None
+    for flag in ("spilled", "memory_sort"):
+        total[flag] = bool(total.get(flag) or stats.get(flag))
+
+
+def profile_pipeline(explain, stages):
+    """
+    Per user stage: {"ms", "n_in", "n_out", "memory", "spilled", "collscan",
+    "memory_sort", "pushed_down", "plan"}. Stages the server moved into the
+    initial query ($match, $sort, $project, $limit...) are marked pushed_down
+    and share the "$cursor" figures, which go on the first of them. Stages
+    the server expands ($count, $sortByCount...) add up their parts.
+    """
+    if "shards" in explain:
+        rows = _merge_shards([_parse_shard(s) for s in explain["shards"].values()])
+    else:
+        rows = _parse_shard(explain)
+
+    result = [None] * len(stages)
+    names = [stage_name(s) for s in stages]
+    # (user stage index, explain stage name) for every stage the server may run
+    expected = [(i, part) for i, name in enumerate(names) for part in STAGE_EXPANSIONS.get(name, (name,))]
+    pos = 0
+    cursor = None
+    for name, stats in rows:
+        if name == "$cursor":
+            cursor = stats
+            continue
+        # Executed stages keep their relative order; take the next one of the same kind
+        match = next((j for j in range(pos, len(expected)) if expected[j][1] == name), None)
+        if match is None:
+            continue
+        i = expected[match][0]
+        if result[i] is None:
+            result[i] = dict(stats, pushed_down=False)
+        else:
+            _add_stage(result[i], stats)
+        pos = match + 1
+
+    n_in = None
+    pushed_scan = None
+    for i, stats in enumerate(result):
+        if stats is None:
+            # Absorbed into the query layer, or merged into a neighbour (e.g. $unwind into $lookup)
+            leading = all(r.get("pushed_down") for r in result[:i])
+            if leading and cursor is not None:
+                stats, cursor = dict(cursor, pushed_down=True), None
+                pushed_scan = stats
+            else:
+                stats = {"pushed_down": True, "ms": None, "n_out": None}
+            result[i] = stats
+        elif cursor is not None:
+            # Nothing was pushed down: the first stage reads straight from the
+            # collection, so the scan's figures and flags belong to it
+            for key in ("collscan", "docs_examined", "keys_examined", "plan"):
+                stats[key] = cursor.get(key)
+            n_in, cursor = cursor.get("n_out"), None
+        stats["n_in"] = n_in
+        if stats.get("n_out") is not None:
+            n_in = stats["n_out"]
+
+    # A blocking SORT inside the query belongs to the pushed-down $sort
+    if pushed_scan is not None and pushed_scan.get("memory_sort"):
+        sort = next((r for n, r in zip(names, result) if n == "$sort" and r.get("pushed_down")), None)
+        if sort is not None and sort is not pushed_scan:
+            sort["memory_sort"], pushed_scan["memory_sort"] = True, False
+    return result
+
+
+def summarize_profile(profile):
+    """Whole-pipeline totals from profile_pipeline() rows."""
+    examined = [p.get("docs_examined") for p in profile if p.get("docs_examined") is not None]
+    keys = [p.get("keys_examined") for p in profile if p.get("keys_examined") is not None]
+    return {
+        "ms": sum(p.get("ms") or 0 for p in profile),
+        "n_out": next((p["n_out"] for p in reversed(profile) if p.get("n_out") is not None), None),
+        "docs_examined": max(examined) if examined else None,
+        "keys_examined": max(keys) if keys else None,
+        "collscan": any(p.get("collscan") for p in profile),
+        "memory_sort": any(p.get("memory_sort") for p in profile),
+        "spilled": any(p.get("spilled") for p in profile),
+    }
+
+
+def compare_pipelines(collection, original, rewritten, max_time_ms=AGG_COMPARE_TIMEOUT_MS):
+    """Explain totals for both versions of a pipeline, each run capped at max_time_ms."""
+    results = []
+    for stages in (original, rewritten):
+        profile = profile_pipeline(explain_pipeline(collection, stages, max_time_ms), stages)
+        results.append(summarize_profile(profile))
+    return results
@@ -0,0 +1,77 @@
+import time
+import uuid
+from config.settings import AGG_RUN_BATCH_SIZE, AGG_RUN_FLUSH_SECONDS
+from utils.pipeline_tools import WRITE_STAGES, stage_name, inject_limit
+
+# The first rows go to the GUI in small batches, later ones in full batches
+FIRST_EMIT = 50
+
+
+def run_tag():
+    """Unique comment for one run, used to find its server operation."""
+    return f"prismdb-run-{uuid.uuid4().hex[:12]}"
+
+
+def stream_pipeline(collection, stages, cap, on_rows, stopped, tag, batch_size=AGG_RUN_BATCH_SIZE):
+    """
+    Reads the pipeline's cursor in `batch_size` batches and hands rows to
+    on_rows(list) as they arrive: the first ones at once, then whenever a
+    batch fills or AGG_RUN_FLUSH_SECONDS pass. Stops after `cap` rows (the
+    $limit is injected so the server stops too) or when stopped() is true.
+    Returns {"rows", "capped", "stopped", "first_ms", "ms"}.
+    """
+    writes = any(stage_name(s) in WRITE_STAGES for s in stages)
+    # One extra row tells a capped result from one that is exactly `cap` long
+    pipeline = stages if writes or not cap else inject_limit(stages, cap + 1)
+    start = time.time()
+    stats = {"rows": 0, "capped": False, "stopped": False, "first_ms": None}
+    pending = []
+    emit_at = FIRST_EMIT
+    last_emit = start
+
+    def flush():
+        nonlocal pending, last_emit
+        if pending:
+            if stats["first_ms"] is None:
+                stats["first_ms"] = round((time.time() - start) * 1000)
+            on_rows(pending)
+            pending = []
+        last_emit = time.time()
+
+    cursor = collection.aggregate(pipeline, batchSize=batch_size, allowDiskUse=True, comment=tag)
+    try:
+        for doc in cursor:
+            if stopped():
+                stats["stopped"] = True
+                break
+            if cap and stats["rows"] >= cap:
+                stats["capped"] = True
+                break
+            pending.append(doc)
+            stats["rows"] += 1
+            if len(pending) >= emit_at or time.time() - last_emit >= AGG_RUN_FLUSH_SECONDS:
+                flush()
+                emit_at = min(emit_at * 2, batch_size)
+        flush()
+    finally:
+        # Kills the server-side cursor when the run ends early
+        cursor.close()
+    stats["ms"] = round((time.time() - start) * 1000)
+    return stats
+
+
+def kill_run(client, tag):
+    """
+    Kills the server operations of a run (the aggregate, or the getMore
+    reading its cursor) by their comment. Returns how many were killed.
+    """
+    ops = client.admin.aggregate([
+        {"$currentOp": {"allUsers": False, "idleConnections": False}},
+        {"$match": {"$or": [{"command.comment": tag}, {"cursor.originatingCommand.comment": tag}]}},
+    ])
+    killed = 0
+    for op in ops:
+        if "opid" in op:
+            client.admin.command("killOp", op=op["opid"])
+            killed += 1
+    return killed
@@ -0,0 +1,64 @@
+import hashlib
+from bson import json_util
+from pymongo.errors import OperationFailure
+from config.settings import AGG_SAMPLE_PREFIX
+from core.agg_preview import preview_stage
+
+
+def sample_name(namespace, size, seed, range_filter=None):
+    """Temporary collection name for one sample definition; the same seed gives the same name."""
+    raw = json_util.dumps([namespace, size, seed, range_filter], sort_keys=True)
+    return AGG_SAMPLE_PREFIX + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def sample_stages(size, range_filter=None):
+    """
+    The subset as pipeline stages: a $sample (a random cursor, cheap while
+    `size` is under 5% of the collection) or the first `size` documents
+    matching a range filter, which an index on the range field can serve.
+    """
+    if range_filter:
+        return [{"$match": range_filter}, {"$limit": size}]
+    return [{"$sample": {"size": size}}]
+
+
+def sampled_source(collection, size, seed, range_filter=None):
+    """
+    (source, prefix, info) to run a pipeline on a subset of `collection`.
+
+    The subset is written once to a temporary collection and reused for as
+    long as the seed stays the same. Without write access the subset stages
+    are returned as a prefix to run in front of the pipeline instead, and
+    every run draws a new subset.
+    """
+    db = collection.database
+    name = sample_name(collection.full_name, size, seed, range_filter)
+    info = {"total": collection.estimated_document_count(), "cached": True, "temp": True}
+    try:
+        if not db.list_collection_names(filter={"name": name}):
+            info["cached"] = False
+            collection.aggregate(sample_stages(size, range_filter) + [{"$out": name}], allowDiskUse=True)
+        info["size"] = db[name].estimated_document_count()
+        return db[name], [], info
+    except OperationFailure:
+        info.update(cached=False, temp=False, size=min(size, info["total"]))
+        return collection, sample_stages(size, range_filter), info
+
+
+def drop_samples(db):
+    """Drops every temporary sample collection in `db`; returns how many there were."""
+    names = [n for n in db.list_collection_names() if n.startswith(AGG_SAMPLE_PREFIX)]
+    for name in names:
+        db.drop_collection(name)
+    return len(names)
+
+
+def preview_sampled(collection, stages, index, cache, limit, replay, size, seed, range_filter=None):
+    """preview_stage() on a subset of the collection; info["sample"] describes the subset."""
+    source, prefix, sample = sampled_source(collection, size, seed, range_filter)
+    docs, info = preview_stage(source, prefix + stages, index + len(prefix), cache, limit, replay)
+    if info.get("from_stage") is not None:
+        # Numbered from the user's stages; None means the subset itself was replayed
+        info["from_stage"] = info["from_stage"] - len(prefix) if info["from_stage"] >= len(prefix) else None
+    info["sample"] = sample
+    return docs, info
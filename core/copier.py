@@ -0,0 +1,141 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from pymongo.errors import BulkWriteError, CollectionInvalid
+from config.settings import COPY_BATCH_SIZE, COPY_READERS, COPY_LOG_INTERVAL
+from core.indexes import snapshot_indexes, restore_indexes
+from core.ranges import split_id_ranges
+
+# Documents stay as raw BSON end to end: no decode on read, no encode on write
+RAW_CODEC = CodecOptions(document_class=RawBSONDocument)
+
+
+class CopyStats:
+    """Thread-safe counters shared by the range readers."""
+
+    def __init__(self, total, on_add=None):
+        self.total = total
+        self.on_add = on_add or (lambda docs, nbytes: None)
+        self.docs = 0
+        self.bytes = 0
+        self.rejected = 0
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def add(self, docs, nbytes, rejected=0):
+        with self._lock:
+            self.docs += docs
+            self.bytes += nbytes
+            self.rejected += rejected
+        self.on_add(docs, nbytes)
+
+    def summary(self):
+        elapsed = max(time.time() - self.started, 1e-6)
+        return (
+            f"{self.docs}/{self.total} docs, "
+            f"{self.docs / elapsed:,.0f} docs/s, "
+            f"{self.bytes / elapsed / (1024 * 1024):.1f} MB/s"
+        )
+
+    def percent(self):
+        return min(99, int(self.docs / self.total * 100)) if self.total else 0
+
+
+def replicate_options(src_coll, dst_db, dst_name):
+    """Creates the target with the source's collection options (validator, capped, collation...)."""
+    info = next(src_coll.database.list_collections(filter={"name": src_coll.name}), None)
+    if not info or info.get("type") == "view":
+        return False
+    options = dict(info.get("options", {}))
+    try:
+        dst_db.create_collection(dst_name, **options)
+        return True
+    except CollectionInvalid:
+        return False  # already exists
+
+
+def _write_batch(dst, batch, stats):
+    nbytes = sum(len(d.raw) for d in batch)
+    try:
+        dst.insert_many(batch, ordered=False)
+        stats.add(len(batch), nbytes)
+    except BulkWriteError as e:
+        n_ok = e.details.get("nInserted", 0)
+        stats.add(n_ok, nbytes, len(batch) - n_ok)
+
+
+def _copy_range(src, dst, rng, batch_size, stats, cancelled):
+    batch = []
+    for doc in src.find(rng.filter(), batch_size=batch_size):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            _write_batch(dst, batch, stats)
+            batch = []
+            if cancelled():
+                return
+    if batch:
+        _write_batch(dst, batch, stats)
+
+
+def copy_collection(src_coll, dst_coll, options=None, log=None, progress=None, cancelled=None, advance=None):
+    """
+    Streams every document of src_coll into dst_coll.
+    Parallel readers each own one _id range and write unordered batches.
+    advance(docs, nbytes) is called per written batch; log() gets a
+    progress line every COPY_LOG_INTERVAL seconds.
+    options: readers, batch_size, copy_options, copy_indexes, drop_target
+    Returns the CopyStats.
+    """
+    options = options or {}
+    log = log or (lambda msg: None)
+    progress = progress or (lambda text, pct: None)
+    cancelled = cancelled or (lambda: False)
+    readers = options.get("readers", COPY_READERS)
+    batch_size = options.get("batch_size", COPY_BATCH_SIZE)
+
+    if options.get("drop_target"):
+        dst_coll.drop()
+        log(f"Dropped target '{dst_coll.name}'.")
+    if options.get("copy_options", True):
+        if replicate_options(src_coll, dst_coll.database, dst_coll.name):
+            log(f"Created '{dst_coll.name}' with source collection options.")
+
+    src = src_coll.with_options(codec_options=RAW_CODEC)
+    dst = dst_coll.with_options(codec_options=RAW_CODEC)
+    # A few ranges per reader keeps threads busy when ranges are uneven
+    ranges = split_id_ranges(src_coll, readers * 4)
+    stats = CopyStats(src_coll.estimated_document_count(), advance)
+    log(f"Copying '{src_coll.name}' -> '{dst_coll.name}' with {readers} reader(s) over {len(ranges)} _id range(s).")
+
+    with ThreadPoolExecutor(max_workers=readers) as pool:
+        futures = [
+            pool.submit(_copy_range, src, dst, rng, batch_size, stats, cancelled)
+            for rng in ranges
+        ]
+        pending = set(futures)
+        last_log = time.time()
+        while pending:
+            done, pending = wait(pending, timeout=1.0, return_when=FIRST_EXCEPTION)
+            for f in done:
+                if f.exception():
+                    for p in pending:
+                        p.cancel()
+                    raise f.exception()
+            progress(f"Copying {src_coll.name}: {stats.summary()}", stats.percent())
+            if pending and time.time() - last_log >= COPY_LOG_INTERVAL:
+                last_log = time.time()
+                log(f"Copying '{src_coll.name}': {stats.summary()} ({stats.percent()}%)")
+
+    log(f"Copied '{src_coll.name}': {stats.summary()}" + (f", {stats.rejected} rejected" if stats.rejected else ""))
+
+    if options.get("copy_indexes", True) and not cancelled():
+        specs = snapshot_indexes(src_coll)
+        if specs:
+            log(f"Building {len(specs)} index(es) on '{dst_coll.name}'...")
+            failed = restore_indexes(dst_coll, specs)
+            for name, err in failed:
+                log(f"ERROR building index '{name}': {err}")
+
+    return stats
@@ -0,0 +1,128 @@
+import re
+from pymongo.errors import OperationFailure
+from utils.query_shape import command_shape
+
+# Comment on our own $currentOp aggregate, so it can leave itself out
+CURRENTOP_TAG = "prismdb-currentop"
+
+# Only what the viewer shows: a command can carry megabytes of documents
+# (an insert batch), so the server trims each operation before sending it
+OP_PROJECTION = {
+    "opid": 1, "ns": 1, "op": 1, "desc": 1, "active": 1,
+    "secs_running": 1, "microsecs_running": 1, "planSummary": 1,
+    "client": 1, "appName": 1, "waitingForLock": 1, "numYields": 1,
+    "command.filter": 1, "command.query": 1, "command.q": 1, "command.pipeline": 1,
+    "command.sort": 1, "command.updates.q": 1, "command.deletes.q": 1,
+    "cursor.originatingCommand.filter": 1, "cursor.originatingCommand.pipeline": 1,
+    "cursor.originatingCommand.sort": 1,
+    "command_name": {"$let": {
+        "vars": {"first": {"$arrayElemAt": [{"$objectToArray": {"$ifNull": ["$command", {}]}}, 0]}},
+        "in": "$$first.k",
+    }},
+    "origin_name": {"$let": {
+        "vars": {"first": {"$arrayElemAt": [
+            {"$objectToArray": {"$ifNull": ["$cursor.originatingCommand", {}]}}, 0
+        ]}},
+        "in": "$$first.k",
+    }},
+}
+
+
+def op_filter(namespace="", min_secs=0, active_only=True, include_system=False):
+    """$match for the viewer's filters, applied on the server."""
+    match = {"opid": {"$exists": True}, "command.comment": {"$ne": CURRENTOP_TAG}}
+    if active_only:
+        match["active"] = True
+    if namespace:
+        match["ns"] = {"$regex": re.escape(namespace), "$options": "i"}
+    if min_secs:
+        match["secs_running"] = {"$gte": min_secs}
+    if not include_system:
+        # Internal threads (replication, TTL, ...) have no client
+        match["client"] = {"$exists": True}
+    return match
+
+
+def fetch_ops(client, match, all_users=True):
+    """
+    Current operations matching `match`, trimmed to OP_PROJECTION.
+    Returns (ops, all_users): without the inprog privilege only the
+    user's own operations can be listed, and all_users comes back False.
+    """
+    def run(everyone):
+        return list(client.admin.aggregate(
+            [
+                {"$currentOp": {"allUsers": everyone, "idleConnections": False}},
+                {"$match": match},
+                {"$project": OP_PROJECTION},
+            ],
+            comment=CURRENTOP_TAG,
+        ))
+
+    if all_users:
+        try:
+            return run(True), True
+        except OperationFailure as e:
+            if e.code != 13:  # Unauthorized
+                raise
+    return run(False), False
+
+
+def describe_op(op):
+    """A flat row for one operation, with its query shape."""
+    command = op.get("command") or {}
+    name = op.get("command_name") or ""
+    origin = op.get("cursor", {}).get("originatingCommand")
+    if name == "getMore" and origin:
+        # A getMore runs the query of the command that opened the cursor
+        name = op.get("origin_name") or name
+        command = origin
+    _, shape = command_shape({name or "op": 1, **command})
+    plan = op.get("planSummary") or ""
+    return {
+        "opid": op.get("opid"),
+        "ns": op.get("ns") or "",
+        "op": op.get("op") or "",
+        "command": name,
+        "shape": shape,
+        "secs": op.get("microsecs_running", 0) / 1e6 if "microsecs_running" in op else op.get("secs_running", 0),
+        "plan": plan,
+        "collscan": "COLLSCAN" in plan,
+        "client": op.get("client") or op.get("desc") or "",
+        "app": op.get("appName") or "",
+        "waiting": bool(op.get("waitingForLock")),
+        "yields": op.get("numYields", 0),
+    }
+
+
+def group_ops(rows):
+    """
+    Operations grouped by namespace and query shape, slowest group first;
+    the operations of a group are slowest first as well.
+    """
+    groups = {}
+    for row in rows:
+        key = (row["ns"], row["command"], row["shape"])
+        g = groups.setdefault(key, {
+            "ns": row["ns"], "command": row["command"], "shape": row["shape"],
+            "ops": [], "max_secs": 0, "total_secs": 0, "collscan": False,
+        })
+        g["ops"].append(row)
+        g["max_secs"] = max(g["max_secs"], row["secs"])
+        g["total_secs"] += row["secs"]
+        g["collscan"] = g["collscan"] or row["collscan"]
+    for g in groups.values():
+        g["ops"].sort(key=lambda r: -r["secs"])
+    return sorted(groups.values(), key=lambda g: -g["max_secs"])
+
+
+def kill_ops(client, opids):
+    """Sends killOp for each id. Returns (killed, errors)."""
+    killed, errors = 0, []
+    for opid in opids:
+        try:
+            client.admin.command("killOp", op=opid)
+            killed += 1
+        except OperationFailure as e:
+            errors.append(f"{opid}: {e}")
+    return killed, errors
@@ -0,0 +1,72 @@
+import os
+import json
+import bson
+from bson import json_util
+
+
+def iter_json_array(f, chunk_size=1 << 20):
+    """Streams the elements of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder(object_hook=json_util.object_hook)
+    buf = f.read(chunk_size).lstrip()
+    while not buf:
+        more = f.read(chunk_size)
+        if not more:
+            return
+        buf = more.lstrip()
+    if buf[0] != "[":
+        raise ValueError("Expected a JSON array")
+    pos = 1
+    eof = False
+
+    while True:
+        while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ","):
+            pos += 1
+        if pos >= len(buf):
+            if eof:
+                raise ValueError("Unterminated JSON array")
+            more = f.read(chunk_size)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+            # A value touching the buffer edge may continue in the next chunk
+            if end == len(buf) and not eof:
+                raise json.JSONDecodeError("Truncated", buf, end)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            more = f.read(chunk_size)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
+            continue
+        yield obj
+        pos = end
+        if pos > chunk_size:
+            buf, pos = buf[pos:], 0
+
+
+def iter_file_docs(file_path):
+    """Yields documents from a .json (array, NDJSON or single object) or .bson file."""
+    ext = os.path.splitext(file_path)[1].lower()
+
+    if ext == ".json":
+        with open(file_path, "r", encoding="utf-8") as f:
+            head = f.read(4096).lstrip()
+            f.seek(0)
+            if head.startswith("["):
+                yield from iter_json_array(f)
+                return
+            try:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line, object_hook=json_util.object_hook)
+            except json.JSONDecodeError:
+                # Pretty-printed single document
+                f.seek(0)
+                yield json.load(f, object_hook=json_util.object_hook)
+    elif ext == ".bson":
+        with open(file_path, "rb") as f:
+            yield from bson.decode_file_iter(f)
@@ -0,0 +1,66 @@
+from pymongo import IndexModel
+
+# listIndexes fields that describe the index itself rather than its options
+_SPEC_META_KEYS = ("key", "v", "ns")
+
+
+def snapshot_indexes(coll):
+    """Returns the raw listIndexes specs for every index except the default _id_."""
+    return [dict(spec) for spec in coll.list_indexes() if spec.get("name") != "_id_"]
+
+
+def index_model_from_spec(spec):
+    """Rebuilds an IndexModel from a listIndexes spec, keeping every option as-is."""
+    options = {k: v for k, v in spec.items() if k not in _SPEC_META_KEYS}
+    return IndexModel(list(spec["key"].items()), **options)
+
+
+def deferrable_indexes(specs, keep_fields=None):
+    """
+    Picks the indexes that are safe to drop for a bulk load.
+    Unique indexes are constraints, not just access paths, so they always stay.
+    Indexes leading with one of `keep_fields` stay too (e.g. an upsert key).
+    """
+    keep_fields = set(keep_fields or [])
+    deferred = []
+    for spec in specs:
+        if spec.get("unique"):
+            continue
+        if next(iter(spec["key"]), None) in keep_fields:
+            continue
+        deferred.append(spec)
+    return deferred
+
+
+def drop_indexes(coll, specs):
+    for spec in specs:
+        coll.drop_index(spec["name"])
+
+
+def restore_indexes(coll, specs, queue=None):
+    """
+    Re-creates the given specs one by one so progress can be reported.
+    Indexes that already exist (by name) are skipped.
+    Returns a list of (name, error) for the ones that failed.
+    """
+    existing = {spec.get("name") for spec in coll.list_indexes()}
+    pending = [spec for spec in specs if spec["name"] not in existing]
+    failed = []
+
+    for i, spec in enumerate(pending):
+        if queue is not None:
+            queue.put(
+                (
+                    "progress",
+                    f"Rebuilding index '{spec['name']}' on {coll.name} ({i + 1}/{len(pending)})",
+                    int((i / len(pending)) * 100),
+                )
+            )
+        try:
+            coll.create_indexes([index_model_from_spec(spec)])
+        except Exception as e:
+            failed.append((spec["name"], str(e)))
+            if queue is not None:
+                queue.put(("log", f"ERROR rebuilding index '{spec['name']}': {e}"))
+
+    return failed
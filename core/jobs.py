@@ -0,0 +1,150 @@
+import time
+from multiprocessing import Process, Queue, Value, Array, Event
+
+STATUS_LEN = 256
+
+
+class JobChannel:
+    """
+    A worker's link back to the GUI. put() accepts the usual queue messages,
+    but ("progress", text, pct) only overwrites shared counters, so workers
+    can report every batch without flooding the GUI with messages.
+    """
+
+    def __init__(self):
+        self.messages = Queue()
+        self._status = Array("c", STATUS_LEN)
+        self._pct = Value("i", 0)
+        self._docs = Value("d", 0.0)
+        self._bytes = Value("d", 0.0)
+        self._total = Value("d", 0.0)
+        self._restoring = Value("b", 0)
+        self._cancel = Event()
+
+    # --- Worker side ---
+    def put(self, msg):
+        if msg[0] == "progress":
+            self.set_status(msg[1], msg[2] if len(msg) > 2 else None)
+        else:
+            self.messages.put(msg)
+
+    def set_status(self, text, pct=None):
+        with self._status.get_lock():
+            self._status.value = text.encode("utf-8", "replace")[: STATUS_LEN - 1]
+        if pct is not None:
+            self._pct.value = int(pct)
+
+    def set_total(self, docs):
+        self._total.value = docs
+
+    def advance(self, docs=0, nbytes=0):
+        with self._docs.get_lock():
+            self._docs.value += docs
+        if nbytes:
+            with self._bytes.get_lock():
+                self._bytes.value += nbytes
+
+    def set_restoring(self, flag):
+        """Marks an index rebuild in progress; the GUI never kills a job while this is set."""
+        self._restoring.value = 1 if flag else 0
+
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    # --- GUI side ---
+    def cancel(self):
+        self._cancel.set()
+
+    def reset(self):
+        """Clears the counters before a pooled process takes its next job."""
+        self.set_status("", 0)
+        self._docs.value = 0.0
+        self._bytes.value = 0.0
+        self._total.value = 0.0
+        self._restoring.value = 0
+        self._cancel.clear()
+
+    def snapshot(self):
+        return {
+            "status": self._status.value.decode("utf-8", "replace"),
+            "pct": self._pct.value,
+            "docs": self._docs.value,
+            "bytes": self._bytes.value,
+            "total": self._total.value,
+            "restoring": bool(self._restoring.value),
+        }
+
+
+class Job:
+    """One background task: queued, then run in a pool process or its own process."""
+
+    def __init__(self, job_id, name, target, args, owner=None, label="", pool_key=None):
+        self.id = job_id
+        self.name = name
+        self.target = target
+        self.args = args
+        self.owner = owner
+        self.label = label
+        self.pool_key = pool_key
+        self.quiet = False  # background runs: results go to the log, not to dialogs
+        self.worker = None
+        self.state = "queued"  # queued | running | cancelling | restoring | done | failed | cancelled
+        self.message = ""
+        self.channel = None
+        self.process = None
+        self.created = time.time()
+        self.started = None
+        self.ended = None
+        self.cancel_requested = None
+        self.last = {"status": "", "pct": 0, "docs": 0, "bytes": 0, "total": 0, "restoring": False}
+
+    @property
+    def active(self):
+        return self.state in ("running", "cancelling", "restoring")
+
+    @property
+    def finished(self):
+        return self.state in ("done", "failed", "cancelled")
+
+    def holds_worker(self):
+        return self.worker is not None and self.worker.job is self
+
+    def start(self, worker=None):
+        if worker is not None:
+            worker.run(self)
+            self.worker = worker
+            self.channel = worker.channel
+            self.process = worker.process
+        else:
+            self.channel = JobChannel()
+            self.process = Process(target=self.target, args=self.args + (self.channel,), daemon=True)
+            self.process.start()
+        self.state = "running"
+        self.started = time.time()
+
+    def refresh(self):
+        if self.channel is not None:
+            self.last = self.channel.snapshot()
+        return self.last
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.ended or time.time()) - self.started
+
+    def throughput(self):
+        """Docs/s and MB/s averaged since the job started."""
+        elapsed = max(self.elapsed(), 1e-6)
+        return self.last["docs"] / elapsed, self.last["bytes"] / elapsed / (1024 * 1024)
+
+    def eta(self):
+        """Seconds left, from the document total if known, else from the percentage."""
+        if not self.active:
+            return None
+        elapsed = self.elapsed()
+        total, docs, pct = self.last["total"], self.last["docs"], self.last["pct"]
+        if total and docs:
+            return max(0.0, elapsed * (total - docs) / docs)
+        if 0 < pct < 100:
+            return elapsed * (100 - pct) / pct
+        return None
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import time
+from bson import json_util
+from config.settings import MATVIEW_HISTORY
+from utils.pipeline_tools import BLOCKING_STAGES, WRITE_STAGES, stage_name
+
+MATVIEW_DIR = "matviews"
+MERGE_MODES = ("replace", "merge", "keepExisting", "accumulate")
+
+# Stages whose output for a document depends on other documents: run over a
+# watermark window only, they produce window-only results ($sort and
+# $unionWith do not combine documents, so they stay safe)
+WINDOW_UNSAFE_STAGES = (BLOCKING_STAGES - {"$sort", "$unionWith"}) | {"$limit", "$skip"}
+
+# $group accumulators whose results for two batches of documents combine exactly
+COMBINE = {
+    "$sum": lambda f: {"$add": [{"$ifNull": ["$" + f, 0]}, "$$new." + f]},
+    "$count": lambda f: {"$add": [{"$ifNull": ["$" + f, 0]}, "$$new." + f]},
+    "$min": lambda f: {"$min": ["$" + f, "$$new." + f]},
+    "$max": lambda f: {"$max": ["$" + f, "$$new." + f]},
+    "$first": lambda f: {"$ifNull": ["$" + f, "$$new." + f]},
+    "$last": lambda f: "$$new." + f,
+}
+
+
+def new_view(conn, db_name, name, source, pipeline, target, on=None, when_matched="replace",
+             watermark_field="", interval=0):
+    """A view definition as stored by MatViewStore; checked with validate_view()."""
+    return {
+        "id": MatViewStore.key(conn, db_name, name),
+        "name": name,
+        "conn": conn,
+        "db": db_name,
+        "source": source,
+        "pipeline": pipeline,
+        "target": target,
+        "on": on or ["_id"],
+        "when_matched": when_matched,
+        "watermark_field": watermark_field,
+        "watermark": None,
+        "interval": interval,  # minutes between scheduled refreshes; 0 = manual only
+        "created": time.time(),
+        "last_run": None,
+        "history": [],
+    }
+
+
+def accumulate_update(pipeline):
+    """
+    The $merge whenMatched pipeline that folds a new batch's $group results
+    into the stored ones. Only a trailing $group with $sum/$count/$min/$max/
+    $first/$last accumulators combines exactly; anything else raises.
+    """
+    if not pipeline or stage_name(pipeline[-1]) != "$group":
+        raise ValueError("Accumulating refreshes need the pipeline to end with $group.")
+    update = {}
+    for field, expr in pipeline[-1]["$group"].items():
+        if field == "_id":
+            continue
+        op = next(iter(expr)) if isinstance(expr, dict) and expr else None
+        if op not in COMBINE:
+            raise ValueError(f"{op or expr} in '{field}' cannot be merged incrementally; use 'replace' with full refreshes.")
+        update[field] = COMBINE[op](field)
+    return [{"$set": update}]
+
+
+def window_unsafe_stages(view):
+    """
+    Stages that make incremental refreshes wrong for this view. Accumulating
+    views fold a trailing $group into the stored rows, so that one is fine.
+    """
+    stages = view["pipeline"]
+    if view["when_matched"] == "accumulate" and stages and stage_name(stages[-1]) == "$group":
+        stages = stages[:-1]
+    return sorted({stage_name(s) for s in stages} & WINDOW_UNSAFE_STAGES)
+
+
+def validate_view(view):
+    if not view["name"] or not view["target"]:
+        raise ValueError("A view needs a name and a target collection.")
+    if view["target"] == view["source"]:
+        raise ValueError("The target must differ from the source collection.")
+    if any(stage_name(s) in WRITE_STAGES for s in view["pipeline"]):
+        raise ValueError("The pipeline must not contain $out/$merge; the view adds its own $merge.")
+    if view["when_matched"] not in MERGE_MODES:
+        raise ValueError(f"Unknown merge mode: {view['when_matched']}")
+    if view["when_matched"] == "accumulate":
+        if view["on"] != ["_id"]:
+            raise ValueError("Accumulating refreshes merge on _id (the $group key).")
+        accumulate_update(view["pipeline"])
+    unsafe = window_unsafe_stages(view) if view["watermark_field"] else []
+    if unsafe:
+        raise ValueError(
+            f"The pipeline combines documents ({', '.join(unsafe)}), so a watermark refresh would store results "
+            "for the new documents only. Use 'accumulate' with a trailing $group, or leave the watermark empty "
+            "for full rebuilds."
+        )
+
+
+def merge_stage(view):
+    mode = view["when_matched"]
+    on = view["on"]
+    return {
+        "$merge": {
+            "into": view["target"],
+            "on": on[0] if len(on) == 1 else on,
+            "whenMatched": accumulate_update(view["pipeline"]) if mode == "accumulate" else mode,
+            "whenNotMatched": "insert",
+        }
+    }
+
+
+def _get_path(doc, path):
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def latest_watermark(coll, field):
+    """Highest value of `field` in the source (an index on it makes this one key lookup)."""
+    doc = next(iter(coll.find({field: {"$exists": True, "$ne": None}}, {field: 1}).sort(field, -1).limit(1)), None)
+    return None if doc is None else _get_path(doc, field)
+
+
+def refresh_view(db, view, full=False):
+    """
+    Brings the target up to date. With a watermark field and a previous
+    watermark, only source documents in (last watermark, current maximum]
+    run through the pipeline and are merged into the target; otherwise the
+    target is rebuilt with $out, so rows whose sources disappeared go too.
+    Updates view["watermark"] / ["last_run"] and returns the history record.
+    """
+    start = time.time()
+    source = db[view["source"]]
+    field = view["watermark_field"]
+    # Views saved before window_unsafe_stages() was checked are rebuilt instead
+    incremental = bool(field) and view["watermark"] is not None and not full and not window_unsafe_stages(view)
+    upper = latest_watermark(source, field) if field else None
+    record = {"started": start, "mode": "incremental" if incremental else "full", "from": view["watermark"], "to": upper}
+
+    if incremental and (upper is None or upper <= view["watermark"]):
+        record["mode"] = "skipped"  # nothing newer than the watermark
+        upper = view["watermark"]
+    elif incremental:
+        window = {"$match": {field: {"$gt": view["watermark"], "$lte": upper}}}
+        if view["on"] != ["_id"]:
+            # $merge on other fields needs a unique index on them
+            db[view["target"]].create_index([(f, 1) for f in view["on"]], unique=True)
+        source.aggregate([window] + view["pipeline"] + [merge_stage(view)], allowDiskUse=True)
+    else:
+        # Bounded by the watermark taken up front, so the next window starts exactly here
+        window = [{"$match": {field: {"$lte": upper}}}] if upper is not None else []
+        source.aggregate(window + view["pipeline"] + [{"$out": view["target"]}], allowDiskUse=True)
+        if view["on"] != ["_id"]:
+            db[view["target"]].create_index([(f, 1) for f in view["on"]], unique=True)
+
+    view["watermark"] = upper
+    view["last_run"] = start
+    record["to"] = upper
+    record["ms"] = round((time.time() - start) * 1000)
+    record["count"] = db[view["target"]].estimated_document_count()
+    return record
+
+
+def is_due(view, now=None):
+    if not view.get("interval"):
+        return False
+    now = now or time.time()
+    return (view.get("last_run") or 0) + view["interval"] * 60 <= now
+
+
+class MatViewStore:
+    """One JSON file per materialized view under matviews/; workers append refresh history."""
+
+    @staticmethod
+    def key(conn, db_name, name):
+        return hashlib.sha1(f"{conn}|{db_name}|{name}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _path(view_id):
+        return os.path.join(MATVIEW_DIR, f"{view_id}.json")
+
+    @staticmethod
+    def load(view_id):
+        path = MatViewStore._path(view_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                return json.load(f, object_hook=json_util.object_hook)
+        except Exception:
+            return None
+
+    @staticmethod
+    def save(view):
+        os.makedirs(MATVIEW_DIR, exist_ok=True)
+        path = MatViewStore._path(view["id"])
+        # Write-then-rename: a refresh worker and the GUI may save concurrently
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(view, f, default=json_util.default)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def delete(view_id):
+        path = MatViewStore._path(view_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    @staticmethod
+    def list(conn, db_name):
+        if not os.path.isdir(MATVIEW_DIR):
+            return []
+        views = []
+        for name in sorted(os.listdir(MATVIEW_DIR)):
+            if not name.endswith(".json"):
+                continue
+            view = MatViewStore.load(name[:-5])
+            if view is not None and view["conn"] == conn and view["db"] == db_name:
+                views.append(view)
+        return sorted(views, key=lambda v: v["name"])
+
+    @staticmethod
+    def record(view_id, record, watermark=None, last_run=None):
+        """Appends a refresh record to the stored view (re-read, so GUI edits are kept)."""
+        view = MatViewStore.load(view_id)
+        if view is None:
+            return None  # deleted while refreshing
+        if "error" not in record:
+            view["watermark"] = watermark
+            view["last_run"] = last_run
+        else:
+            view["last_run"] = record["started"]  # do not retry on every check
+        view["history"] = ([record] + view["history"])[:MATVIEW_HISTORY]
+        MatViewStore.save(view)
+        return view
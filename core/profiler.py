@@ -0,0 +1,148 @@
+import random
+from collections import Counter
+import numpy as np
+from bson import json_util
+from config.settings import PROFILER_BATCH, PROFILER_LATENCY_SAMPLES
+from utils.query_shape import command_shape
+
+LEVELS = [("Off", 0), ("Slow Operations", 1), ("All Operations", 2)]
+
+# Only what the aggregation needs; profile entries can hold whole documents
+PROFILE_PROJECTION = {
+    "_id": 0, "ts": 1, "ns": 1, "op": 1, "millis": 1, "planSummary": 1,
+    "docsExamined": 1, "keysExamined": 1, "nreturned": 1, "nMatched": 1, "ndeleted": 1,
+    "command": 1, "query": 1, "originatingCommand": 1,
+}
+
+RANKINGS = {
+    "Total Time": lambda s: s["total_ms"],
+    "Count": lambda s: s["count"],
+    "p95 Latency": lambda s: s["p95"],
+    "Examined / Returned": lambda s: s["ratio"] if s["ratio"] is not None else 0,
+}
+
+
+def get_profiling(db):
+    """(level, slowms) of the database."""
+    status = db.command("profile", -1)
+    return status.get("was", 0), status.get("slowms", 100)
+
+
+def set_profiling(db, level, slowms):
+    db.command("profile", level, slowms=slowms)
+
+
+def read_profile(db, since=None, limit=PROFILER_BATCH):
+    """
+    Profile entries from `since` on, oldest first. The boundary timestamp
+    is included, as several entries can share a millisecond; the caller
+    drops the ones it has already seen.
+    """
+    query = {"ns": {"$ne": f"{db.name}.system.profile"}}
+    if since is not None:
+        query["ts"] = {"$gte": since}
+    cursor = db["system.profile"].find(query, PROFILE_PROJECTION).sort("ts", 1).limit(limit)
+    return list(cursor)
+
+
+def entry_shape(entry):
+    """(command name, shape) of a profile entry; a getMore counts as its query."""
+    command = entry.get("originatingCommand") if entry.get("op") == "getmore" else None
+    command = command or entry.get("command") or {}
+    if not command and isinstance(entry.get("query"), dict):
+        # Pre-3.2 entries carry the filter under `query`
+        command = {entry.get("op") or "query": 1, "filter": entry["query"]}
+    if entry.get("op") in ("update", "remove") and "q" in command:
+        # Write entries hold the single statement ({q, u, ...}), not the command
+        command = {entry["op"]: 1, "q": command["q"]}
+    name, shape = command_shape(command)
+    return name or entry.get("op") or "", shape
+
+
+class ProfileTail:
+    """
+    Reads system.profile incrementally: each poll continues after the last
+    timestamp seen, so only new entries cross the wire.
+    """
+
+    def __init__(self):
+        self.last_ts = None
+        self.seen = set()  # entries at last_ts already returned
+        self.more = False  # the last poll filled a batch; read again at once
+
+    def poll(self, db):
+        entries = read_profile(db, self.last_ts)
+        fresh = []
+        for entry in entries:
+            key = json_util.dumps(entry, sort_keys=True)
+            if entry["ts"] == self.last_ts and key in self.seen:
+                continue
+            if entry["ts"] != self.last_ts:
+                self.last_ts, self.seen = entry["ts"], set()
+            self.seen.add(key)
+            fresh.append(entry)
+        self.more = len(entries) >= PROFILER_BATCH and bool(fresh)
+        return fresh
+
+
+class ShapeStats:
+    """
+    Per query shape totals over the ingested profile entries. Latency
+    percentiles come from a reservoir of PROFILER_LATENCY_SAMPLES values per
+    shape, so memory stays bounded however long the tail runs.
+    """
+
+    def __init__(self):
+        self.shapes = {}
+        self.entries = 0
+
+    def clear(self):
+        self.shapes = {}
+        self.entries = 0
+
+    def add(self, entry):
+        name, shape = entry_shape(entry)
+        key = (entry.get("ns") or "", name, shape)
+        s = self.shapes.get(key)
+        if s is None:
+            s = self.shapes[key] = {
+                "ns": key[0], "command": name, "shape": shape, "count": 0, "total_ms": 0,
+                "samples": [], "examined": 0, "keys": 0, "returned": 0, "plans": Counter(),
+                "last_ts": None,
+            }
+        ms = entry.get("millis") or 0
+        s["count"] += 1
+        s["total_ms"] += ms
+        if len(s["samples"]) < PROFILER_LATENCY_SAMPLES:
+            s["samples"].append(ms)
+        else:
+            i = random.randrange(s["count"])
+            if i < PROFILER_LATENCY_SAMPLES:
+                s["samples"][i] = ms
+        s["examined"] += entry.get("docsExamined") or 0
+        s["keys"] += entry.get("keysExamined") or 0
+        # Writes report what they touched instead of nreturned
+        s["returned"] += entry.get("nreturned") or entry.get("nMatched") or entry.get("ndeleted") or 0
+        if entry.get("planSummary"):
+            s["plans"][entry["planSummary"]] += 1
+        s["last_ts"] = entry.get("ts")
+        self.entries += 1
+
+    def top(self, ranking="Total Time", limit=None):
+        """Summaries of the shapes, worst first by `ranking`."""
+        rows = []
+        for s in self.shapes.values():
+            p50, p95, p99 = np.percentile(s["samples"], [50, 95, 99]) if s["samples"] else (0, 0, 0)
+            plan = s["plans"].most_common(1)[0][0] if s["plans"] else ""
+            rows.append({
+                "ns": s["ns"], "command": s["command"], "shape": s["shape"],
+                "count": s["count"], "total_ms": s["total_ms"], "mean": s["total_ms"] / s["count"],
+                "p50": float(p50), "p95": float(p95), "p99": float(p99),
+                # No returned documents: the ratio is the examined count itself
+                "ratio": s["examined"] / max(s["returned"], 1) if s["examined"] else None,
+                "examined": s["examined"], "keys": s["keys"], "returned": s["returned"],
+                "plan": plan, "collscan": any("COLLSCAN" in p for p in s["plans"]),
+                "last_ts": s["last_ts"],
+            })
+        rows.sort(key=RANKINGS[ranking], reverse=True)
+        return rows[:limit] if limit else rows
@@ -0,0 +1,110 @@
+from datetime import datetime
+from bson import ObjectId
+from bson.int64 import Int64
+
+
+def bson_alias(value):
+    """
+    Maps a Python value to the $type alias used for _id range filters.
+    Numbers share one alias because MongoDB compares them across widths.
+    Returns None for types that cannot be range-split.
+    """
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float, Int64)):
+        return "number"
+    if isinstance(value, ObjectId):
+        return "objectId"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, datetime):
+        return "date"
+    return None
+
+
+class IdRange:
+    """
+    A half-open _id interval [lo, hi) restricted to one BSON type.
+    `lo`/`hi` of None mean unbounded. With `other=True` the range instead
+    covers every _id that is NOT of `bson_type` (mixed-type collections).
+    """
+
+    def __init__(self, bson_type, lo=None, hi=None, other=False):
+        self.bson_type = bson_type
+        self.lo = lo
+        self.hi = hi
+        self.other = other
+
+    def filter(self):
+        if self.other:
+            return {"_id": {"$not": {"$type": self.bson_type}}}
+        cond = {"$type": self.bson_type}
+        if self.lo is not None:
+            cond["$gte"] = self.lo
+        if self.hi is not None:
+            cond["$lt"] = self.hi
+        return {"_id": cond}
+
+    def contains(self, value):
+        alias = bson_alias(value)
+        if self.other:
+            return alias != self.bson_type
+        if alias != self.bson_type:
+            return False
+        if self.lo is not None and value < self.lo:
+            return False
+        if self.hi is not None and value >= self.hi:
+            return False
+        return True
+
+    def split_at(self, mid):
+        return [IdRange(self.bson_type, self.lo, mid), IdRange(self.bson_type, mid, self.hi)]
+
+    def label(self):
+        if self.other:
+            return f"_id not {self.bson_type}"
+        lo = "-inf" if self.lo is None else str(self.lo)
+        hi = "+inf" if self.hi is None else str(self.hi)
+        return f"_id [{lo}, {hi})"
+
+
+def sample_ids(coll, size, query=None):
+    """Random _ids from the server. Uses a random cursor, so it is cheap on large collections."""
+    pipeline = []
+    if query:
+        pipeline.append({"$match": query})
+    pipeline += [{"$sample": {"size": size}}, {"$project": {"_id": 1}}]
+    return [d["_id"] for d in coll.aggregate(pipeline)]
+
+
+def ranges_from_sample(ids, parts):
+    """
+    Builds `parts` contiguous ranges from sampled _ids (dominant type only)
+    plus one catch-all range for every other _id type.
+    """
+    by_type = {}
+    for v in ids:
+        alias = bson_alias(v)
+        if alias is not None:
+            by_type.setdefault(alias, []).append(v)
+    if not by_type:
+        return [IdRange("objectId"), IdRange("objectId", other=True)]
+
+    bson_type, values = max(by_type.items(), key=lambda kv: len(kv[1]))
+    values = sorted(set(values))
+    step = max(1, len(values) // max(1, parts))
+    bounds = values[step::step][: max(0, parts - 1)]
+
+    ranges = []
+    lo = None
+    for b in bounds:
+        ranges.append(IdRange(bson_type, lo, b))
+        lo = b
+    ranges.append(IdRange(bson_type, lo, None))
+    ranges.append(IdRange(bson_type, other=True))
+    return ranges
+
+
+def split_id_ranges(coll, parts, oversample=10):
+    """Splits a collection's _id space into roughly equal ranges. Only _ids cross the network."""
+    return ranges_from_sample(sample_ids(coll, max(1, parts) * oversample), parts)
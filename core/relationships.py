@@ -0,0 +1,204 @@
+import re
+from config.settings import FK_SAMPLE_SIZE, FK_LOOKUP_BATCH, FK_MIN_CONFIDENCE
+
+# $in matches across numeric types, so they compare as one "number" family
+NUMERIC_TYPES = {"int", "long", "double", "decimal"}
+# Type families an _id reference can have
+KEY_TYPES = {"objectId", "string", "number"}
+# Any label or counter has these types, so they also need a name hint
+WEAK_TYPES = {"string", "number"}
+# Exact bounds (string bounds in the stats store may be truncated)
+RANGE_TYPES = {"objectId", "number"}
+# A scalar field whose sampled values are this distinct is treated as unique
+UNIQUE_RATIO = 0.95
+
+
+def _scalar_types(field):
+    return {t for t in field.types if t not in ("null", "array", "object")}
+
+
+def _key_families(field):
+    return {"number" if t in NUMERIC_TYPES else t for t in _scalar_types(field)} & KEY_TYPES
+
+
+def _family_bounds(field):
+    """Bounds per type family; a number family missing any member's bounds has none."""
+    bounds = {t: b for t, b in field.bounds.items() if t not in NUMERIC_TYPES}
+    numeric = _scalar_types(field) & NUMERIC_TYPES
+    if numeric and all(t in field.bounds for t in numeric):
+        bounds["number"] = [
+            min(field.bounds[t][0] for t in numeric), max(field.bounds[t][1] for t in numeric)
+        ]
+    return bounds
+
+
+def query_path(path):
+    """Stats path -> dot notation: "items[].product_id" -> "items.product_id"."""
+    return path.replace("[]", "")
+
+
+def name_hint(path, target):
+    """True when the field name points at `target` (user_id, userId, tag_ids -> users, tags)."""
+    leaf = query_path(path).split(".")[-1]
+    base = re.sub(r"_?ids?$", "", leaf, flags=re.IGNORECASE).lower()
+    if not base:
+        return False
+    t = target.lower()
+    return t in (base, base + "s", base + "es") or (t.endswith("ies") and t[:-3] + "y" == base)
+
+
+def _ranges_overlap(bounds, id_bounds, types):
+    for t in types:
+        if t not in RANGE_TYPES or t not in bounds or t not in id_bounds:
+            return True
+        lo, hi = bounds[t]
+        id_lo, id_hi = id_bounds[t]
+        try:
+            if lo <= id_hi and hi >= id_lo:
+                return True
+        except TypeError:
+            return True
+    return False
+
+
+def candidate_pairs(stats):
+    """
+    (source, path, target, hinted) pairs worth a lookup, from the per-collection
+    CollectionStats in `stats`. A field qualifies when its scalar types match
+    the target's _id types, its value range overlaps the target's _id range,
+    and (for strings and numbers) its name hints at the target.
+    """
+    ids = {}
+    for name, s in stats.items():
+        f = s.fields.get("_id")
+        if f is not None:
+            ids[name] = (_key_families(f), _family_bounds(f))
+
+    pairs = []
+    for source, s in stats.items():
+        for path, f in s.fields.items():
+            if path == "_id" or path.startswith("_id."):
+                continue
+            types = _key_families(f)
+            if not types:
+                continue
+            bounds = _family_bounds(f)
+            for target, (id_types, id_bounds) in ids.items():
+                shared = types & id_types
+                if target == source or not shared:
+                    continue
+                hinted = name_hint(path, target)
+                if not hinted and shared <= WEAK_TYPES:
+                    continue
+                if not _ranges_overlap(bounds, id_bounds, shared):
+                    continue
+                pairs.append((source, path, target, hinted))
+    return pairs
+
+
+def _flatten(value):
+    if isinstance(value, list):
+        for v in value:
+            yield from _flatten(v)
+    elif value is not None and not isinstance(value, dict):
+        yield value
+
+
+def sample_values(coll, paths, size=FK_SAMPLE_SIZE):
+    """One $sample over the source for all candidate paths: {path: [values per document]}."""
+    aliases = {f"f{i}": p for i, p in enumerate(paths)}
+    project = {a: "$" + query_path(p) for a, p in aliases.items()}
+    project["_id"] = 0
+    samples = {p: [] for p in paths}
+    for doc in coll.aggregate([{"$sample": {"size": size}}, {"$project": project}]):
+        for alias, path in aliases.items():
+            if alias in doc:
+                samples[path].append(list(_flatten(doc[alias])))
+    return samples
+
+
+def count_matches(coll, values, min_confidence=FK_MIN_CONFIDENCE, batch=FK_LOOKUP_BATCH):
+    """
+    How many of `values` exist as _id in `coll`, using batched $in lookups on
+    the _id index. Stops early once `min_confidence` can no longer be reached.
+    """
+    allowed_misses = len(values) * (1 - min_confidence)
+    found = 0
+    for i in range(0, len(values), batch):
+        chunk = values[i : i + batch]
+        found += coll.count_documents({"_id": {"$in": chunk}})
+        if (i + len(chunk)) - found > allowed_misses:
+            break
+    return found
+
+
+def cardinality(per_doc, is_array, distinct_estimate=None):
+    """
+    Estimated relationship cardinality from the sampled reference values:
+    "1:1" / "N:1" for single references, "1:N" / "N:M" for arrays of them.
+    A distinct-count estimate from the stats store wins over the small sample.
+    """
+    refs = [v for values in per_doc for v in values]
+    if not refs:
+        return None, 0.0
+    ratio = len(set(refs)) / len(refs)
+    if distinct_estimate is not None:
+        ratio = min(ratio, distinct_estimate)
+    unique = ratio >= UNIQUE_RATIO
+    if is_array:
+        return ("1:N" if unique else "N:M"), ratio
+    return ("1:1" if unique else "N:1"), ratio
+
+
+def detect_relationships(db, stats, sample_size=FK_SAMPLE_SIZE, min_confidence=FK_MIN_CONFIDENCE,
+                         progress=None, cancelled=None):
+    """
+    Verifies candidate pairs against the data. Returns one edge per
+    referencing field, the target holding the largest share of its values:
+    {"source", "field", "target", "confidence", "cardinality", "matched", "checked", "hinted"}
+    """
+    progress = progress or (lambda done, total: None)
+    cancelled = cancelled or (lambda: False)
+    by_source = {}
+    for source, path, target, hinted in candidate_pairs(stats):
+        by_source.setdefault(source, {}).setdefault(path, []).append((target, hinted))
+
+    edges = []
+    for done, (source, paths) in enumerate(sorted(by_source.items()), 1):
+        if cancelled():
+            break
+        samples = sample_values(db[source], sorted(paths), sample_size)
+        for path, targets in paths.items():
+            per_doc = samples[path]
+            values = list({v for vs in per_doc for v in vs})
+            if not values:
+                continue
+            best = None
+            # Name-hinted targets first: a complete match there ends the search
+            for target, hinted in sorted(targets, key=lambda t: (not t[1], t[0])):
+                matched = count_matches(db[target], values, min_confidence)
+                confidence = matched / len(values)
+                if confidence >= min_confidence and (best is None or confidence > best["confidence"]):
+                    best = {
+                        "source": source,
+                        "field": query_path(path),
+                        "target": target,
+                        "confidence": round(confidence, 3),
+                        "matched": matched,
+                        "checked": len(values),
+                        "hinted": hinted,
+                    }
+                if confidence == 1.0:
+                    break
+            if best is None:
+                continue
+            field = stats[source].fields[path]
+            estimate = None
+            if field.hll is not None and sum(field.types.values()):
+                estimate = field.hll.count() / sum(field.types.values())
+            best["cardinality"], best["distinct_ratio"] = cardinality(
+                per_doc, path.endswith("[]"), estimate
+            )
+            edges.append(best)
+        progress(done, len(by_source))
+    return edges
@@ -0,0 +1,251 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config.settings import (
+    SCHEMA_SAMPLE_SIZE,
+    SCHEMA_ROUND_SIZE,
+    SCHEMA_STABLE_ROUNDS,
+    SCHEMA_MAX_DEPTH,
+    SCHEMA_ARRAY_SAMPLE,
+    SCHEMA_SCAN_THREADS,
+    SCHEMA_HLL_PRECISION,
+)
+from core.schema_stats import MAX_STRING_BOUND
+from utils.hll import HyperLogLog
+
+# Array elements are reported under "<path>[]", e.g. "items[].sku"
+ARRAY_SUFFIX = "[]"
+
+# Types whose min/max are collected (others have no useful order)
+BOUNDED_TYPES = ["int", "long", "double", "string", "date", "objectId"]
+
+
+def _expand_level(depth):
+    """
+    Appends the children of every object (and the first elements of every
+    array) found at `depth` to the document's flat `items` list.
+    """
+    fresh = {"$filter": {"input": "$items", "cond": {"$eq": ["$$this.d", depth]}}}
+    children = {
+        "$switch": {
+            "branches": [
+                {
+                    "case": {"$eq": [{"$type": "$$this.v"}, "object"]},
+                    "then": {
+                        "$map": {
+                            "input": {"$objectToArray": "$$this.v"},
+                            "as": "c",
+                            "in": {"p": {"$concat": ["$$this.p", ".", "$$c.k"]}, "v": "$$c.v", "d": depth + 1},
+                        }
+                    },
+                },
+                {
+                    "case": {"$eq": [{"$type": "$$this.v"}, "array"]},
+                    "then": {
+                        "$map": {
+                            "input": {"$slice": ["$$this.v", SCHEMA_ARRAY_SAMPLE]},
+                            "as": "c",
+                            "in": {"p": {"$concat": ["$$this.p", ARRAY_SUFFIX]}, "v": "$$c", "d": depth + 1},
+                        }
+                    },
+                },
+            ],
+            "default": [],
+        }
+    }
+    return {
+        "$set": {
+            "items": {
+                "$concatArrays": [
+                    "$items",
+                    {"$reduce": {"input": fresh, "initialValue": [], "in": {"$concatArrays": ["$$value", children]}}},
+                ]
+            }
+        }
+    }
+
+
+def schema_pipeline(sample_size=None, max_depth=SCHEMA_MAX_DEPTH):
+    """
+    Server-side type analysis: flattens each document into (path, value)
+    items down to `max_depth`, then counts types per path and the number of
+    documents holding each path. Only the histograms and the distinct
+    scalar values of the sampled documents come back.
+    """
+    pipeline = []
+    if sample_size:
+        pipeline.append({"$sample": {"size": sample_size}})
+    pipeline.append(
+        {
+            "$project": {
+                "items": {
+                    "$map": {
+                        "input": {"$objectToArray": "$$ROOT"},
+                        "in": {"p": "$$this.k", "v": "$$this.v", "d": 0},
+                    }
+                }
+            }
+        }
+    )
+    for depth in range(max_depth - 1):
+        pipeline.append(_expand_level(depth))
+    bounded = {
+        "$cond": [{"$in": [{"$type": "$items.v"}, BOUNDED_TYPES]}, "$items.v", None]
+    }
+    # Values for the distinct-count sketches; strings cut as in FieldStats
+    sketched = {
+        "$cond": [
+            {"$in": [{"$type": "$items.v"}, BOUNDED_TYPES]},
+            {
+                "$cond": [
+                    {"$eq": [{"$type": "$items.v"}, "string"]},
+                    {"$substrCP": ["$items.v", 0, MAX_STRING_BOUND]},
+                    "$items.v",
+                ]
+            },
+            "$$REMOVE",
+        ]
+    }
+    pipeline += [
+        {"$unwind": "$items"},
+        {
+            "$group": {
+                "_id": {"doc": "$_id", "p": "$items.p", "t": {"$type": "$items.v"}},
+                "n": {"$sum": 1},
+                "lo": {"$min": bounded},
+                "hi": {"$max": bounded},
+                "vals": {"$addToSet": sketched},
+            }
+        },
+        {
+            "$facet": {
+                "types": [
+                    {
+                        "$group": {
+                            "_id": {"p": "$_id.p", "t": "$_id.t"},
+                            "n": {"$sum": "$n"},
+                            "lo": {"$min": "$lo"},
+                            "hi": {"$max": "$hi"},
+                        }
+                    },
+                ],
+                "presence": [
+                    {"$group": {"_id": {"doc": "$_id.doc", "p": "$_id.p"}}},
+                    {"$group": {"_id": "$_id.p", "docs": {"$sum": 1}}},
+                ],
+                "values": [
+                    {"$unwind": "$vals"},
+                    {"$group": {"_id": {"p": "$_id.p", "t": "$_id.t"}, "v": {"$addToSet": "$vals"}}},
+                ],
+                "sampled": [{"$group": {"_id": "$_id.doc"}}, {"$count": "n"}],
+            }
+        },
+    ]
+    return pipeline
+
+
+def merge_scan(acc, result):
+    """Adds one pipeline result (a $facet document) into the running totals."""
+    acc["sampled"] += result["sampled"][0]["n"] if result["sampled"] else 0
+    for row in result["types"]:
+        path, t = row["_id"]["p"], row["_id"]["t"]
+        types = acc["types"].setdefault(path, {})
+        types[t] = types.get(t, 0) + row["n"]
+        if row.get("lo") is not None:
+            bounds = acc["bounds"].setdefault(path, {})
+            lo, hi = bounds.get(t, (row["lo"], row["hi"]))
+            bounds[t] = [min(lo, row["lo"]), max(hi, row["hi"])]
+    for row in result["presence"]:
+        acc["docs"][row["_id"]] = acc["docs"].get(row["_id"], 0) + row["docs"]
+    for row in result.get("values", []):
+        path, t = row["_id"]["p"], row["_id"]["t"]
+        sketch = acc["sketches"].get(path)
+        if sketch is None:
+            sketch = acc["sketches"][path] = HyperLogLog(SCHEMA_HLL_PRECISION)
+        for value in row["v"]:
+            sketch.add(f"{t}:{value}")
+    return acc
+
+
+def summarize(acc):
+    """
+    {"sampled": n, "fields": {path: {"types", "presence", "array", "bounds"}},
+     "sketches": {path: HyperLogLog}}
+    """
+    sampled = acc["sampled"]
+    fields = {}
+    for path in sorted(acc["types"]):
+        types = acc["types"][path]
+        fields[path] = {
+            "types": dict(sorted(types.items(), key=lambda kv: -kv[1])),
+            "presence": round(acc["docs"].get(path, 0) / sampled, 4) if sampled else 0,
+            "array": "array" in types,
+            "bounds": acc["bounds"].get(path, {}),
+        }
+    return {"sampled": sampled, "fields": fields, "sketches": acc["sketches"]}
+
+
+def scan_collection(coll, sample_size=SCHEMA_SAMPLE_SIZE, round_size=SCHEMA_ROUND_SIZE,
+                    stable_rounds=SCHEMA_STABLE_ROUNDS, max_depth=SCHEMA_MAX_DEPTH):
+    """
+    Samples in rounds of `round_size` until `sample_size` documents were seen
+    or no new path showed up for `stable_rounds` rounds in a row.
+    Small collections are scanned whole in one round.
+    """
+    acc = {"sampled": 0, "types": {}, "docs": {}, "bounds": {}, "sketches": {}}
+    if coll.estimated_document_count() <= round_size:
+        for result in coll.aggregate(schema_pipeline(None, max_depth), allowDiskUse=True):
+            merge_scan(acc, result)
+        return summarize(acc)
+
+    quiet = 0
+    while acc["sampled"] < sample_size and quiet < stable_rounds:
+        known = len(acc["types"])
+        size = min(round_size, sample_size - acc["sampled"])
+        for result in coll.aggregate(schema_pipeline(size, max_depth), allowDiskUse=True):
+            merge_scan(acc, result)
+        quiet = quiet + 1 if len(acc["types"]) == known else 0
+    return summarize(acc)
+
+
+def scan_database(db, names, threads=SCHEMA_SCAN_THREADS, on_done=None, cancelled=None, **kwargs):
+    """
+    Scans collections concurrently. `on_done(name, summary, error)` is called
+    as each one finishes. Returns {name: summary} for the successful ones.
+    """
+    cancelled = cancelled or (lambda: False)
+    on_done = on_done or (lambda name, summary, error: None)
+    results = {}
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = {pool.submit(scan_collection, db[name], **kwargs): name for name in names}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+                on_done(name, results[name], None)
+            except Exception as e:
+                on_done(name, None, e)
+            if cancelled():
+                pool.shutdown(wait=False, cancel_futures=True)
+                break
+    return results
+
+
+def collection_fingerprint(coll):
+    """
+    Document count, data size and index keys. While none of them changes, a
+    rescan would find the same schema. None when unavailable (e.g. views).
+    """
+    try:
+        stats = next(coll.aggregate([{"$collStats": {"storageStats": {}}}]), {}).get("storageStats", {})
+        indexes = sorted(
+            [name, [[field, direction] for field, direction in info["key"]]]
+            for name, info in coll.index_information().items()
+        )
+    except Exception:
+        return None
+    return {"count": stats.get("count"), "size": stats.get("size"), "indexes": indexes}
+
+
+def fingerprint_database(db, names, threads=SCHEMA_SCAN_THREADS):
+    """{name: fingerprint} for `names`, fetched concurrently."""
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return dict(zip(names, pool.map(lambda name: collection_fingerprint(db[name]), names)))
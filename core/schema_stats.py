@@ -0,0 +1,339 @@
+import hashlib
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from bson import json_util, ObjectId
+from bson.int64 import Int64
+from bson.decimal128 import Decimal128
+from config.settings import (
+    SCHEMA_MAX_DEPTH,
+    SCHEMA_ARRAY_SAMPLE,
+    SCHEMA_HLL_PRECISION,
+    SCHEMA_STATS_MAX_AGE,
+)
+from utils.hll import HyperLogLog
+
+STATS_DIR = "schema_stats"
+
+# Values of these types get no min/max and no distinct-count sketch
+NESTED_TYPES = ("object", "array")
+# Long strings are truncated before they are kept as min/max
+MAX_STRING_BOUND = 64
+# A store lock older than this was left by a killed worker and is broken
+LOCK_STALE_SECONDS = 10
+
+PYTHON_TYPES = {
+    "string": str,
+    "int": int,
+    "long": int,
+    "double": float,
+    "decimal": float,
+    "bool": bool,
+    "date": datetime,
+    "objectId": ObjectId,
+    "object": dict,
+    "array": list,
+}
+
+
+def bson_type_name(value):
+    """The $type alias of a decoded value, so client and server counts line up."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, Int64):
+        return "long"
+    if isinstance(value, int):
+        return "int" if -(2 ** 31) <= value < 2 ** 31 else "long"
+    if isinstance(value, float):
+        return "double"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, datetime):
+        return "date"
+    if isinstance(value, ObjectId):
+        return "objectId"
+    if isinstance(value, Decimal128):
+        return "decimal"
+    if isinstance(value, bytes):
+        return "binData"
+    return type(value).__name__
+
+
+def conn_key(uri):
+    """Connection identity for the store: the URI without credentials or options."""
+    return re.sub(r"//[^@/]+@", "//", uri).split("?")[0]
+
+
+class FieldStats:
+    """Per-path counters. Every part merges, so samples can be added in any order."""
+
+    def __init__(self):
+        self.types = {}
+        self.present = 0  # documents holding the path
+        self.bounds = {}  # type -> [min, max]
+        self.hll = None
+
+    def add(self, value):
+        t = bson_type_name(value)
+        self.types[t] = self.types.get(t, 0) + 1
+        if t in NESTED_TYPES or t == "null":
+            return
+        bound = value[:MAX_STRING_BOUND] if t == "string" else value
+        if t in self.bounds:
+            lo, hi = self.bounds[t]
+            try:
+                self.bounds[t] = [min(lo, bound), max(hi, bound)]
+            except TypeError:
+                pass  # values without an order (binData subtypes, regex...)
+        else:
+            self.bounds[t] = [bound, bound]
+        if self.hll is None:
+            self.hll = HyperLogLog(SCHEMA_HLL_PRECISION)
+        # Hashed as cut, like the values the server-side scan sends back
+        self.hll.add(f"{t}:{bound}")
+
+    def merge(self, other):
+        for t, n in other.types.items():
+            self.types[t] = self.types.get(t, 0) + n
+        self.present += other.present
+        for t, (lo, hi) in other.bounds.items():
+            if t in self.bounds:
+                try:
+                    self.bounds[t] = [min(self.bounds[t][0], lo), max(self.bounds[t][1], hi)]
+                except TypeError:
+                    pass
+            else:
+                self.bounds[t] = [lo, hi]
+        if other.hll is not None:
+            if self.hll is None:
+                self.hll = HyperLogLog(other.hll.p, other.hll.registers)
+            else:
+                self.hll.merge(other.hll)
+        return self
+
+    def to_dict(self):
+        data = {"types": self.types, "present": self.present, "bounds": self.bounds}
+        if self.hll is not None:
+            data["hll"] = self.hll.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        f = cls()
+        f.types = dict(data.get("types", {}))
+        f.present = data.get("present", 0)
+        f.bounds = {t: list(b) for t, b in data.get("bounds", {}).items()}
+        if data.get("hll"):
+            f.hll = HyperLogLog.from_dict(data["hll"])
+        return f
+
+
+class CollectionStats:
+    """
+    Schema statistics of one collection, built from sampled documents or
+    from server-side scan histograms. Paths use the scanner's convention:
+    "a.b" for embedded fields, "tags[]" for array elements.
+    """
+
+    def __init__(self):
+        self.docs = 0
+        self.fields = {}
+        self.updated = None
+
+    # --- Building ---
+    def add_document(self, doc, max_depth=SCHEMA_MAX_DEPTH):
+        self.docs += 1
+        seen = set()
+        self._walk(doc, "", 0, seen, max_depth)
+        for path in seen:
+            self.fields[path].present += 1
+        return self
+
+    def add_documents(self, docs):
+        for doc in docs:
+            self.add_document(doc)
+        return self
+
+    def _walk(self, doc, prefix, depth, seen, max_depth):
+        for key, value in doc.items():
+            self._add(prefix + key, value, depth, seen, max_depth)
+
+    def _add(self, path, value, depth, seen, max_depth):
+        field = self.fields.get(path)
+        if field is None:
+            field = self.fields[path] = FieldStats()
+        field.add(value)
+        seen.add(path)
+        if depth + 1 >= max_depth:
+            return
+        if isinstance(value, dict):
+            self._walk(value, path + ".", depth + 1, seen, max_depth)
+        elif isinstance(value, list):
+            for element in value[:SCHEMA_ARRAY_SAMPLE]:
+                self._add(path + "[]", element, depth + 1, seen, max_depth)
+
+    @classmethod
+    def from_scan(cls, summary):
+        """From a core.schema_scan summary (types, presence, ranges and distinct-count sketches)."""
+        stats = cls()
+        stats.docs = summary["sampled"]
+        for path, info in summary["fields"].items():
+            f = FieldStats()
+            f.types = dict(info["types"])
+            f.present = int(round(info["presence"] * stats.docs))
+            f.bounds = {t: list(b) for t, b in info.get("bounds", {}).items()}
+            f.hll = summary.get("sketches", {}).get(path)
+            stats.fields[path] = f
+        return stats
+
+    def merge(self, other):
+        self.docs += other.docs
+        for path, f in other.fields.items():
+            if path in self.fields:
+                self.fields[path].merge(f)
+            else:
+                self.fields[path] = FieldStats().merge(f)
+        return self
+
+    # --- Reading ---
+    def is_fresh(self, max_age=SCHEMA_STATS_MAX_AGE):
+        return self.updated is not None and time.time() - self.updated < max_age
+
+    def summary(self, path):
+        f = self.fields[path]
+        occurrences = sum(f.types.values())
+        numeric = [f.bounds[t] for t in ("int", "long", "double") if t in f.bounds]
+        lo = hi = None
+        if numeric:
+            lo, hi = min(b[0] for b in numeric), max(b[1] for b in numeric)
+        elif len(f.bounds) == 1:
+            lo, hi = next(iter(f.bounds.values()))
+        return {
+            "types": dict(sorted(f.types.items(), key=lambda kv: -kv[1])),
+            "null_ratio": f.types.get("null", 0) / occurrences if occurrences else 0,
+            "missing_ratio": 1 - f.present / self.docs if self.docs else 0,
+            "min": lo,
+            "max": hi,
+            "distinct": f.hll.count() if f.hll is not None else None,
+        }
+
+    def top_level_fields(self):
+        return [p for p in self.fields if "." not in p and not p.endswith("[]")]
+
+    def query_paths(self):
+        """Dot-notation paths usable in find() filters (array steps dropped)."""
+        paths = {p.replace("[]", "") for p in self.fields if not p.endswith("[]")}
+        return sorted(paths)
+
+    def python_types(self, path):
+        """Python types seen at `path`, as expected by resolve_sql_type()."""
+        return {PYTHON_TYPES.get(t, str) for t in self.fields[path].types if t != "null"}
+
+    # --- Persistence ---
+    def to_dict(self):
+        return {
+            "docs": self.docs,
+            "updated": self.updated,
+            "fields": {p: f.to_dict() for p, f in self.fields.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.docs = data.get("docs", 0)
+        stats.updated = data.get("updated")
+        stats.fields = {p: FieldStats.from_dict(f) for p, f in data.get("fields", {}).items()}
+        return stats
+
+
+@contextmanager
+def _locked(path):
+    """Cross-process lock on one stats file, held through a .lock file."""
+    lock = path + ".lock"
+    while True:
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock) > LOCK_STALE_SECONDS:
+                    os.remove(lock)
+                    continue
+            except OSError:
+                continue  # released meanwhile
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(lock)
+        except OSError:
+            pass
+
+
+class StatsStore:
+    """
+    One JSON file per collection under schema_stats/, shared by every view
+    and worker. A rescan or resample replaces the stored stats with save();
+    update() merges only documents the stored stats have not counted yet.
+    """
+
+    @staticmethod
+    def _path(conn, db_name, coll_name):
+        raw = f"{conn}|{db_name}|{coll_name}"
+        return os.path.join(STATS_DIR, hashlib.sha1(raw.encode("utf-8")).hexdigest() + ".json")
+
+    @staticmethod
+    def load(conn, db_name, coll_name):
+        path = StatsStore._path(conn, db_name, coll_name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                return CollectionStats.from_dict(json.load(f, object_hook=json_util.object_hook))
+        except Exception:
+            return None
+
+    @staticmethod
+    def _write(path, db_name, coll_name, stats):
+        stats.updated = time.time()
+        data = stats.to_dict()
+        data["collection"] = f"{db_name}.{coll_name}"
+        # Write-then-rename, so readers never see a half-written file
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, default=json_util.default)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def save(conn, db_name, coll_name, stats):
+        """Replaces the stored stats. Returns `stats`."""
+        os.makedirs(STATS_DIR, exist_ok=True)
+        path = StatsStore._path(conn, db_name, coll_name)
+        with _locked(path):
+            StatsStore._write(path, db_name, coll_name, stats)
+        return stats
+
+    @staticmethod
+    def update(conn, db_name, coll_name, stats, max_age=SCHEMA_STATS_MAX_AGE):
+        """
+        Merges stats of documents not counted yet into fresh stored stats, or
+        replaces stale ones. Returns the result.
+        """
+        os.makedirs(STATS_DIR, exist_ok=True)
+        path = StatsStore._path(conn, db_name, coll_name)
+        with _locked(path):
+            existing = StatsStore.load(conn, db_name, coll_name)
+            if existing is not None and existing.is_fresh(max_age):
+                stats = existing.merge(stats)
+            StatsStore._write(path, db_name, coll_name, stats)
+        return stats
@@ -0,0 +1,184 @@
+from config.settings import WT_THRESHOLDS
+
+# serverStatus values charted by the dashboard: field -> path in the document
+GAUGES = {
+    "conn_current": "connections.current",
+    "conn_available": "connections.available",
+    "mem_resident": "mem.resident",
+    "mem_virtual": "mem.virtual",
+    "queue_readers": "globalLock.currentQueue.readers",
+    "queue_writers": "globalLock.currentQueue.writers",
+    "active_readers": "globalLock.activeClients.readers",
+    "active_writers": "globalLock.activeClients.writers",
+    # WiredTiger cache, checkpoints and tickets (moved to queues.execution in 7.0)
+    "wt_cache_bytes": "wiredTiger.cache.bytes currently in the cache",
+    "wt_cache_max": "wiredTiger.cache.maximum bytes configured",
+    "wt_cache_dirty": "wiredTiger.cache.tracked dirty bytes in the cache",
+    "wt_checkpoint_ms": "wiredTiger.transaction.transaction checkpoint most recent time (msecs)",
+    "wt_read_out": ("queues.execution.read.out", "wiredTiger.concurrentTransactions.read.out"),
+    "wt_read_available": ("queues.execution.read.available", "wiredTiger.concurrentTransactions.read.available"),
+    "wt_write_out": ("queues.execution.write.out", "wiredTiger.concurrentTransactions.write.out"),
+    "wt_write_available": ("queues.execution.write.available", "wiredTiger.concurrentTransactions.write.available"),
+}
+# Monotonic counters, charted as per-second rates
+COUNTERS = {
+    "op_insert": "opcounters.insert",
+    "op_query": "opcounters.query",
+    "op_update": "opcounters.update",
+    "op_delete": "opcounters.delete",
+    "op_getmore": "opcounters.getmore",
+    "op_command": "opcounters.command",
+    "net_in": "network.bytesIn",
+    "net_out": "network.bytesOut",
+    "wt_pages_read": "wiredTiger.cache.pages read into cache",
+    "wt_bytes_read": "wiredTiger.cache.bytes read into cache",
+    "wt_evict_clean": "wiredTiger.cache.unmodified pages evicted",
+    "wt_evict_dirty": "wiredTiger.cache.modified pages evicted",
+    # Application threads evict when the eviction workers fall behind: stalls
+    "wt_evict_app": "wiredTiger.cache.pages evicted by application threads",
+}
+# Worked out from the values above, in percent
+DERIVED = ["wt_cache_fill_pct", "wt_cache_dirty_pct", "wt_read_used_pct", "wt_write_used_pct"]
+# opLatencies classes: ops/s and the mean latency of the ops in each interval
+LATENCY_CLASSES = ("reads", "writes", "commands")
+LATENCY_FIELDS = [f"lat_{c}_ops" for c in LATENCY_CLASSES] + [f"lat_{c}_ms" for c in LATENCY_CLASSES]
+FIELDS = list(GAUGES) + list(COUNTERS) + LATENCY_FIELDS + DERIVED
+
+
+def get_path(doc, path):
+    for part in path.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return None
+        doc = doc[part]
+    return doc
+
+
+def lookup(doc, path):
+    """get_path over alternatives: the first path present wins."""
+    if isinstance(path, tuple):
+        for p in path:
+            value = get_path(doc, p)
+            if value is not None:
+                return value
+        return None
+    return get_path(doc, path)
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _counters(status):
+    counters = {f: _number(lookup(status, p)) for f, p in COUNTERS.items()}
+    for c in LATENCY_CLASSES:
+        # latency is cumulative microseconds over `ops` operations
+        counters[f"lat_{c}_total"] = _number(get_path(status, f"opLatencies.{c}.latency"))
+        counters[f"lat_{c}_count"] = _number(get_path(status, f"opLatencies.{c}.ops"))
+    return counters
+
+
+def _percent(part, whole):
+    if part is None or not whole:
+        return None
+    return 100.0 * part / whole
+
+
+def _derived(values):
+    derived = {
+        "wt_cache_fill_pct": _percent(values["wt_cache_bytes"], values["wt_cache_max"]),
+        "wt_cache_dirty_pct": _percent(values["wt_cache_dirty"], values["wt_cache_max"]),
+    }
+    for kind in ("read", "write"):
+        out, available = values[f"wt_{kind}_out"], values[f"wt_{kind}_available"]
+        total = out + available if out is not None and available is not None else None
+        derived[f"wt_{kind}_used_pct"] = _percent(out, total)
+    return derived
+
+
+def health(field, value):
+    """Level of a value against WT_THRESHOLDS: ok, warning or critical (None without a value)."""
+    if value is None:
+        return None
+    warning, critical = WT_THRESHOLDS[field]
+    if value >= critical:
+        return "critical"
+    return "warning" if value >= warning else "ok"
+
+
+def server_identity(status):
+    """Changes when the process behind the connection does (restart or failover)."""
+    return status.get("host"), status.get("pid")
+
+
+class MetricsTracker:
+    """
+    Turns successive serverStatus documents into gauge values and per-second
+    rates. Rates divide by the server's own clock (localTime), not by when
+    the poll happened to return, so a slow reply does not fake a dip
+    followed by a spike. A restart (uptime going backwards, a new pid or
+    host, or counters falling) starts a new baseline: that interval has no
+    rates instead of negative or absurd ones, and `restarted` is set.
+    """
+
+    def __init__(self):
+        self.previous = None  # (localTime, client time, uptime, identity, counters)
+        self.restarted = False
+
+    def reset(self):
+        self.previous = None
+
+    def update(self, status, now):
+        values = {f: _number(lookup(status, p)) for f, p in GAUGES.items()}
+        values.update(_derived(values))
+        counters = _counters(status)
+        uptime = _number(status.get("uptime"))
+        identity = server_identity(status)
+        local = status.get("localTime")
+        self.restarted = False
+
+        if self.previous is not None:
+            last_local, last_now, last_uptime, last_identity, last = self.previous
+            went_back = any(
+                value is not None and last.get(f) is not None and value < last[f]
+                for f, value in counters.items()
+            )
+            if (
+                identity != last_identity
+                or (uptime is not None and last_uptime is not None and uptime < last_uptime)
+                or went_back
+            ):
+                self.restarted = True
+            else:
+                elapsed = (local - last_local).total_seconds() if local and last_local else 0
+                if elapsed <= 0:
+                    # No server clock (or it stepped back): fall back to the client's
+                    elapsed = now - last_now
+                if elapsed > 0:
+                    values.update(self._rates(counters, last, elapsed))
+
+        self.previous = (local, now, uptime, identity, counters)
+        return values
+
+    def _rates(self, counters, last, elapsed):
+        def delta(field):
+            if counters.get(field) is None or last.get(field) is None:
+                return None
+            return counters[field] - last[field]
+
+        rates = {}
+        for f in COUNTERS:
+            d = delta(f)
+            if d is not None:
+                rates[f] = d / elapsed
+        for c in LATENCY_CLASSES:
+            ops, micros = delta(f"lat_{c}_count"), delta(f"lat_{c}_total")
+            if ops is None:
+                continue
+            rates[f"lat_{c}_ops"] = ops / elapsed
+            # An idle interval has no mean latency, not a zero one
+            if ops > 0 and micros is not None:
+                rates[f"lat_{c}_ms"] = micros / ops / 1000
+        return rates
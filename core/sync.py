@@ -0,0 +1,198 @@
+import time
+from pymongo import ReplaceOne, UpdateOne, DeleteOne
+from pymongo.errors import OperationFailure
+from config.settings import SYNC_BATCH_SIZE, SYNC_FLUSH_INTERVAL, COPY_LOG_INTERVAL
+from core.copier import copy_collection
+
+# Events after which the stream cannot continue on the same collection
+TERMINAL_EVENTS = ("drop", "rename", "dropDatabase", "invalidate")
+
+
+class SyncStopped(Exception):
+    """The source collection was dropped or renamed under the stream."""
+
+
+def change_to_write(event):
+    """
+    Maps one change event to an idempotent bulk write, or None if it needs none.
+    Replaying events that were already applied (e.g. those seen during the
+    initial copy) converges to the same target state.
+    """
+    op = event.get("operationType")
+    key = event.get("documentKey")
+    if op in ("insert", "replace"):
+        return ReplaceOne(key, event["fullDocument"], upsert=True)
+    if op == "delete":
+        return DeleteOne(key)
+    if op == "update":
+        # With updateLookup the current document is cheaper to apply than to diff
+        if event.get("fullDocument") is not None:
+            return ReplaceOne(key, event["fullDocument"], upsert=True)
+        desc = event.get("updateDescription") or {}
+        update = {}
+        if desc.get("updatedFields"):
+            update["$set"] = desc["updatedFields"]
+        if desc.get("removedFields"):
+            update["$unset"] = {f: "" for f in desc["removedFields"]}
+        if desc.get("truncatedArrays"):
+            update["$push"] = {
+                t["field"]: {"$each": [], "$slice": t["newSize"]}
+                for t in desc["truncatedArrays"]
+            }
+        return UpdateOne(key, update) if update else None
+    if op in TERMINAL_EVENTS:
+        raise SyncStopped(f"Source stream ended with a '{op}' event.")
+    return None
+
+
+def check_change_streams(client):
+    """Raises if the server cannot serve change streams (standalone mongod)."""
+    hello = client.admin.command("hello")
+    if not hello.get("setName") and hello.get("msg") != "isdbgrid":
+        raise RuntimeError(
+            "Change streams need a replica set. Start mongod with --replSet rs0 "
+            "and run rs.initiate() once (a single node is enough)."
+        )
+
+
+def cluster_time(client):
+    """The source's current operationTime; the stream starts here before the initial copy."""
+    with client.start_session() as session:
+        client.admin.command("ping", session=session)
+        return session.operation_time
+
+
+class SyncStats:
+    """Applied-event counters and lag, reported periodically."""
+
+    def __init__(self):
+        self.events = 0
+        self.writes = 0
+        self.lag_seconds = 0.0
+        self.last_event_time = None
+        self.started = time.time()
+
+    def applied(self, batch):
+        self.events += len(batch)
+        ts = batch[-1].get("clusterTime")
+        if ts is not None:
+            self.last_event_time = ts
+            self.lag_seconds = max(0.0, time.time() - ts.time)
+
+    def idle(self):
+        # No events pending: the target is caught up
+        self.lag_seconds = 0.0
+
+    def summary(self, pending=None):
+        elapsed = max(time.time() - self.started, 1e-6)
+        behind = "n/a" if pending is None else str(pending)
+        return (
+            f"{self.events} events applied ({self.events / elapsed:,.1f}/s), "
+            f"lag {self.lag_seconds:.1f}s / {behind} events"
+        )
+
+
+def pending_events(client, ns, since):
+    """
+    Oplog entries for `ns` after `since`, i.e. how many events the target is behind.
+    The ts bound lets the server start scanning at the applied position.
+    Returns None without read access to the local database.
+    """
+    if since is None:
+        return None
+    try:
+        return client.local["oplog.rs"].count_documents({"ts": {"$gt": since}, "ns": ns})
+    except OperationFailure:
+        return None
+
+
+def _apply_batch(dst_coll, batch):
+    requests = []
+    try:
+        for event in batch:
+            req = change_to_write(event)
+            if req is not None:
+                requests.append(req)
+    finally:
+        # Events before a drop/rename are still applied; ordered because
+        # several events may touch the same document
+        if requests:
+            dst_coll.bulk_write(requests, ordered=True)
+    return len(requests)
+
+
+def sync_collection(src_coll, dst_coll, options=None, token=None, save_token=None,
+                    log=None, progress=None, cancelled=None, advance=None):
+    """
+    Keeps dst_coll in step with src_coll until cancelled.
+    Without a resume `token` the target is first filled with a parallel copy;
+    the stream starts at the cluster time taken before that copy, so writes
+    made during the copy are replayed afterwards.
+    advance(docs, nbytes) counts copied documents and applied events.
+    options: full_document, batch_size, plus the copy_collection options
+    """
+    options = options or {}
+    log = log or (lambda msg: None)
+    progress = progress or (lambda text, pct: None)
+    cancelled = cancelled or (lambda: False)
+    save_token = save_token or (lambda tok: None)
+    advance = advance or (lambda docs, nbytes: None)
+    batch_size = options.get("batch_size", SYNC_BATCH_SIZE)
+    src_client = src_coll.database.client
+    ns = f"{src_coll.database.name}.{src_coll.name}"
+
+    check_change_streams(src_client)
+
+    watch_args = {"max_await_time_ms": int(SYNC_FLUSH_INTERVAL * 1000), "batch_size": batch_size}
+    if options.get("full_document"):
+        watch_args["full_document"] = "updateLookup"
+
+    if token is None:
+        watch_args["start_at_operation_time"] = cluster_time(src_client)
+        copy_collection(src_coll, dst_coll, options, log, progress, cancelled, advance)
+        if cancelled():
+            # No token saved: the next run starts with a fresh copy
+            log("Sync cancelled during the initial copy.")
+            return None
+        log("Initial copy done; replaying changes made since it started...")
+    else:
+        # start_after (not resume_after) also survives an invalidate event
+        watch_args["start_after"] = token
+        log("Resuming sync from the saved resume token.")
+
+    stats = SyncStats()
+    last_report = 0.0
+    logged_events = 0
+    with src_coll.watch(**watch_args) as stream:
+        while not cancelled():
+            batch = []
+            deadline = time.time() + SYNC_FLUSH_INTERVAL
+            while len(batch) < batch_size and time.time() < deadline:
+                event = stream.try_next()
+                if event is None:
+                    break
+                batch.append(event)
+
+            if batch:
+                stats.writes += _apply_batch(dst_coll, batch)
+                stats.applied(batch)
+                advance(len(batch), 0)
+            else:
+                stats.idle()
+            # The post-batch token advances even when no events matched,
+            # so an idle sync does not resume from far back in the oplog
+            if stream.resume_token is not None:
+                save_token(stream.resume_token)
+
+            now = time.time()
+            if now - last_report >= COPY_LOG_INTERVAL:
+                last_report = now
+                pending = pending_events(src_client, ns, stats.last_event_time) if batch else 0
+                progress(f"Syncing {src_coll.name}: {stats.summary(pending)}", 100)
+                # Only intervals with new events reach the log, so an idle sync stays quiet
+                if stats.events != logged_events:
+                    logged_events = stats.events
+                    log(f"Syncing '{src_coll.name}': {stats.summary(pending)}")
+
+    log(f"Sync stopped: {stats.summary()}")
+    return stats
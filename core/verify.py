@@ -0,0 +1,352 @@
+import random
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+import bson
+from pymongo.errors import OperationFailure
+from config.settings import VERIFY_RANGES, VERIFY_LEAF_SIZE, VERIFY_MAX_DEPTH
+from core.doc_files import iter_file_docs
+from core.ranges import bson_alias, sample_ids, split_id_ranges
+
+# Keeps each per-document hash small enough that 50M of them still sum into an int64
+HASH_MODULUS = 2147483647
+
+# Fingerprint levels, strongest first. Older servers lack the newer operators.
+LEVELS = ("hash", "bytes", "count")
+# InvalidPipelineOperator: the server does not know $toHashedIndexKey / $bsonSize
+UNKNOWN_OPERATOR = 168
+
+MAX_RESOLVED_LEAVES = 20
+
+# What the server adds to a document stored without _id: type byte, "_id\0", 12-byte ObjectId
+ADDED_ID_BYTES = 17
+
+
+class CollectionSide:
+    """
+    Fingerprints computed on the server with one $group per _id range.
+    Only the counters travel back, never the documents.
+    """
+
+    def __init__(self, coll, level="hash", log=None):
+        self.coll = coll
+        self.level = level
+        self.name = f"collection '{coll.name}'"
+        self.log = log or (lambda msg: None)
+
+    def _pipeline(self, rng):
+        group = {"_id": None, "count": {"$sum": 1}}
+        if self.level in ("hash", "bytes"):
+            group["bytes"] = {"$sum": {"$bsonSize": "$$ROOT"}}
+        if self.level == "hash":
+            group["hash"] = {
+                "$sum": {"$abs": {"$mod": [{"$toHashedIndexKey": "$$ROOT"}, HASH_MODULUS]}}
+            }
+        return [{"$match": rng.filter()}, {"$group": group}]
+
+    def fingerprint(self, rng, probe=False):
+        """
+        Counters of one range. With `probe`, a level the server does not
+        support is lowered until one runs; any other failure is raised.
+        """
+        while True:
+            try:
+                docs = list(self.coll.aggregate(self._pipeline(rng), allowDiskUse=True))
+                break
+            except OperationFailure as e:
+                # $toHashedIndexKey needs 7.0+, $bsonSize needs 4.4+
+                pos = LEVELS.index(self.level)
+                if not probe or e.code != UNKNOWN_OPERATOR or pos == len(LEVELS) - 1:
+                    raise
+                self.level = LEVELS[pos + 1]
+                self.log(f"{self.name}: server cannot compute '{LEVELS[pos]}' fingerprints, using '{self.level}'.")
+        if not docs:
+            return {"count": 0, "bytes": 0, "hash": 0}
+        fp = docs[0]
+        fp.pop("_id", None)
+        return fp
+
+    def fingerprints(self, ranges):
+        if not ranges:
+            return []
+        # First range runs alone so the level probe happens once, not per thread
+        first = self.fingerprint(ranges[0], probe=True)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            return [first] + list(pool.map(self.fingerprint, ranges[1:]))
+
+    def total(self):
+        return self.coll.count_documents({})
+
+    def sample_ids(self, ranges, k):
+        return [sample_ids(self.coll, k, rng.filter()) for rng in ranges]
+
+    def list_ids(self, ranges, limit):
+        return [
+            [d["_id"] for d in self.coll.find(rng.filter(), {"_id": 1}).limit(limit)]
+            for rng in ranges
+        ]
+
+
+class FileSide:
+    """
+    Fingerprints for a .json/.bson file. Every request is one streaming pass
+    over the file, however many ranges it covers.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.name = f"file '{path}'"
+        self._total = None
+        self.without_id = 0  # documents without _id, counted by fingerprints()
+        self.bytes = 0
+        self._last = None  # (range labels, fingerprints) of the latest pass
+
+    def _ids(self):
+        for doc in iter_file_docs(self.path):
+            yield doc.get("_id"), doc
+
+    def fingerprints(self, ranges):
+        labels = [r.label() for r in ranges]
+        if self._last is not None and self._last[0] == labels:
+            return [dict(fp) for fp in self._last[1]]
+        fps = [{"count": 0, "bytes": 0} for _ in ranges]
+        locate = _locator(ranges)
+        total = without_id = nbytes = 0
+        for _id, doc in self._ids():
+            total += 1
+            size = len(bson.encode(doc))
+            nbytes += size
+            if _id is None:
+                without_id += 1
+                continue
+            i = locate(_id)
+            if i is None:
+                continue
+            fps[i]["count"] += 1
+            fps[i]["bytes"] += size
+        self._total, self.without_id, self.bytes = total, without_id, nbytes
+        self._last = (labels, [dict(fp) for fp in fps])
+        return fps
+
+    def total(self):
+        if self._total is None:
+            self._total = sum(1 for _ in iter_file_docs(self.path))
+        return self._total
+
+    def sample_ids(self, ranges, k):
+        # Reservoir sample per range, so memory stays at k ids whatever the range size
+        samples = [[] for _ in ranges]
+        seen = [0] * len(ranges)
+        locate = _locator(ranges)
+        for _id, _ in self._ids():
+            i = locate(_id) if _id is not None else None
+            if i is None:
+                continue
+            seen[i] += 1
+            if len(samples[i]) < k:
+                samples[i].append(_id)
+            else:
+                j = random.randrange(seen[i])
+                if j < k:
+                    samples[i][j] = _id
+        return samples
+
+    def list_ids(self, ranges, limit):
+        lists = [[] for _ in ranges]
+        locate = _locator(ranges)
+        for _id, _ in self._ids():
+            i = locate(_id) if _id is not None else None
+            if i is not None and len(lists[i]) < limit:
+                lists[i].append(_id)
+        return lists
+
+
+def _locator(ranges):
+    """Returns a function mapping an _id to the index of the (disjoint) range holding it."""
+    others = [i for i, r in enumerate(ranges) if r.other]
+    typed = [i for i, r in enumerate(ranges) if not r.other]
+    unbounded = [i for i in typed if ranges[i].lo is None]
+    bounded = sorted((i for i in typed if ranges[i].lo is not None), key=lambda i: ranges[i].lo)
+    los = [ranges[i].lo for i in bounded]
+    bson_type = ranges[typed[0]].bson_type if typed else None
+
+    def locate(value):
+        for i in others:
+            if ranges[i].contains(value):
+                return i
+        if bson_alias(value) != bson_type:
+            return None
+        pos = bisect_right(los, value) - 1
+        candidates = ([bounded[pos]] if pos >= 0 else []) + unbounded
+        for i in candidates:
+            if ranges[i].contains(value):
+                return i
+        return None
+
+    return locate
+
+
+def _differs(a, b, strict):
+    keys = set(a) & set(b)
+    if not strict:
+        keys = {"count"} & keys
+    return any(a[k] != b[k] for k in keys)
+
+
+def verify_sides(source, target, ranges, log=None, strict=True,
+                 leaf_size=VERIFY_LEAF_SIZE, max_depth=VERIFY_MAX_DEPTH):
+    """
+    Compares two sides range by range, then bisects every mismatching range
+    until it holds at most `leaf_size` documents (or `max_depth` is reached).
+    Leaf ranges are resolved to the exact missing / extra _ids.
+    """
+    log = log or (lambda msg: None)
+    report = {"ranges_checked": 0, "mismatches": []}
+
+    pending = list(ranges)
+    leaves = []
+    depth = 0
+    while pending:
+        src_fps = source.fingerprints(pending)
+        dst_fps = target.fingerprints(pending)
+        report["ranges_checked"] += len(pending)
+        bad = [
+            (r, s, d)
+            for r, s, d in zip(pending, src_fps, dst_fps)
+            if _differs(s, d, strict)
+        ]
+        log(f"Verify pass {depth + 1}: {len(bad)}/{len(pending)} range(s) differ.")
+
+        pending = []
+        depth += 1
+        splits = {id(source): [], id(target): []}
+        for r, s, d in bad:
+            if r.other or depth >= max_depth or max(s["count"], d["count"]) <= leaf_size:
+                leaves.append((r, s, d))
+                continue
+            # Split on the median of a sample from whichever side holds more documents
+            splitter = source if s["count"] >= d["count"] else target
+            splits[id(splitter)].append((r, s, d))
+        for side in (source, target):
+            batch = splits[id(side)]
+            if not batch:
+                continue
+            # One sampling request per side, so a file side is read once per pass
+            samples = side.sample_ids([r for r, _, _ in batch], 64)
+            for (r, s, d), sample in zip(batch, samples):
+                ids = sorted({v for v in sample if r.contains(v)})
+                mid = ids[len(ids) // 2] if ids else None
+                if mid is None or mid == r.lo:
+                    leaves.append((r, s, d))
+                    continue
+                pending.extend(r.split_at(mid))
+
+    # Only the first few leaves are resolved, to keep the report readable
+    resolve = [
+        i for i, (r, s, d) in enumerate(leaves[:MAX_RESOLVED_LEAVES])
+        if max(s["count"], d["count"]) <= leaf_size
+    ]
+    src_lists = source.list_ids([leaves[i][0] for i in resolve], leaf_size + 1) if resolve else []
+    dst_lists = target.list_ids([leaves[i][0] for i in resolve], leaf_size + 1) if resolve else []
+    listed = {i: (src, dst) for i, src, dst in zip(resolve, src_lists, dst_lists)}
+    for i, (r, s, d) in enumerate(leaves):
+        entry = {"range": r.label(), "source": s, "target": d}
+        if i in listed:
+            try:
+                src_ids, dst_ids = set(listed[i][0]), set(listed[i][1])
+                entry["missing"] = sorted(src_ids - dst_ids, key=str)
+                entry["extra"] = sorted(dst_ids - src_ids, key=str)
+            except TypeError:
+                pass  # unhashable _ids (embedded documents)
+        report["mismatches"].append(entry)
+
+    # Totals last: a file side has counted itself during the first pass by now
+    report["source_total"] = source.total()
+    report["target_total"] = target.total()
+    report["match"] = (
+        report["source_total"] == report["target_total"] and not report["mismatches"]
+    )
+    return report
+
+
+def verify_file(path, coll, file_is_source=True, strict=True, log=None, parts=VERIFY_RANGES):
+    """Checks a .json/.bson file against a collection without pulling documents."""
+    file_side, coll_side = FileSide(path), CollectionSide(coll, log=log)
+    ranges = split_id_ranges(coll, parts)
+    # This pass is reused by verify_sides; it also counts documents without _id
+    file_side.fingerprints(ranges)
+    if file_side.without_id:
+        return verify_totals(file_side, coll, file_is_source, strict, log)
+    if file_is_source:
+        return verify_sides(file_side, coll_side, ranges, log, strict)
+    return verify_sides(coll_side, file_side, ranges, log, strict)
+
+
+def verify_totals(file_side, coll, file_is_source=True, strict=True, log=None):
+    """
+    Whole-file check for a file holding documents without _id. Those got
+    fresh _ids on import, so no _id range can be matched: only the document
+    count and (when strict) the total BSON size are compared.
+    """
+    log = log or (lambda msg: None)
+    log(f"{file_side.without_id} document(s) in {file_side.name} have no _id; comparing totals only.")
+    file_fp = {"count": file_side.total()}
+    coll_fp = {"count": coll.count_documents({})}
+    if strict and file_is_source:
+        try:
+            res = list(coll.aggregate([{"$group": {"_id": None, "bytes": {"$sum": {"$bsonSize": "$$ROOT"}}}}]))
+            coll_fp["bytes"] = res[0]["bytes"] if res else 0
+            file_fp["bytes"] = file_side.bytes + ADDED_ID_BYTES * file_side.without_id
+        except OperationFailure:
+            pass  # $bsonSize needs 4.4+
+    src, dst = (file_fp, coll_fp) if file_is_source else (coll_fp, file_fp)
+    mismatches = [{"range": "all documents", "source": src, "target": dst}] if _differs(src, dst, True) else []
+    return {
+        "source_total": src["count"], "target_total": dst["count"], "ranges_checked": 1,
+        "mismatches": mismatches, "match": not mismatches,
+    }
+
+
+def db_hash(coll):
+    """MD5 of the collection from the dbHash command, or None if not permitted."""
+    try:
+        res = coll.database.command("dbHash", collections=[coll.name])
+        return res.get("collections", {}).get(coll.name)
+    except OperationFailure:
+        return None
+
+
+def verify_collections(src_coll, dst_coll, log=None, parts=VERIFY_RANGES):
+    """Checks two collections (possibly on different servers) against each other."""
+    log = log or (lambda msg: None)
+    src_hash, dst_hash = db_hash(src_coll), db_hash(dst_coll)
+    if src_hash and src_hash == dst_hash:
+        log(f"dbHash match ({src_hash}).")
+        total = src_coll.estimated_document_count()
+        return {"source_total": total, "target_total": total, "ranges_checked": 0,
+                "mismatches": [], "match": True}
+
+    ranges = split_id_ranges(src_coll, parts)
+    return verify_sides(CollectionSide(src_coll, log=log), CollectionSide(dst_coll, log=log), ranges, log)
+
+
+def format_report(report):
+    """One-line summary plus one line per mismatching range."""
+    lines = []
+    if report["match"]:
+        lines.append(
+            f"VERIFY OK: {report['source_total']} documents, "
+            f"{report['ranges_checked']} range(s) compared."
+        )
+    else:
+        lines.append(
+            f"VERIFY FAILED: source {report['source_total']} vs target {report['target_total']} documents, "
+            f"{len(report['mismatches'])} mismatching range(s)."
+        )
+    for m in report["mismatches"]:
+        line = f"  {m['range']}: source {m['source']} vs target {m['target']}"
+        if m.get("missing"):
+            line += f" | missing in target: {', '.join(map(str, m['missing'][:10]))}"
+        if m.get("extra"):
+            line += f" | extra in target: {', '.join(map(str, m['extra'][:10]))}"
+        lines.append(line)
+    return lines
@@ -0,0 +1,116 @@
+import time
+from queue import Empty
+from multiprocessing import Process, Queue
+from pymongo import MongoClient
+from config.settings import POOL_SIZE, POOL_IDLE_TIMEOUT
+from core.jobs import JobChannel
+
+# Clients cached per worker process, so their connection pools stay warm between jobs
+_CLIENTS = {}
+
+
+def get_client(uri):
+    """
+    The process-wide MongoClient for `uri`. Workers never close it:
+    server selection, the TLS handshake and authentication happen once
+    per pool process instead of once per job.
+    """
+    client = _CLIENTS.get(uri)
+    if client is None:
+        client = _CLIENTS[uri] = MongoClient(uri)
+    return client
+
+
+def _serve(uri, inbox, channel, idle_timeout):
+    """Pool process main loop: runs (target, args) tasks until idle for too long."""
+    # Pay for the imports and the first handshake before the first job arrives
+    import core.workers  # noqa: F401
+    try:
+        get_client(uri).admin.command("ping")
+    except Exception:
+        pass  # the job itself reports connection errors
+    while True:
+        try:
+            task = inbox.get(timeout=idle_timeout)
+        except Empty:
+            return
+        if task is None:
+            return
+        target, args = task
+        try:
+            target(*args, channel)
+        except Exception as e:
+            channel.put(("error", str(e)))
+        # Tells the manager this process may take the next job
+        channel.put(("idle",))
+
+
+class PoolWorker:
+    """
+    One long-lived worker process. Its JobChannel is created with the
+    process (multiprocessing queues can only be shared by inheritance)
+    and reset before each job.
+    """
+
+    def __init__(self, uri, idle_timeout):
+        self.channel = JobChannel()
+        self.inbox = Queue()
+        self.process = Process(
+            target=_serve, args=(uri, self.inbox, self.channel, idle_timeout), daemon=True
+        )
+        self.process.start()
+        self.job = None
+        self.idle_since = time.time()
+
+    def run(self, job):
+        self.channel.reset()
+        self.job = job
+        self.inbox.put((job.target, job.args))
+
+    def release(self):
+        self.job = None
+        self.idle_since = time.time()
+
+    def stop(self):
+        if self.process.is_alive():
+            self.inbox.put(None)
+            self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+class WorkerPool:
+    """Worker processes for one connection, started lazily up to `size`."""
+
+    def __init__(self, uri, size=POOL_SIZE, idle_timeout=POOL_IDLE_TIMEOUT):
+        self.uri = uri
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.workers = []
+
+    def acquire(self):
+        """An idle worker (spawning one if there is room), or None if all are busy."""
+        # Dead workers (crashed or terminated on cancel) are replaced on demand
+        self.workers = [w for w in self.workers if w.process.is_alive()]
+        for w in list(self.workers):
+            if w.job is not None:
+                continue
+            # Close to its own idle timeout the process may exit under a new task
+            if time.time() - w.idle_since > self.idle_timeout - 5:
+                w.stop()
+                self.workers.remove(w)
+                continue
+            return w
+        if len(self.workers) < self.size:
+            w = PoolWorker(self.uri, self.idle_timeout)
+            self.workers.append(w)
+            return w
+        return None
+
+    def busy(self):
+        return any(w.job is not None for w in self.workers)
+
+    def shutdown(self):
+        for w in self.workers:
+            w.stop()
+        self.workers = []
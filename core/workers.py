@@ -1,20 +1,215 @@
 import os
-import json
 import csv
 import time
 import bson
-from datetime import datetime
-from pymongo import MongoClient
-from pymongo.errors import ConfigurationError
+from pymongo import InsertOne, ReplaceOne, UpdateOne
+from pymongo.errors import ConfigurationError, BulkWriteError
+from pymongo.write_concern import WriteConcern
 from bson import json_util, ObjectId
-from utils.helpers import map_mongo_type_to_pg, sql_escape, filter_doc, resolve_sql_type
+from config.settings import IMPORT_BATCH_SIZE, BULK_LOAD_WRITE_CONCERN, AGG_SAMPLE_PREFIX
+from core.doc_files import iter_file_docs
+from core.worker_pool import get_client
+from core.copier import copy_collection
+from core.schema_scan import scan_database, fingerprint_database
+from core.relationships import detect_relationships
+from core.matviews import MatViewStore, refresh_view
+from core.schema_stats import CollectionStats, StatsStore, conn_key
+from core.sync import sync_collection, SyncStopped
+from core.verify import verify_file, verify_collections, format_report, FileSide
+from core.indexes import snapshot_indexes, deferrable_indexes, drop_indexes, restore_indexes
+from utils.sync_state import SyncState
+from utils.index_state import IndexState
+from utils.helpers import sql_escape, filter_doc, resolve_sql_type
+
+
+def _run_verification(queue, verify_func, *args, **kwargs):
+    """Runs one verify_* call and streams its progress and report into the job log."""
+    log = lambda msg: queue.put(("log", msg))
+    try:
+        report = verify_func(*args, log=log, **kwargs)
+        for line in format_report(report):
+            log(line)
+        return report
+    except Exception as e:
+        log(f"VERIFY ERROR: {e}")
+        return None
+
+
+# --- IMPORT WORKER ---
+IMPORT_MODES = ("insert", "replace", "upsert", "merge")
+
+
+# Workers check for cancellation and update the shared counters this often
+PROGRESS_EVERY = 1000
+
+
+def _discard_partial(queue, path):
+    """Removes a half-written export file after a cancel."""
+    if os.path.exists(path):
+        os.remove(path)
+    queue.put(("log", f"Cancelled: removed partial file {os.path.basename(path)}."))
+
+
+def _schema_stats(uri, db, name, sample=100):
+    """Shared schema stats for a collection, resampled only when missing or stale."""
+    key = conn_key(uri)
+    stats = StatsStore.load(key, db.name, name)
+    if stats is not None and stats.is_fresh():
+        return stats
+    docs = db[name].aggregate([{"$sample": {"size": sample}}])
+    return StatsStore.save(key, db.name, name, CollectionStats().add_documents(docs))
+
+
+def _export_fields(stats, include_meta):
+    """Top-level fields to export; _id / __v only with metadata."""
+    return [
+        f for f in stats.top_level_fields()
+        if include_meta or f not in ("_id", "__v")
+    ]
+
+
+def _iter_import_batches(file_path, batch_size):
+    batch = []
+    for doc in iter_file_docs(file_path):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert_batch(coll, batch, ordered):
+    """Inserts one batch. Returns (inserted, rejected)."""
+    try:
+        result = coll.insert_many(batch, ordered=ordered)
+        return len(result.inserted_ids), 0
+    except BulkWriteError as e:
+        if ordered:
+            raise
+        # Unordered: everything that could be written was written
+        details = e.details
+        return details.get("nInserted", 0), len(details.get("writeErrors", []))
+
+
+def _get_path(doc, path):
+    """Resolves a dotted path. Returns (found, value)."""
+    cur = doc
+    for part in path.split("."):
+        if not isinstance(cur, dict) or part not in cur:
+            return False, None
+        cur = cur[part]
+    return True, cur
+
+
+def _build_merge_request(doc, mode, key):
+    """Turns one document into a bulk_write request, or None if it has no key."""
+    if mode == "replace" or (mode == "upsert" and key == "_id"):
+        if "_id" not in doc:
+            return InsertOne(doc)
+        return ReplaceOne({"_id": doc["_id"]}, doc, upsert=True)
+
+    found, value = _get_path(doc, key)
+    if not found:
+        return None
+    body = {k: v for k, v in doc.items() if k != "_id"}
+
+    if mode == "upsert":
+        return ReplaceOne({key: value}, body, upsert=True)
+
+    # merge: only touch the fields present in the file
+    update = {}
+    fields = {k: v for k, v in body.items() if k != key}
+    if fields:
+        update["$set"] = fields
+    if "_id" in doc and key != "_id":
+        update["$setOnInsert"] = {"_id": doc["_id"]}
+    if not update:
+        update["$setOnInsert"] = {key: value}
+    return UpdateOne({key: value}, update, upsert=True)
+
+
+def _merge_batch(coll, batch, mode, key):
+    """Runs one unordered bulk_write. Returns a dict of counters for the batch."""
+    requests = []
+    skipped = 0
+    for doc in batch:
+        req = _build_merge_request(doc, mode, key)
+        if req is None:
+            skipped += 1
+        else:
+            requests.append(req)
+
+    counts = {"inserted": 0, "matched": 0, "modified": 0, "rejected": 0, "skipped": skipped}
+    if not requests:
+        return counts
+    try:
+        result = coll.bulk_write(requests, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+        counts["rejected"] = len(details.get("writeErrors", []))
+
+    counts["inserted"] = details.get("nInserted", 0) + details.get("nUpserted", 0)
+    counts["matched"] = details.get("nMatched", 0)
+    counts["modified"] = details.get("nModified", 0)
+    return counts
+
+
+def _has_leading_index(coll, key):
+    return any(next(iter(spec["key"]), None) == key for spec in coll.list_indexes())
+
+
+def _restore_deferred(queue, coll, specs, state_key):
+    """
+    Rebuilds indexes dropped for a bulk load. The job is flagged as restoring
+    meanwhile, so the GUI does not kill it halfway. The saved snapshot keeps
+    the specs that failed, so the next connect or import retries them.
+    Returns those specs.
+    """
+    queue.set_restoring(True)
+    try:
+        failed = restore_indexes(coll, specs, queue)
+    finally:
+        queue.set_restoring(False)
+    failed_names = {name for name, _ in failed}
+    unrestored = [spec for spec in specs if spec["name"] in failed_names]
+    IndexState.retain(state_key, unrestored)
+    if unrestored:
+        queue.put(
+            (
+                "log",
+                f"WARNING: {len(unrestored)} index(es) on {coll.name} could not be rebuilt. "
+                "Their definitions are kept and will be retried on the next connect or import.",
+            )
+        )
+    return unrestored
 
 
-# --- IMPORT WORKER (Unchanged) ---
-def worker_import_task(uri, files, queue):
-    client = None
+def worker_import_task(uri, files, options, queue):
+    """
+    options:
+      bulk_load     -> defer secondary index builds until the file is loaded
+      write_concern -> dict passed to WriteConcern while bulk loading
+      batch_size    -> documents per insert_many / bulk_write
+      mode          -> insert | replace (by _id) | upsert (on key) | merge ($set on key)
+      key           -> match field for upsert/merge
+      verify        -> compare each file against its collection afterwards
+    """
+    options = options or {}
+    bulk_load = options.get("bulk_load", False)
+    batch_size = options.get("batch_size", IMPORT_BATCH_SIZE)
+    mode = options.get("mode", "insert")
+    key = options.get("key") or "_id"
+    if mode == "replace":
+        key = "_id"
+
+    if mode not in IMPORT_MODES:
+        queue.put(("error", f"Unknown import mode '{mode}'."))
+        return
+
     try:
-        client = MongoClient(uri)
+        client = get_client(uri)
         try:
             db = client.get_default_database()
         except ConfigurationError:
@@ -22,76 +217,157 @@ def worker_import_task(uri, files, queue):
 
         total_files = len(files)
         success_count = 0
+        conn = conn_key(uri)
 
         for idx, file_path in enumerate(files):
+            if queue.cancelled():
+                break
             filename = os.path.basename(file_path)
             coll_name = os.path.splitext(filename)[0]
             queue.put(
                 ("progress", f"Importing {filename}...", int((idx / total_files) * 100))
             )
 
+            coll = db[coll_name]
+            state_key = IndexState.key(conn, db.name, coll_name)
+            deferred, pending = [], []
             try:
-                coll = db[coll_name]
-                ext = os.path.splitext(filename)[1].lower()
-
-                if ext == ".json":
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        try:
-                            data = json.load(f, object_hook=json_util.object_hook)
-                            if isinstance(data, list):
-                                if data:
-                                    coll.insert_many(data)
-                            else:
-                                coll.insert_one(data)
-                        except json.JSONDecodeError:
-                            f.seek(0)
-                            batch = []
-                            for line in f:
-                                if line.strip():
-                                    batch.append(
-                                        json.loads(
-                                            line, object_hook=json_util.object_hook
-                                        )
-                                    )
-                                    if len(batch) >= 1000:
-                                        coll.insert_many(batch)
-                                        batch = []
-                            if batch:
-                                coll.insert_many(batch)
-                elif ext == ".bson":
-                    with open(file_path, "rb") as f:
-                        data = bson.decode_all(f.read())
-                        if data:
-                            for i in range(0, len(data), 5000):
-                                coll.insert_many(data[i : i + 5000])
-                success_count += 1
+                # An earlier bulk load killed before its rebuild left these dropped
+                leftover = IndexState.load(state_key)
+                unrestored = []
+                if leftover:
+                    queue.put(
+                        ("log", f"Restoring {len(leftover)} index(es) on {coll_name} left by an interrupted bulk load.")
+                    )
+                    unrestored = _restore_deferred(queue, coll, leftover, state_key)
+                target = coll
+                if bulk_load:
+                    # Upserts need their key index, so it is never deferred
+                    keep = [key] if mode != "insert" else []
+                    deferred = deferrable_indexes(snapshot_indexes(coll), keep)
+                    if deferred:
+                        queue.put(
+                            (
+                                "log",
+                                f"Bulk load: deferring {len(deferred)} index(es) on {coll_name}: "
+                                + json_util.dumps(deferred),
+                            )
+                        )
+                        # Saved first: if the job dies, the next connect or import rebuilds them.
+                        # Leftovers that still failed stay in the snapshot.
+                        names = {spec["name"] for spec in deferred}
+                        pending = deferred + [spec for spec in unrestored if spec["name"] not in names]
+                        info = {"conn": conn, "db": db.name, "collection": coll_name}
+                        IndexState.save(state_key, pending, info)
+                        drop_indexes(coll, deferred)
+                    wc = options.get("write_concern") or BULK_LOAD_WRITE_CONCERN
+                    target = coll.with_options(write_concern=WriteConcern(**wc))
+
+                if mode == "insert":
+                    inserted = rejected = 0
+                    for batch in _iter_import_batches(file_path, batch_size):
+                        n_ok, n_bad = _insert_batch(target, batch, ordered=not bulk_load)
+                        inserted += n_ok
+                        rejected += n_bad
+                        queue.advance(len(batch))
+                        if queue.cancelled():
+                            break
+
+                    if rejected:
+                        queue.put(
+                            ("log", f"{filename}: {inserted} inserted, {rejected} rejected.")
+                        )
+                else:
+                    if key != "_id" and not _has_leading_index(coll, key):
+                        queue.put(
+                            (
+                                "log",
+                                f"WARNING: no index on '{key}' in {coll_name}. "
+                                "Every upsert will scan the collection; consider creating one first.",
+                            )
+                        )
+                    totals = {}
+                    for b_idx, batch in enumerate(_iter_import_batches(file_path, batch_size)):
+                        counts = _merge_batch(target, batch, mode, key)
+                        for k, v in counts.items():
+                            totals[k] = totals.get(k, 0) + v
+                        queue.advance(len(batch))
+                        queue.put(
+                            (
+                                "log",
+                                f"{filename} batch {b_idx + 1}: inserted {counts['inserted']}, "
+                                f"matched {counts['matched']}, modified {counts['modified']}"
+                                + (f", rejected {counts['rejected']}" if counts["rejected"] else "")
+                                + (f", skipped {counts['skipped']} (no '{key}')" if counts["skipped"] else ""),
+                            )
+                        )
+                        if queue.cancelled():
+                            break
+                    queue.put(
+                        (
+                            "log",
+                            f"{filename} ({mode} on '{key}'): inserted {totals.get('inserted', 0)}, "
+                            f"matched {totals.get('matched', 0)}, modified {totals.get('modified', 0)}.",
+                        )
+                    )
+                if queue.cancelled():
+                    queue.put(("log", f"Cancelled: {filename} was only partially imported."))
+                else:
+                    success_count += 1
             except Exception as e:
                 queue.put(("log", f"ERROR importing {filename}: {str(e)}"))
                 continue
-
+            finally:
+                # Runs on failure too, so the collection never stays unindexed
+                if deferred:
+                    _restore_deferred(queue, coll, pending, state_key)
+
+            if options.get("verify") and not queue.cancelled():
+                if mode in ("insert", "replace"):
+                    queue.put(("progress", f"Verifying {filename}...", int(((idx + 1) / total_files) * 100)))
+                    _run_verification(queue, verify_file, file_path, coll, file_is_source=True)
+                else:
+                    queue.put(("log", f"Verify skipped for {filename}: {mode} mode merges into existing documents."))
+
+        status = "cancelled" if queue.cancelled() else "finished"
         queue.put(
             (
                 "finished",
-                f"Import job finished. Successfully imported {success_count}/{total_files} files.",
+                f"Import job {status}. Successfully imported {success_count}/{total_files} files.",
             )
         )
     except Exception as e:
         queue.put(("error", f"Critical Import Error: {str(e)}"))
-    finally:
-        if client:
-            client.close()
+
+
+# --- INDEX RESTORE WORKER ---
+def worker_restore_indexes(uri, queue):
+    """Rebuilds the indexes that interrupted bulk loads left dropped on this database."""
+    try:
+        client = get_client(uri)
+        try:
+            db = client.get_default_database()
+        except ConfigurationError:
+            db = client["test"]
+
+        pending = IndexState.pending(conn_key(uri), db.name)
+        for state_key, coll_name, specs in pending:
+            queue.put(("log", f"Restoring {len(specs)} index(es) on {coll_name} left by an interrupted bulk load."))
+            _restore_deferred(queue, db[coll_name], specs, state_key)
+        queue.put(("finished", f"Restored deferred indexes on {len(pending)} collection(s)."))
+    except Exception as e:
+        queue.put(("error", str(e)))
 
 
 # --- EXPORT WORKER (Updated for PostgreSQL Fallback) ---
-def worker_export_task(uri, folder, fmt, include_meta, target_colls, queue):
+def worker_export_task(uri, folder, fmt, include_meta, target_colls, verify, queue):
     """
     Export logic.
     Order of arguments MUST match start_process call:
-    (uri, folder, fmt, meta, target_colls, queue)
+    (uri, folder, fmt, meta, target_colls, verify, queue)
     """
-    client = None
     try:
-        client = MongoClient(uri)
+        client = get_client(uri)
         try:
             db = client.get_default_database()
         except ConfigurationError:
@@ -110,7 +386,7 @@ def worker_export_task(uri, folder, fmt, include_meta, target_colls, queue):
             filtered_colls = [
                 c
                 for c in all_colls
-                if not c.startswith("system.")
+                if not c.startswith(("system.", AGG_SAMPLE_PREFIX))
                 and not c.endswith(("metadata", "chunks", "files"))
             ]
 
@@ -118,6 +394,7 @@ def worker_export_task(uri, folder, fmt, include_meta, target_colls, queue):
         if total == 0:
             queue.put(("finished", "No collections found to export."))
             return
+        queue.set_total(sum(db[c].estimated_document_count() for c in filtered_colls))
 
         # Handle both generic SQL and specific PostgreSQL requests
         if fmt in ["sql", "postgresql"]:
@@ -129,40 +406,27 @@ def worker_export_task(uri, folder, fmt, include_meta, target_colls, queue):
                 f.write(f"-- Format: {fmt.upper()}\nBEGIN;\n\n")
 
                 for idx, name in enumerate(filtered_colls):
+                    if queue.cancelled():
+                        break
                     queue.put(
                         ("progress", f"SQL Export: {name}", int((idx / total) * 100))
                     )
                     try:
                         # 1. Analyze Schema with proper fallback logic
-                        # Sample 100 docs to detect mixed types
-                        sample_docs = list(db[name].find({}).limit(100))
-                        if not sample_docs:
+                        # Types come from the shared schema stats (sampled if stale)
+                        stats = _schema_stats(uri, db, name)
+                        if not stats.docs:
                             continue
 
-                        # Track all unique types seen for each field
-                        field_types = {} 
-
-                        for doc in sample_docs:
-                            doc = filter_doc(doc, include_meta)
-                            for key, val in doc.items():
-                                if key == "_id": continue
-                                if val is None: continue
-                                
-                                # Identify Python Type
-                                t = type(val)
-                                if isinstance(val, ObjectId): t = ObjectId
-                                if isinstance(val, datetime): t = datetime
-                                
-                                if key not in field_types:
-                                    field_types[key] = set()
-                                field_types[key].add(t)
-
                         # Resolve types using fallback logic
                         columns = {}
                         if include_meta:
                             columns["_id"] = "TEXT PRIMARY KEY"
 
-                        for key, types_set in field_types.items():
+                        for key in _export_fields(stats, include_meta):
+                            types_set = stats.python_types(key)
+                            if key == "_id" or not types_set:
+                                continue  # _id handled above; all-null fields skipped
                             columns[key] = resolve_sql_type(types_set)
 
                         if not columns:
@@ -176,9 +440,8 @@ def worker_export_task(uri, folder, fmt, include_meta, target_colls, queue):
                         f.write(f'CREATE TABLE "{name}" (\n    {cols_def}\n);\n')
 
                         # 2. Write Data
-                        f.write(
-                            f'INSERT INTO "{name}" ({", ".join(['"' + c + '"' for c in columns.keys()])}) VALUES\n'
-                        )
+                        col_list = ", ".join('"' + c + '"' for c in columns.keys())
+                        f.write(f'INSERT INTO "{name}" ({col_list}) VALUES\n')
 
                         batch = []
                         cursor = db[name].find({})
@@ -194,6 +457,10 @@ def worker_export_task(uri, folder, fmt, include_meta, target_colls, queue):
                             if len(batch) >= 500:
                                 f.write(",\n".join(batch) + ",\n")
                                 batch = []
+                            if (i + 1) % PROGRESS_EVERY == 0:
+                                queue.advance(PROGRESS_EVERY)
+                                if queue.cancelled():
+                                    break
 
                         if batch:
                             f.write(",\n".join(batch) + ";\n\n")
@@ -205,9 +472,13 @@ def worker_export_task(uri, folder, fmt, include_meta, target_colls, queue):
                         continue
 
                 f.write("COMMIT;\n")
+            if queue.cancelled():
+                _discard_partial(queue, full_path)
         else:
             # JSON/CSV/BSON Logic (Unchanged)
             for idx, name in enumerate(filtered_colls):
+                if queue.cancelled():
+                    break
                 queue.put(
                     ("progress", f"Exporting {name}...", int((idx / total) * 100))
                 )
@@ -218,27 +489,35 @@ def worker_export_task(uri, folder, fmt, include_meta, target_colls, queue):
                         with open(path, "w", encoding="utf-8") as f:
                             f.write("[\n")
                             first = True
-                            for doc in cursor:
+                            for i, doc in enumerate(cursor, 1):
                                 doc = filter_doc(doc, include_meta)
                                 if not first:
                                     f.write(",\n")
                                 f.write(json_util.dumps(doc))
                                 first = False
+                                if i % PROGRESS_EVERY == 0:
+                                    queue.advance(PROGRESS_EVERY)
+                                    if queue.cancelled():
+                                        break
                             f.write("\n]")
                     elif fmt == "bson":
                         with open(path, "wb") as f:
-                            for doc in cursor:
+                            written = 0
+                            for i, doc in enumerate(cursor, 1):
                                 doc = filter_doc(doc, include_meta)
-                                f.write(bson.encode(doc))
+                                data = bson.encode(doc)
+                                f.write(data)
+                                written += len(data)
+                                if i % PROGRESS_EVERY == 0:
+                                    queue.advance(PROGRESS_EVERY, written)
+                                    written = 0
+                                    if queue.cancelled():
+                                        break
                     elif fmt == "csv":
-                        sample = []
-                        for doc in db[name].find({}).limit(100):
-                            sample.append(filter_doc(doc, include_meta))
-                        if not sample:
+                        stats = _schema_stats(uri, db, name)
+                        headers = _export_fields(stats, include_meta)
+                        if not headers:
                             continue
-                        headers = set()
-                        for d in sample:
-                            headers.update(d.keys())
 
                         cursor = db[name].find({})
                         with open(path, "w", newline="", encoding="utf-8") as f:
@@ -246,7 +525,11 @@ def worker_export_task(uri, folder, fmt, include_meta, target_colls, queue):
                                 f, fieldnames=list(headers), extrasaction="ignore"
                             )
                             writer.writeheader()
-                            for doc in cursor:
+                            for i, doc in enumerate(cursor, 1):
+                                if i % PROGRESS_EVERY == 0:
+                                    queue.advance(PROGRESS_EVERY)
+                                    if queue.cancelled():
+                                        break
                                 doc = filter_doc(doc, include_meta)
                                 row = {
                                     k: (
@@ -257,23 +540,52 @@ def worker_export_task(uri, folder, fmt, include_meta, target_colls, queue):
                                     for k, v in doc.items()
                                 }
                                 writer.writerow(row)
+
+                    if queue.cancelled():
+                        _discard_partial(queue, path)
+                        break
+
+                    if verify:
+                        if fmt not in ("json", "bson"):
+                            queue.put(("log", f"Verify skipped for {name}: {fmt.upper()} is not a lossless format."))
+                        elif include_meta:
+                            queue.put(("progress", f"Verifying {name}...", int(((idx + 1) / total) * 100)))
+                            # Relaxed Extended JSON can narrow number widths, so JSON compares counts only
+                            _run_verification(
+                                queue, verify_file, path, db[name],
+                                file_is_source=False, strict=(fmt == "bson"),
+                            )
+                        else:
+                            exported = FileSide(path).total()
+                            expected = db[name].count_documents({})
+                            status = "OK" if exported == expected else "FAILED"
+                            queue.put(
+                                (
+                                    "log",
+                                    f"VERIFY {status} ({name}, counts only without _id): "
+                                    f"{expected} in collection, {exported} in file.",
+                                )
+                            )
                 except Exception as e:
                     queue.put(("log", f"Skipping {name} due to error: {e}"))
                     continue
 
-        queue.put(("finished", "Bulk Export Complete."))
+        queue.put(("finished", "Export cancelled." if queue.cancelled() else "Bulk Export Complete."))
     except Exception as e:
         queue.put(("error", str(e)))
-    finally:
-        if client:
-            client.close()
 
 
-# --- SCHEMA WORKER (Unchanged) ---
-def worker_scan_schema(uri, queue):
-    client = None
+# --- SCHEMA WORKER ---
+def worker_scan_schema(uri, known, queue):
+    """
+    Scans, in parallel with server-side type histograms, the collections that
+    are new or whose fingerprint (count, size, indexes) differs from `known`.
+    Result: {"changed": {name: {"sampled", "fields": {path: {"types", "presence", "array"}}}},
+             "removed": [names], "fingerprints": {name: fingerprint}}
+    """
+    known = known or {}
     try:
-        client = MongoClient(uri)
+        client = get_client(uri)
         try:
             db = client.get_default_database()
         except ConfigurationError:
@@ -281,32 +593,212 @@ def worker_scan_schema(uri, queue):
             return
 
         colls = db.list_collection_names()
-        visible_colls = [c for c in colls if not c.startswith("system.")]
+        visible_colls = [c for c in colls if not c.startswith(("system.", AGG_SAMPLE_PREFIX))]
+        queue.put(("progress", "Checking collection fingerprints...", 0))
+        fingerprints = fingerprint_database(db, visible_colls)
+        stale = [
+            c for c in visible_colls
+            if c not in known or fingerprints[c] is None or fingerprints[c] != known[c]
+        ]
+        removed = [c for c in known if c not in fingerprints]
+        total = len(stale)
+        queue.set_total(total)
+        done = [0]
+
+        def on_done(name, summary, error):
+            done[0] += 1
+            queue.advance(1)
+            if error is not None:
+                queue.put(("log", f"Schema scan failed for {name}: {error}"))
+            else:
+                StatsStore.save(conn_key(uri), db.name, name, CollectionStats.from_scan(summary))
+                # The sketches live in the stats store; the ERD only needs the histograms
+                summary.pop("sketches", None)
+            queue.put(("progress", f"Analyzed {name} ({done[0]}/{total})", int(done[0] / total * 100)))
+
+        start = time.time()
+        schema_data = scan_database(db, stale, on_done=on_done, cancelled=queue.cancelled)
+        if queue.cancelled():
+            queue.put(("finished", "Schema scan cancelled."))
+            return
 
-        schema_data = {}
-        total = len(visible_colls)
+        # Failed scans keep their old fingerprint so the next refresh retries them
+        for name in stale:
+            if name not in schema_data:
+                fingerprints[name] = known.get(name)
+        queue.put(
+            (
+                "log",
+                f"Schema scan: {len(schema_data)}/{total} changed collections rescanned, "
+                f"{len(visible_colls) - total} unchanged, {len(removed)} removed "
+                f"in {time.time() - start:.1f}s.",
+            )
+        )
+        # Extended JSON: value bounds may hold dates and ObjectIds
+        result = {"changed": schema_data, "removed": removed, "fingerprints": fingerprints}
+        queue.put(("schema_result", json_util.dumps(result)))
+        queue.put(("finished", "Schema Analysis Complete."))
+    except Exception as e:
+        queue.put(("error", str(e)))
 
-        for idx, name in enumerate(visible_colls):
-            queue.put(("progress", f"Analyzing {name}...", int((idx / total) * 100)))
-            try:
-                pipeline = [{"$sample": {"size": 20}}]
-                samples = list(db[name].aggregate(pipeline))
-                fields = {}
-                for doc in samples:
-                    for key, val in doc.items():
-                        type_name = type(val).__name__
-                        if isinstance(val, ObjectId):
-                            type_name = "ObjectId"
-                        fields[key] = type_name
-                schema_data[name] = fields
-            except Exception as e:
-                queue.put(("log", f"Schema scan failed for {name}: {e}"))
-                continue
 
-        queue.put(("schema_result", json.dumps(schema_data)))
-        queue.put(("finished", "Schema Analysis Complete."))
+# --- RELATIONSHIP WORKER ---
+def worker_detect_relationships(uri, queue):
+    """
+    Finds references between collections by checking sampled field values
+    against the targets' _ids. Uses the schema stats store, scanning only
+    collections whose stats are missing or stale.
+    """
+    try:
+        client = get_client(uri)
+        try:
+            db = client.get_default_database()
+        except ConfigurationError:
+            queue.put(("error", "Database name missing."))
+            return
+
+        key = conn_key(uri)
+        names = [c for c in db.list_collection_names() if not c.startswith(("system.", AGG_SAMPLE_PREFIX))]
+        stats, stale = {}, []
+        for name in names:
+            stored = StatsStore.load(key, db.name, name)
+            if stored is not None and stored.is_fresh():
+                stats[name] = stored
+            else:
+                stale.append(name)
+
+        if stale:
+            queue.put(("progress", f"Scanning {len(stale)} collection(s) without fresh stats...", 0))
+
+            def on_done(name, summary, error):
+                if error is not None:
+                    queue.put(("log", f"Schema scan failed for {name}: {error}"))
+                else:
+                    stats[name] = StatsStore.save(key, db.name, name, CollectionStats.from_scan(summary))
+
+            scan_database(db, stale, on_done=on_done, cancelled=queue.cancelled)
+        if queue.cancelled():
+            queue.put(("finished", "Relationship scan cancelled."))
+            return
+
+        def progress(done, total):
+            queue.advance(1)
+            queue.put(("progress", f"Checked references of {done}/{total} collections", int(done / total * 100)))
+
+        start = time.time()
+        edges = detect_relationships(db, stats, progress=progress, cancelled=queue.cancelled)
+        if queue.cancelled():
+            queue.put(("finished", "Relationship scan cancelled."))
+            return
+
+        queue.put(("log", f"Relationship scan: {len(edges)} reference(s) verified in {time.time() - start:.1f}s."))
+        queue.put(("relationships", json_util.dumps(edges)))
+        queue.put(("finished", f"Found {len(edges)} relationship(s)."))
     except Exception as e:
         queue.put(("error", str(e)))
-    finally:
-        if client:
-            client.close()
+
+
+# --- MATERIALIZED VIEW WORKER ---
+def worker_refresh_matview(uri, view_id, full, queue):
+    """
+    Refreshes one stored materialized view and appends the timing record to
+    its history. Always ends with "finished" or "error"; for scheduled runs
+    the tab logs them instead of opening a dialog.
+    """
+    view = MatViewStore.load(view_id)
+    if view is None:
+        queue.put(("error", "The materialized view no longer exists."))
+        return
+    start = time.time()
+    try:
+        db = get_client(uri)[view["db"]]
+        queue.put(("progress", f"Refreshing '{view['name']}' into '{view['target']}'...", 0))
+        record = refresh_view(db, view, full)
+        MatViewStore.record(view_id, record, view["watermark"], view["last_run"])
+        queue.put(("log", f"View '{view['name']}': {record['mode']} refresh in {record['ms']} ms, {record['count']:,} row(s)."))
+        queue.put(("matview", view_id))
+        queue.put(("finished", f"View '{view['name']}' refreshed ({record['mode']}, {record['ms']} ms)."))
+    except Exception as e:
+        record = {"started": start, "mode": "full" if full else "incremental", "ms": round((time.time() - start) * 1000), "error": str(e)}
+        MatViewStore.record(view_id, record)
+        queue.put(("matview", view_id))
+        queue.put(("error", f"View '{view['name']}' refresh failed: {e}"))
+
+
+# --- COPY WORKER ---
+def worker_copy_collection(src_uri, src_name, dst_uri, dst_name, options, queue):
+    """
+    Streams a collection from one connection to another (no temp files).
+    options: readers, batch_size, copy_options, copy_indexes, drop_target, verify
+    """
+    options = options or {}
+    try:
+        src_client = get_client(src_uri)
+        dst_client = get_client(dst_uri)
+        try:
+            src_db = src_client.get_default_database()
+            dst_db = dst_client.get_default_database()
+        except ConfigurationError:
+            queue.put(("error", "Database name missing in connection string."))
+            return
+
+        src_coll = src_db[src_name]
+        dst_coll = dst_db[dst_name]
+        log = lambda msg: queue.put(("log", msg))
+        progress = lambda text, pct: queue.put(("progress", text, pct))
+
+        copy_collection(src_coll, dst_coll, options, log, progress, queue.cancelled, queue.advance)
+        if queue.cancelled():
+            queue.put(("finished", f"Copy of '{src_name}' cancelled; the target holds a partial copy."))
+            return
+
+        if options.get("verify"):
+            queue.put(("progress", f"Verifying {dst_name}...", 99))
+            _run_verification(queue, verify_collections, src_coll, dst_coll)
+
+        queue.put(("finished", f"Copied '{src_name}' to '{dst_db.name}.{dst_name}'."))
+    except Exception as e:
+        queue.put(("error", f"Copy failed: {e}"))
+
+
+def worker_sync_collection(src_uri, src_name, dst_uri, dst_name, options, queue):
+    """
+    Copies a collection, then keeps the target in step via a change stream
+    until the job is cancelled. The resume token is saved after every applied
+    batch, so a restarted sync picks up where the last one stopped.
+    options: full_document, reset, plus the copy options
+    """
+    options = options or {}
+    try:
+        src_client = get_client(src_uri)
+        dst_client = get_client(dst_uri)
+        try:
+            src_db = src_client.get_default_database()
+            dst_db = dst_client.get_default_database()
+        except ConfigurationError:
+            queue.put(("error", "Database name missing in connection string."))
+            return
+
+        key = SyncState.key(src_uri, f"{src_db.name}.{src_name}", dst_uri, f"{dst_db.name}.{dst_name}")
+        if options.get("reset"):
+            SyncState.clear(key)
+        token = SyncState.load(key)
+        info = {"source": f"{src_db.name}.{src_name}", "target": f"{dst_db.name}.{dst_name}"}
+
+        stats = sync_collection(
+            src_db[src_name],
+            dst_db[dst_name],
+            options,
+            token=token,
+            save_token=lambda tok: SyncState.save(key, tok, info),
+            log=lambda msg: queue.put(("log", msg)),
+            progress=lambda text, pct: queue.put(("progress", text, pct)),
+            cancelled=queue.cancelled,
+            advance=queue.advance,
+        )
+        applied = stats.events if stats else 0
+        queue.put(("finished", f"Sync of '{src_name}' stopped after {applied} event(s). It resumes from here next time."))
+    except SyncStopped as e:
+        queue.put(("error", f"Sync ended: {e}"))
+    except Exception as e:
+        queue.put(("error", f"Sync failed: {e}"))
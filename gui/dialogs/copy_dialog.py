@@ -0,0 +1,105 @@
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QLabel, QComboBox, QCheckBox, QDialogButtonBox, QFormLayout,
+    QSpinBox, QLineEdit, QMessageBox
+)
+from config.settings import COPY_READERS, COPY_BATCH_SIZE
+
+
+class CopyCollectionDialog(QDialog):
+    """
+    Picks the destination connection tab and copy options.
+    `targets` is a list of (label, uri) for every connected tab.
+    With `sync=True` it configures a continuous sync instead of a one-off copy.
+    """
+
+    def __init__(self, coll_name, targets, parent=None, sync=False):
+        super().__init__(parent)
+        self.sync = sync
+        title = "Sync Collection" if sync else "Copy Collection"
+        self.setWindowTitle(f"{title}: {coll_name}")
+        self.resize(450, 0)
+        layout = QVBoxLayout(self)
+
+        form = QFormLayout()
+        self.target_combo = QComboBox()
+        for label, uri in targets:
+            self.target_combo.addItem(label, uri)
+        form.addRow("Target Connection:", self.target_combo)
+
+        self.name_input = QLineEdit(coll_name)
+        form.addRow("Target Collection:", self.name_input)
+
+        self.readers_spin = QSpinBox()
+        self.readers_spin.setRange(1, 32)
+        self.readers_spin.setValue(COPY_READERS)
+        form.addRow("Parallel Readers:", self.readers_spin)
+
+        self.batch_spin = QSpinBox()
+        self.batch_spin.setRange(100, 100000)
+        self.batch_spin.setSingleStep(500)
+        self.batch_spin.setValue(COPY_BATCH_SIZE)
+        self.batch_spin.setSuffix(" docs")
+        form.addRow("Batch Size:", self.batch_spin)
+        layout.addLayout(form)
+
+        self.options_check = QCheckBox("Replicate collection options (validator, capped, collation)")
+        self.options_check.setChecked(True)
+        layout.addWidget(self.options_check)
+
+        self.indexes_check = QCheckBox("Replicate indexes (built after the data is copied)")
+        self.indexes_check.setChecked(True)
+        layout.addWidget(self.indexes_check)
+
+        self.drop_check = QCheckBox("Drop target collection first")
+        self.drop_check.setStyleSheet("color: #dc3545;")
+        layout.addWidget(self.drop_check)
+
+        self.verify_check = QCheckBox("Verify after copy")
+        self.verify_check.setVisible(not sync)
+        layout.addWidget(self.verify_check)
+
+        self.full_doc_check = QCheckBox("Apply updates as full documents (one extra source read per update)")
+        self.full_doc_check.setVisible(sync)
+        layout.addWidget(self.full_doc_check)
+
+        self.reset_check = QCheckBox("Start over (discard the saved resume point and copy again)")
+        self.reset_check.setVisible(sync)
+        layout.addWidget(self.reset_check)
+
+        if sync:
+            hint = QLabel(
+                "The source must be a replica set. Changes are applied until the sync is stopped; "
+                "a stopped sync resumes where it left off."
+            )
+            hint.setWordWrap(True)
+        else:
+            hint = QLabel("Documents stream directly between servers; no temporary files are written.")
+        hint.setStyleSheet("color: gray; font-size: 11px;")
+        layout.addWidget(hint)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.validate_and_accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def validate_and_accept(self):
+        if not self.name_input.text().strip():
+            QMessageBox.warning(self, "Error", "Target collection name is required.")
+            return
+        self.accept()
+
+    def get_settings(self):
+        return (
+            self.target_combo.currentData(),
+            self.name_input.text().strip(),
+            {
+                "readers": self.readers_spin.value(),
+                "batch_size": self.batch_spin.value(),
+                "copy_options": self.options_check.isChecked(),
+                "copy_indexes": self.indexes_check.isChecked(),
+                "drop_target": self.drop_check.isChecked(),
+                "verify": self.verify_check.isChecked() and not self.sync,
+                "full_document": self.full_doc_check.isChecked(),
+                "reset": self.reset_check.isChecked(),
+            },
+        )
@@ -15,10 +15,17 @@ class ExportDialog(QDialog):
         self.meta_check.setChecked(False) 
         layout.addWidget(self.meta_check)
 
+        self.verify_check = QCheckBox("Verify after export (JSON/BSON)")
+        self.verify_check.setToolTip(
+            "Compares document counts per _id range against the collection.\n"
+            "BSON with metadata is also compared byte-for-byte via server-side sizes."
+        )
+        layout.addWidget(self.verify_check)
+
         self.buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         self.buttons.accepted.connect(self.accept)
         self.buttons.rejected.connect(self.reject)
         layout.addWidget(self.buttons)
 
     def get_settings(self):
-        return self.combo.currentText(), self.meta_check.isChecked()
\ No newline at end of file
+        return self.combo.currentText(), self.meta_check.isChecked(), self.verify_check.isChecked()
\ No newline at end of file
@@ -0,0 +1,97 @@
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QLabel, QComboBox, QCheckBox, QDialogButtonBox, QFormLayout, QSpinBox,
+    QLineEdit
+)
+from config.settings import IMPORT_BATCH_SIZE, BULK_LOAD_WRITE_CONCERN
+
+
+class ImportDialog(QDialog):
+    MODES = [
+        ("Insert (fail on duplicates)", "insert"),
+        ("Replace by _id", "replace"),
+        ("Upsert on key (replace whole document)", "upsert"),
+        ("Merge on key ($set provided fields)", "merge"),
+    ]
+
+    def __init__(self, file_count=0, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Import Settings")
+        layout = QVBoxLayout(self)
+
+        if file_count:
+            layout.addWidget(QLabel(f"{file_count} file(s) selected."))
+
+        # --- Write Mode ---
+        mode_form = QFormLayout()
+        self.mode_combo = QComboBox()
+        for label, mode in self.MODES:
+            self.mode_combo.addItem(label, mode)
+        self.mode_combo.currentIndexChanged.connect(self.toggle_key_input)
+        mode_form.addRow("Mode:", self.mode_combo)
+
+        self.key_input = QLineEdit()
+        self.key_input.setPlaceholderText("e.g. email or sku (index it for speed)")
+        mode_form.addRow("Match Key:", self.key_input)
+        layout.addLayout(mode_form)
+
+        # --- Bulk Load ---
+        self.bulk_check = QCheckBox("Fast bulk-load (defer index builds)")
+        self.bulk_check.setToolTip(
+            "Drops non-unique secondary indexes, inserts unordered with a relaxed\n"
+            "write concern, then rebuilds the original indexes (even on failure)."
+        )
+        self.bulk_check.toggled.connect(self.toggle_bulk_options)
+        layout.addWidget(self.bulk_check)
+
+        form = QFormLayout()
+        self.w_combo = QComboBox()
+        self.w_combo.addItems(["1", "majority"])
+        self.w_combo.setCurrentText(str(BULK_LOAD_WRITE_CONCERN.get("w", 1)))
+        self.j_check = QCheckBox("Wait for journal (j)")
+        self.j_check.setChecked(BULK_LOAD_WRITE_CONCERN.get("j", False))
+        form.addRow("Write Concern (w):", self.w_combo)
+        form.addRow(self.j_check)
+
+        self.batch_spin = QSpinBox()
+        self.batch_spin.setRange(100, 100000)
+        self.batch_spin.setSingleStep(500)
+        self.batch_spin.setValue(IMPORT_BATCH_SIZE)
+        self.batch_spin.setSuffix(" docs")
+        form.addRow("Batch Size:", self.batch_spin)
+        layout.addLayout(form)
+
+        self.verify_check = QCheckBox("Verify after import (counts + per-range hashes)")
+        self.verify_check.setToolTip("Only available for Insert and Replace modes.")
+        layout.addWidget(self.verify_check)
+
+        self.toggle_bulk_options(False)
+        self.toggle_key_input()
+
+        self.buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        layout.addWidget(self.buttons)
+
+    def toggle_bulk_options(self, checked):
+        self.w_combo.setEnabled(checked)
+        self.j_check.setEnabled(checked)
+
+    def toggle_key_input(self, _=None):
+        keyed = self.mode_combo.currentData() in ("upsert", "merge")
+        self.key_input.setEnabled(keyed)
+        if hasattr(self, "verify_check"):
+            self.verify_check.setEnabled(not keyed)
+
+    def get_settings(self):
+        w = self.w_combo.currentText()
+        return {
+            "mode": self.mode_combo.currentData(),
+            "key": self.key_input.text().strip() or "_id",
+            "bulk_load": self.bulk_check.isChecked(),
+            "write_concern": {
+                "w": int(w) if w.isdigit() else w,
+                "j": self.j_check.isChecked(),
+            },
+            "batch_size": self.batch_spin.value(),
+            "verify": self.verify_check.isChecked() and self.verify_check.isEnabled(),
+        }
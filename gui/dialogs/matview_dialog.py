@@ -0,0 +1,214 @@
+import time
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QDialogButtonBox, QFormLayout,
+    QSpinBox, QLineEdit, QMessageBox, QTableWidget, QTableWidgetItem, QPushButton,
+    QHeaderView, QAbstractItemView, QSplitter, QWidget
+)
+from PySide6.QtCore import Qt, Signal
+from bson import json_util
+from core.matviews import MERGE_MODES, MatViewStore, new_view, validate_view
+
+
+def _fmt_time(ts):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)) if ts else "never"
+
+
+class SaveViewDialog(QDialog):
+    """Options for saving the builder's pipeline as a materialized view."""
+
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Save as Materialized View: {source}")
+        self.resize(480, 0)
+        layout = QVBoxLayout(self)
+
+        form = QFormLayout()
+        self.name_input = QLineEdit(f"{source}_summary")
+        form.addRow("View Name:", self.name_input)
+
+        self.target_input = QLineEdit(f"{source}_mv")
+        form.addRow("Target Collection:", self.target_input)
+
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(MERGE_MODES)
+        self.mode_combo.setToolTip(
+            "How a refreshed row meets an existing one:\n"
+            "replace / merge / keepExisting - $merge's own modes\n"
+            "accumulate - add $sum/$count, combine $min/$max of a trailing $group"
+        )
+        form.addRow("When Matched:", self.mode_combo)
+
+        self.on_input = QLineEdit("_id")
+        self.on_input.setToolTip("Comma-separated fields identifying a row (a unique index is created for them)")
+        form.addRow("Match On:", self.on_input)
+
+        self.watermark_input = QLineEdit()
+        self.watermark_input.setPlaceholderText("e.g. updated_at (empty = full rebuilds only)")
+        self.watermark_input.setToolTip(
+            "Incremental refreshes need a pipeline that handles each document on its own, or\n"
+            "'accumulate' with a trailing $group. $group, $bucket, $count, $sortByCount,\n"
+            "$setWindowFields, $limit and similar stages otherwise need full rebuilds."
+        )
+        form.addRow("Watermark Field:", self.watermark_input)
+
+        self.interval_spin = QSpinBox()
+        self.interval_spin.setRange(0, 7 * 24 * 60)
+        self.interval_spin.setSuffix(" min")
+        self.interval_spin.setSpecialValueText("Manual only")
+        form.addRow("Refresh Every:", self.interval_spin)
+        layout.addLayout(form)
+
+        hint = QLabel(
+            "With a watermark field, refreshes only run documents newer than the last refresh "
+            "through the pipeline and $merge the results. An index on the field keeps that cheap. "
+            "Pipelines that combine documents ($group, $bucket, $count, $sortByCount, $setWindowFields, ...) "
+            "only refresh incrementally with 'accumulate' and a trailing $group."
+        )
+        hint.setWordWrap(True)
+        hint.setStyleSheet("color: gray; font-size: 11px;")
+        layout.addWidget(hint)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def build_view(self, conn, db_name, source, pipeline):
+        """The view definition; raises ValueError when it cannot be refreshed."""
+        on = [f.strip() for f in self.on_input.text().split(",") if f.strip()]
+        view = new_view(
+            conn, db_name, self.name_input.text().strip(), source, pipeline,
+            self.target_input.text().strip(), on=on, when_matched=self.mode_combo.currentText(),
+            watermark_field=self.watermark_input.text().strip(), interval=self.interval_spin.value(),
+        )
+        validate_view(view)
+        return view
+
+
+class MatViewDialog(QDialog):
+    """
+    Materialized views of one connection and database, with the timing
+    history of the selected view. Refreshes run as background jobs; the
+    connection tab calls reload() when one finishes.
+    """
+    refresh_requested = Signal(str, bool)  # view id, full rebuild
+
+    def __init__(self, conn, db_name, parent=None):
+        super().__init__(parent)
+        self.conn = conn
+        self.db_name = db_name
+        self.views = []
+        self.setWindowTitle(f"Materialized Views: {db_name}")
+        self.resize(900, 560)
+        layout = QVBoxLayout(self)
+
+        splitter = QSplitter(Qt.Vertical)
+        self.view_table = self._table(["Name", "Source → Target", "Mode", "Schedule", "Last Refresh", "Watermark"])
+        self.view_table.itemSelectionChanged.connect(self.show_history)
+        splitter.addWidget(self.view_table)
+
+        self.history_table = self._table(["Started", "Mode", "Time", "Rows", "Watermark Window", "Error"])
+        history_widget = QWidget()
+        history_layout = QVBoxLayout(history_widget)
+        history_layout.setContentsMargins(0, 0, 0, 0)
+        history_layout.addWidget(QLabel("<b>Refresh History</b>"))
+        history_layout.addWidget(self.history_table)
+        splitter.addWidget(history_widget)
+        layout.addWidget(splitter)
+
+        btn_row = QHBoxLayout()
+        refresh_btn = QPushButton("Refresh Now")
+        refresh_btn.setToolTip("Incremental when the view has a watermark, else a full rebuild")
+        refresh_btn.clicked.connect(lambda: self.request_refresh(False))
+        full_btn = QPushButton("Full Rebuild")
+        full_btn.clicked.connect(lambda: self.request_refresh(True))
+        delete_btn = QPushButton("Delete View")
+        delete_btn.setStyleSheet("color: red;")
+        delete_btn.setToolTip("Forget the definition; the target collection is kept")
+        delete_btn.clicked.connect(self.delete_view)
+        btn_row.addWidget(refresh_btn)
+        btn_row.addWidget(full_btn)
+        btn_row.addStretch()
+        btn_row.addWidget(delete_btn)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        btn_row.addWidget(close_btn)
+        layout.addLayout(btn_row)
+
+        self.reload()
+
+    def _table(self, headers):
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.setSelectionMode(QAbstractItemView.SingleSelection)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        return table
+
+    def selected(self):
+        row = self.view_table.currentRow()
+        return self.views[row] if 0 <= row < len(self.views) else None
+
+    def reload(self):
+        current = self.selected()
+        self.views = MatViewStore.list(self.conn, self.db_name)
+        self.view_table.setRowCount(len(self.views))
+        for r, v in enumerate(self.views):
+            last = v["history"][0] if v["history"] else None
+            last_text = _fmt_time(v["last_run"])
+            if last:
+                last_text += " (failed)" if "error" in last else f" · {last['ms']} ms"
+            cells = [
+                v["name"],
+                f"{v['source']} → {v['target']}",
+                v["when_matched"] + (f" · since {v['watermark_field']}" if v["watermark_field"] else " · full"),
+                f"every {v['interval']} min" if v["interval"] else "manual",
+                last_text,
+                json_util.dumps(v["watermark"]) if v["watermark"] is not None else "",
+            ]
+            for c, text in enumerate(cells):
+                self.view_table.setItem(r, c, QTableWidgetItem(text))
+        ids = [v["id"] for v in self.views]
+        if current is not None and current["id"] in ids:
+            self.view_table.selectRow(ids.index(current["id"]))
+        elif self.views:
+            self.view_table.selectRow(0)
+        self.show_history()
+
+    def show_history(self):
+        view = self.selected()
+        history = view["history"] if view else []
+        self.history_table.setRowCount(len(history))
+        for r, rec in enumerate(history):
+            window = ""
+            if rec.get("from") is not None or rec.get("to") is not None:
+                window = f"{json_util.dumps(rec.get('from'))} → {json_util.dumps(rec.get('to'))}"
+            cells = [
+                _fmt_time(rec["started"]),
+                rec["mode"],
+                f"{rec['ms']} ms",
+                f"{rec['count']:,}" if rec.get("count") is not None else "",
+                window,
+                rec.get("error", ""),
+            ]
+            for c, text in enumerate(cells):
+                self.history_table.setItem(r, c, QTableWidgetItem(text))
+
+    def request_refresh(self, full):
+        view = self.selected()
+        if view is not None:
+            self.refresh_requested.emit(view["id"], full)
+
+    def delete_view(self):
+        view = self.selected()
+        if view is None:
+            return
+        reply = QMessageBox.question(
+            self, "Delete View",
+            f"Delete the view '{view['name']}'? The collection '{view['target']}' is kept.",
+            QMessageBox.Yes | QMessageBox.No,
+        )
+        if reply == QMessageBox.Yes:
+            MatViewStore.delete(view["id"])
+            self.reload()
@@ -0,0 +1,112 @@
+import difflib
+import html
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTextEdit, QPushButton, QDialogButtonBox
+)
+from PySide6.QtCore import Signal
+from PySide6.QtGui import QFont
+from bson import json_util
+
+DIFF_COLORS = {"+": "#d1e7dd", "-": "#f8d7da", "@": "#e2e3e5"}
+
+
+def _pipeline_lines(stages):
+    return json_util.dumps(stages, indent=2).splitlines()
+
+
+class OptimizeDialog(QDialog):
+    """
+    Shows the optimizer's rewrite of a pipeline as a diff, with the lint
+    warnings. Comparing runs both versions under explain; the view does the
+    work and hands the totals back through show_comparison().
+    """
+    compare_requested = Signal()
+
+    def __init__(self, original, rewritten, notes, warnings, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Optimize Pipeline")
+        self.resize(760, 620)
+        layout = QVBoxLayout(self)
+
+        # --- Summary ---
+        if notes:
+            summary = "<b>Rewrites:</b><ul>" + "".join(f"<li>{html.escape(n)}</li>" for n in notes) + "</ul>"
+        else:
+            summary = "<b>No rewrites:</b> stages are already in their cheapest equivalent order."
+        if warnings:
+            summary += "<b>Warnings:</b><ul>" + "".join(
+                f"<li style='color:#b02a37'>{html.escape(w)}</li>" for w in warnings
+            ) + "</ul>"
+        summary_lbl = QLabel(summary)
+        summary_lbl.setWordWrap(True)
+        layout.addWidget(summary_lbl)
+
+        # --- Diff ---
+        layout.addWidget(QLabel("Rewrite (original → optimized):"))
+        self.diff_view = QTextEdit()
+        self.diff_view.setReadOnly(True)
+        self.diff_view.setFont(QFont("Consolas", 10))
+        self.diff_view.setHtml(self._diff_html(original, rewritten))
+        layout.addWidget(self.diff_view)
+
+        # --- Explain Comparison ---
+        compare_row = QHBoxLayout()
+        self.compare_btn = QPushButton("Compare with Explain")
+        self.compare_btn.setToolTip("Run both versions with explain(executionStats)")
+        self.compare_btn.setEnabled(bool(notes))
+        self.compare_btn.clicked.connect(self.request_compare)
+        self.compare_lbl = QLabel("")
+        self.compare_lbl.setWordWrap(True)
+        compare_row.addWidget(self.compare_btn)
+        compare_row.addWidget(self.compare_lbl, 1)
+        layout.addLayout(compare_row)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Cancel)
+        self.apply_btn = buttons.addButton("Apply Rewrite", QDialogButtonBox.AcceptRole)
+        self.apply_btn.setEnabled(bool(notes))
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def _diff_html(self, original, rewritten):
+        diff = list(difflib.unified_diff(
+            _pipeline_lines(original), _pipeline_lines(rewritten), "original", "optimized", lineterm=""
+        ))
+        if not diff:
+            return "<pre>" + html.escape("\n".join(_pipeline_lines(original))) + "</pre>"
+        rows = []
+        for line in diff[2:]:
+            color = DIFF_COLORS.get(line[:1])
+            style = f" style='background-color:{color}'" if color else ""
+            rows.append(f"<span{style}>{html.escape(line) or '&nbsp;'}</span>")
+        return "<pre>" + "<br>".join(rows) + "</pre>"
+
+    def request_compare(self):
+        self.compare_btn.setEnabled(False)
+        self.compare_lbl.setText("Running both versions under explain...")
+        self.compare_requested.emit()
+
+    def show_comparison(self, results):
+        before, after = results
+        self.compare_btn.setEnabled(True)
+
+        def describe(r):
+            parts = [f"{r['ms']} ms"]
+            if r["docs_examined"] is not None: parts.append(f"{r['docs_examined']:,} docs examined")
+            if r["collscan"]: parts.append("COLLSCAN")
+            if r["memory_sort"]: parts.append("in-memory sort")
+            return ", ".join(parts)
+
+        verdict = ""
+        if before["ms"] and after["ms"]:
+            verdict = f" → <b>{before['ms'] / after['ms']:.1f}x</b>"
+        elif before["collscan"] and not after["collscan"]:
+            verdict = " → <b>now uses an index</b>"
+        warning = ""
+        if before["n_out"] != after["n_out"]:
+            warning = f"<br><span style='color:#b02a37'>Result counts differ ({before['n_out']} vs {after['n_out']}).</span>"
+        self.compare_lbl.setText(f"Original: {describe(before)}<br>Optimized: {describe(after)}{verdict}{warning}")
+
+    def show_compare_error(self, error):
+        self.compare_btn.setEnabled(True)
+        self.compare_lbl.setText(f"<span style='color:#b02a37'>Compare failed: {html.escape(error)}</span>")
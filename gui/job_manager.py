@@ -0,0 +1,180 @@
+import time
+from queue import Empty
+from PySide6.QtCore import QObject, QTimer, Signal
+from config.settings import MAX_CONCURRENT_JOBS, JOB_POLL_INTERVAL_MS, JOB_CANCEL_GRACE, JOB_SHUTDOWN_WAIT
+from core.jobs import Job
+from core.worker_pool import WorkerPool
+
+
+class JobManager(QObject):
+    """
+    Runs background jobs in worker processes, at most `limit` at a time.
+    Jobs submitted with a `pool_key` (the connection URI) run on that
+    connection's warm WorkerPool when it has an idle worker; others, and
+    pooled jobs that find the pool busy, get a fresh process.
+    Progress is read from each job's shared counters on a timer; only
+    log / finished / error / result messages travel through the queue.
+    A job rebuilding indexes shows as "restoring" and is never killed.
+    One manager is shared by every connection tab.
+    """
+
+    job_message = Signal(object, object)  # (job, message tuple)
+    jobs_changed = Signal()
+
+    def __init__(self, parent=None, limit=MAX_CONCURRENT_JOBS):
+        super().__init__(parent)
+        self.limit = limit
+        self.jobs = []
+        self.pools = {}
+        self._next_id = 1
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+
+    def submit(self, name, target, args, owner=None, label="", pool_key=None):
+        job = Job(self._next_id, name, target, tuple(args), owner, label, pool_key)
+        self._next_id += 1
+        self.jobs.append(job)
+        self._start_queued()
+        if not self.timer.isActive():
+            self.timer.start(JOB_POLL_INTERVAL_MS)
+        self.jobs_changed.emit()
+        return job
+
+    def running(self):
+        return [j for j in self.jobs if j.active]
+
+    def jobs_for(self, owner):
+        return [j for j in self.jobs if j.owner is owner]
+
+    def cancel(self, job):
+        if job.state == "queued":
+            self._finish(job, "cancelled", "Cancelled before it started.")
+        elif job.state == "running":
+            # Cooperative first: the worker stops at its next batch and closes its files
+            job.state = "cancelling"
+            job.cancel_requested = time.time()
+            job.channel.cancel()
+        elif job.state == "restoring" and job.cancel_requested is None:
+            # The rebuild finishes first; the grace period starts after it
+            job.cancel_requested = time.time()
+            job.channel.cancel()
+        self.jobs_changed.emit()
+
+    def cancel_owner(self, owner):
+        for job in self.jobs_for(owner):
+            if not job.finished:
+                self.cancel(job)
+            job.owner = None
+
+    def clear_finished(self):
+        self.jobs = [j for j in self.jobs if not j.finished]
+        self.jobs_changed.emit()
+
+    def shutdown(self):
+        self.timer.stop()
+        for job in self.running():
+            job.channel.cancel()
+        # Short rebuilds get to finish; a longer one is killed and redone on the
+        # next connect from its persisted snapshot (see IndexState)
+        deadline = time.time() + JOB_SHUTDOWN_WAIT
+        for job in self.running():
+            while job.process.is_alive() and job.refresh()["restoring"] and time.time() < deadline:
+                time.sleep(0.1)
+            job.process.terminate()
+            job.process.join(1)
+        for pool in self.pools.values():
+            pool.shutdown()
+        self.pools = {}
+
+    # --- Polling ---
+    def poll(self):
+        now = time.time()
+        for job in [j for j in self.jobs if j.active or j.holds_worker()]:
+            if job.active:
+                job.refresh()
+                self._track_restoring(job, now)
+            self._drain(job)
+            if not (job.active or job.holds_worker()):
+                continue
+            if not job.process.is_alive():
+                self._drain(job)
+                if job.holds_worker():
+                    job.worker.release()  # the pool replaces dead workers
+                if job.active:
+                    text = f"Worker exited unexpectedly (code {job.process.exitcode})."
+                    self._finish(job, "failed", text)
+                    self._notify(job, ("error", text))
+            elif job.state == "cancelling" and now - job.cancel_requested > JOB_CANCEL_GRACE:
+                job.process.terminate()
+                text = "Terminated after ignoring the cancel request."
+                self._finish(job, "cancelled", text)
+                self._notify(job, ("log", f"{job.name}: {text}"))
+
+        self._start_queued()
+        busy_pools = any(p.busy() for p in self.pools.values())
+        if not busy_pools and all(j.finished for j in self.jobs):
+            self.timer.stop()
+        self.jobs_changed.emit()
+
+    def _drain(self, job):
+        channel = job.worker.channel if job.worker is not None else job.channel
+        # A pooled job is drained until its process reports idle, even after "finished"
+        while job.active or job.holds_worker():
+            try:
+                msg = channel.messages.get_nowait()
+            except Empty:
+                return
+            if msg[0] == "idle":
+                job.worker.release()
+                if job.active:
+                    self._finish(job, "done", "Finished.")
+                return
+            if not job.active:
+                continue
+            if msg[0] == "finished":
+                state = "cancelled" if job.cancel_requested is not None else "done"
+                self._finish(job, state, msg[1])
+            elif msg[0] == "error":
+                self._finish(job, "failed", msg[1])
+            self._notify(job, msg)
+
+    def _track_restoring(self, job, now):
+        if job.last["restoring"]:
+            job.state = "restoring"
+        elif job.state == "restoring":
+            job.state = "running" if job.cancel_requested is None else "cancelling"
+            if job.cancel_requested is not None:
+                job.cancel_requested = now  # a fresh grace period to wind down
+
+    def _notify(self, job, msg):
+        # Jobs whose tab was closed finish silently
+        if job.owner is not None:
+            self.job_message.emit(job, msg)
+
+    def _start_queued(self):
+        slots = self.limit - len(self.running())
+        for job in [j for j in self.jobs if j.state == "queued"]:
+            if slots <= 0:
+                break
+            if job.pool_key is None:
+                job.start()
+            else:
+                pool = self.pools.get(job.pool_key)
+                if pool is None:
+                    pool = self.pools[job.pool_key] = WorkerPool(job.pool_key)
+                # With the pool busy the job still gets its slot, in a fresh process
+                job.start(pool.acquire())
+            slots -= 1
+
+    def _finish(self, job, state, message):
+        job.state = state
+        job.message = message
+        job.ended = time.time()
+        if job.channel is not None:
+            job.refresh()
+        if job.worker is None and job.process is not None:
+            job.process.join(1)
+            if job.process.is_alive():
+                job.process.terminate()
+        # A pooled channel is reused by the next job; keep only the final snapshot
+        job.channel = None
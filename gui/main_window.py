@@ -3,6 +3,8 @@ from PySide6.QtWidgets import QMainWindow, QTabWidget, QMessageBox
 from PySide6.QtGui import QKeySequence, QShortcut, QCloseEvent
 from config.settings import APP_TITLE, WINDOW_SIZE
 from gui.tabs.db_tab import DatabaseTab
+from gui.dialogs.copy_dialog import CopyCollectionDialog
+from gui.job_manager import JobManager
 
 
 class MainWindow(QMainWindow):
@@ -16,6 +18,9 @@ class MainWindow(QMainWindow):
         self.tab_widget.tabCloseRequested.connect(self.close_tab)
         self.setCentralWidget(self.tab_widget)
 
+        # One job queue for every tab, so the concurrency limit is global
+        self.job_manager = JobManager(self)
+
         self.create_menubar()
         self.setup_global_shortcuts()
 
@@ -52,7 +57,9 @@ class MainWindow(QMainWindow):
         QShortcut(QKeySequence("Ctrl+Q"), self).activated.connect(self.close)
 
     def add_new_tab(self):
-        new_tab = DatabaseTab(self)
+        new_tab = DatabaseTab(self, job_manager=self.job_manager)
+        new_tab.request_copy.connect(self.action_copy_collection)
+        new_tab.request_sync.connect(self.action_sync_collection)
         idx = self.tab_widget.addTab(new_tab, "New Connection")
         self.tab_widget.setCurrentIndex(idx)
 
@@ -96,6 +103,35 @@ class MainWindow(QMainWindow):
         if isinstance(current_widget, DatabaseTab):
             current_widget.trigger_bulk_export()
 
+    def connected_tabs(self):
+        tabs = []
+        for i in range(self.tab_widget.count()):
+            widget = self.tab_widget.widget(i)
+            if isinstance(widget, DatabaseTab) and widget.db is not None:
+                tabs.append(widget)
+        return tabs
+
+    def action_copy_collection(self, source_tab, coll_name, sync=False):
+        targets = [(tab.connection_label(), tab.conn_bar.uri_input.text()) for tab in self.connected_tabs()]
+        if not targets:
+            return QMessageBox.warning(self, "Error", "No connected tabs to copy into.")
+
+        dlg = CopyCollectionDialog(coll_name, targets, self, sync=sync)
+        if not dlg.exec():
+            return
+        dst_uri, dst_name, options = dlg.get_settings()
+        if dst_uri == source_tab.conn_bar.uri_input.text() and dst_name == coll_name:
+            return QMessageBox.warning(
+                self, "Error", "Source and target are the same collection."
+            )
+        if sync:
+            source_tab.start_sync(coll_name, dst_uri, dst_name, options)
+        else:
+            source_tab.start_copy(coll_name, dst_uri, dst_name, options)
+
+    def action_sync_collection(self, source_tab, coll_name):
+        self.action_copy_collection(source_tab, coll_name, sync=True)
+
     # --- NEW: Override Close Event ---
     def closeEvent(self, event: QCloseEvent):
         """
@@ -110,13 +146,21 @@ class MainWindow(QMainWindow):
             if isinstance(widget, DatabaseTab) and widget.client is not None:
                 connected_count += 1
 
-        if connected_count > 0:
+        running_jobs = len(self.job_manager.running())
+
+        if connected_count > 0 or running_jobs > 0:
+            jobs_note = (
+                f"{running_jobs} background job(s) are still running and will be stopped.\n"
+                if running_jobs
+                else ""
+            )
             reply = QMessageBox.question(
                 self,
                 "Confirm Exit",
                 f"You have {connected_count} active database connection(s).\n\n"
                 "Closing the application will disconnect them all.\n"
-                "Are you sure you want to exit?",
+                + jobs_note
+                + "Are you sure you want to exit?",
                 QMessageBox.Yes | QMessageBox.No,
                 QMessageBox.No,
             )
@@ -127,6 +171,7 @@ class MainWindow(QMainWindow):
                     widget = self.tab_widget.widget(i)
                     if isinstance(widget, DatabaseTab):
                         widget.disconnect_mongo()
+                self.job_manager.shutdown()
                 event.accept()
             else:
                 event.ignore()
@@ -1,5 +1,5 @@
-import json
 import os
+import re
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -18,36 +18,64 @@ from PySide6.QtWidgets import (
     QListWidgetItem,
     QSizePolicy, # Added QSizePolicy
 )
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import Qt, QTimer, Signal
 from PySide6.QtGui import QAction, QCursor, QKeySequence, QShortcut, QPixmap, QIcon
-from multiprocessing import Process, Queue
 from pymongo.errors import CollectionInvalid, OperationFailure
+from bson import json_util
 
+from config.settings import AGG_SAMPLE_PREFIX, MATVIEW_CHECK_INTERVAL_MS
 from core.db_manager import DBManager
-from core.workers import worker_import_task, worker_export_task, worker_scan_schema
+from core.schema_stats import conn_key
+from core.matviews import MatViewStore, is_due
+from core.workers import (
+    worker_import_task,
+    worker_export_task,
+    worker_scan_schema,
+    worker_detect_relationships,
+    worker_copy_collection,
+    worker_sync_collection,
+    worker_refresh_matview,
+    worker_restore_indexes,
+)
 from gui.widgets.conn_bar import ConnectionBar
+from gui.widgets.jobs_panel import JobsPanel
+from gui.job_manager import JobManager
 from gui.views.data_view import DataView
 from gui.views.gridfs_view import GridFSView
 from gui.views.erd_view import ErdView
 from gui.views.agg_view import AggregationView
 from gui.views.dashboard_view import DashboardView
+from gui.views.current_op_view import CurrentOpView
+from gui.views.profiler_view import ProfilerView
 from gui.dialogs.export_dialog import ExportDialog
+from gui.dialogs.matview_dialog import SaveViewDialog, MatViewDialog
+from gui.dialogs.import_dialog import ImportDialog
 from gui.dialogs.create_coll_dialog import CreateCollectionDialog
 from gui.dialogs.index_manager import IndexManagerDialog
 from gui.dialogs.schema_dialog import SchemaDialog
 from utils.query_manager import QueryManager
+from utils.index_state import IndexState
 
 
 class DatabaseTab(QWidget):
-    def __init__(self, parent=None):
+    # Cross-tab actions are resolved by MainWindow, which knows every connection
+    request_copy = Signal(object, str)
+    request_sync = Signal(object, str)
+
+    def __init__(self, parent=None, job_manager=None):
         super().__init__(parent)
         self.layout = QVBoxLayout(self)
         self.client = None
         self.db = None
-        self.process = None
-        self.queue = None
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.check_process_queue)
+        # Shared with the other tabs so the concurrency limit is workstation-wide
+        self.jobs = job_manager or JobManager(self)
+        self.jobs.job_message.connect(self.handle_job_message)
+        self.jobs.jobs_changed.connect(self.update_job_progress)
+        # Materialized views due a refresh are queued as background jobs
+        self.matview_jobs = {}
+        self.matview_dialog = None
+        self.matview_timer = QTimer(self)
+        self.matview_timer.timeout.connect(self.check_matviews)
         self.init_ui()
         self.setup_shortcuts()
 
@@ -146,6 +174,8 @@ class DatabaseTab(QWidget):
 
         # Initialize Views
         self.dashboard_view = DashboardView()
+        self.ops_view = CurrentOpView()
+        self.profiler_view = ProfilerView()
         self.data_view = DataView()
         self.data_view.request_navigation.connect(self.navigate_to_collection)
         self.data_view.query_executed.connect(
@@ -154,19 +184,28 @@ class DatabaseTab(QWidget):
 
         self.agg_view = AggregationView()
         self.erd_view = ErdView()
+        self.erd_view.request_schema_scan.connect(self.trigger_erd_scan)
+        self.erd_view.request_fk_scan.connect(self.trigger_fk_scan)
+        self.agg_view.request_save_view.connect(self.save_matview)
+        self.agg_view.request_view_manager.connect(self.open_matviews)
         self.gridfs_view = GridFSView()
 
         self.log_view = QTextEdit()
         self.log_view.setReadOnly(True)
         self.log_view.setStyleSheet("background: #212529; color: #00ff00;")
 
+        self.jobs_panel = JobsPanel(self.jobs)
+
         # Add Tabs
         self.tabs.addTab(self.data_view, "Data Explorer")
         self.tabs.addTab(self.dashboard_view, "Dashboard")
+        self.tabs.addTab(self.ops_view, "Operations")
+        self.tabs.addTab(self.profiler_view, "Profiler")
         self.tabs.addTab(self.agg_view, "Aggregation Builder")
         self.tabs.addTab(self.gridfs_view, "GridFS Files")
         self.tabs.addTab(self.erd_view, "Schema / ERD")
         self.tabs.addTab(self.log_view, "System Logs")
+        self.tabs.addTab(self.jobs_panel, "Jobs")
 
         work_layout.addWidget(self.tabs)
 
@@ -300,6 +339,18 @@ class DatabaseTab(QWidget):
             )
             menu.addAction(export_action)
 
+            copy_action = QAction("Copy Collection To...", self)
+            copy_action.triggered.connect(
+                lambda: self.request_copy.emit(self, coll_name)
+            )
+            menu.addAction(copy_action)
+
+            sync_action = QAction("Sync Collection To...", self)
+            sync_action.triggered.connect(
+                lambda: self.request_sync.emit(self, coll_name)
+            )
+            menu.addAction(sync_action)
+
             drop_action = QAction(f"Drop Collection", self)
             drop_action.setIcon(icon_delete)
             drop_action.triggered.connect(
@@ -309,6 +360,12 @@ class DatabaseTab(QWidget):
 
             menu.addSeparator()
 
+        if self.running_syncs():
+            stop_action = QAction("Stop Sync", self)
+            stop_action.triggered.connect(self.stop_sync)
+            menu.addAction(stop_action)
+            menu.addSeparator()
+
         create_action = QAction("Create New Collection...", self)
         create_action.setIcon(icon_add)
         create_action.triggered.connect(self.action_create_collection)
@@ -412,16 +469,20 @@ class DatabaseTab(QWidget):
         self.sc_focus.activated.connect(self.conn_bar.uri_input.setFocus)
 
     def refresh_action(self):
-        idx = self.tabs.currentIndex()
-        if idx == 0:
+        view = self.tabs.currentWidget()
+        if view is self.data_view:
             self.data_view.reset_and_load()
-        elif idx == 1:
+        elif view is self.dashboard_view:
             self.dashboard_view.refresh_stats()
-        elif idx == 2:
+        elif view is self.ops_view:
+            self.ops_view.refresh_ops()
+        elif view is self.profiler_view:
+            self.profiler_view.refresh_profile()
+        elif view is self.agg_view:
             self.agg_view.run_pipeline()
-        elif idx == 3:
+        elif view is self.gridfs_view:
             self.gridfs_view.refresh_files()
-        elif idx == 4:
+        elif view is self.erd_view:
             self.trigger_erd_scan()
 
     def connect_mongo(self, uri):
@@ -438,6 +499,14 @@ class DatabaseTab(QWidget):
 
         self.gridfs_view.set_db(self.db)
         self.dashboard_view.set_db(self.db)
+        self.ops_view.set_db(self.db)
+        self.profiler_view.set_db(self.db)
+        self.data_view.stats_conn = conn_key(uri)
+        self.matview_timer.start(MATVIEW_CHECK_INTERVAL_MS)
+        self.check_matviews()
+        if IndexState.pending(conn_key(uri), self.db.name):
+            self.log_view.append("Rebuilding indexes left dropped by an interrupted bulk load...")
+            self.start_process("Restore deferred indexes", worker_restore_indexes, uri, focus=False)
 
         QMessageBox.information(
             self, "Connected", f"Successfully connected to database: {self.db.name}"
@@ -449,16 +518,63 @@ class DatabaseTab(QWidget):
             self.client.close()
         self.client = None
         self.db = None
+        self.matview_timer.stop()
 
         self.dashboard_view.set_db(None)
+        self.ops_view.set_db(None)
+        self.profiler_view.set_db(None)
         self.gridfs_view.set_db(None)
 
         self.coll_list.clear()
         self.data_view.table.clear()
         self.data_view.table.setRowCount(0)
-        self.erd_view.scene.clear()
+        self.data_view.relationships = {}
+        self.agg_view.stop_previews()
+        self.erd_view.reset()
         self.log_view.append("Disconnected.")
 
+    def connection_label(self):
+        """Tab description without credentials, e.g. 'shop @ mongodb://db1:27017/shop'."""
+        uri = re.sub(r"//[^@/]+@", "//", self.conn_bar.uri_input.text())
+        name = self.db.name if self.db is not None else "?"
+        return f"{name} @ {uri}"
+
+    def start_copy(self, coll_name, dst_uri, dst_name, options):
+        self.start_process(
+            f"Copy {coll_name} -> {dst_name}",
+            worker_copy_collection,
+            self.conn_bar.uri_input.text(),
+            coll_name,
+            dst_uri,
+            dst_name,
+            options,
+        )
+
+    def start_sync(self, coll_name, dst_uri, dst_name, options):
+        self.start_process(
+            f"Sync {coll_name} -> {dst_name}",
+            worker_sync_collection,
+            self.conn_bar.uri_input.text(),
+            coll_name,
+            dst_uri,
+            dst_name,
+            options,
+            # Runs until stopped, so it gets its own process instead of a pool slot
+            pooled=False,
+        )
+
+    def running_syncs(self):
+        return [
+            j for j in self.jobs.jobs_for(self)
+            if j.target is worker_sync_collection and not j.finished
+        ]
+
+    def stop_sync(self):
+        # The worker finishes its current batch and saves the resume token
+        for job in self.running_syncs():
+            self.jobs.cancel(job)
+        self.log_view.append("Stopping sync...")
+
     def safe_close(self):
         if self.client is not None:
             reply = QMessageBox.question(
@@ -469,10 +585,12 @@ class DatabaseTab(QWidget):
                 QMessageBox.No,
             )
             if reply == QMessageBox.Yes:
+                self.jobs.cancel_owner(self)
                 self.disconnect_mongo()
                 return True
             else:
                 return False
+        self.jobs.cancel_owner(self)
         return True
 
     def refresh_colls(self):
@@ -481,7 +599,7 @@ class DatabaseTab(QWidget):
         try:
             self.coll_list.clear()
             colls = sorted(self.db.list_collection_names())
-            visible = [c for c in colls if not c.startswith("system.")]
+            visible = [c for c in colls if not c.startswith(("system.", AGG_SAMPLE_PREFIX))]
             icon = self.style().standardIcon(QStyle.SP_FileIcon)
             for name in visible:
                 item = QListWidgetItem(icon, name)
@@ -502,16 +620,18 @@ class DatabaseTab(QWidget):
         dlg = ExportDialog(self)
         dlg.setWindowTitle(f"Export Collection: {coll_name}")
         if dlg.exec():
-            fmt, meta = dlg.get_settings()
+            fmt, meta, verify = dlg.get_settings()
             folder = QFileDialog.getExistingDirectory(self, "Select Folder")
             if folder:
                 self.start_process(
+                    f"Export {coll_name} ({fmt})",
                     worker_export_task,
                     self.conn_bar.uri_input.text(),
                     folder,
                     fmt,
                     meta,
                     [coll_name],
+                    verify,
                 )
 
     def trigger_bulk_export(self):
@@ -519,16 +639,18 @@ class DatabaseTab(QWidget):
             return QMessageBox.warning(self, "Error", "Connect to DB first.")
         dlg = ExportDialog(self)
         if dlg.exec():
-            fmt, meta = dlg.get_settings()
+            fmt, meta, verify = dlg.get_settings()
             folder = QFileDialog.getExistingDirectory(self, "Select Folder")
             if folder:
                 self.start_process(
+                    f"Export all ({fmt})",
                     worker_export_task,
                     self.conn_bar.uri_input.text(),
                     folder,
                     fmt,
                     meta,
                     None,
+                    verify,
                 )
 
     def trigger_import(self):
@@ -538,69 +660,138 @@ class DatabaseTab(QWidget):
             self, "Select Files", "", "Data (*.json *.bson)"
         )
         if files:
-            self.start_process(
-                worker_import_task, self.conn_bar.uri_input.text(), files
-            )
+            dlg = ImportDialog(len(files), self)
+            if dlg.exec():
+                self.start_process(
+                    f"Import {len(files)} file(s)",
+                    worker_import_task,
+                    self.conn_bar.uri_input.text(),
+                    files,
+                    dlg.get_settings(),
+                )
 
     def trigger_erd_scan(self):
         if self.db is None:
             return QMessageBox.warning(self, "Error", "Connect to DB first.")
-        self.start_process(worker_scan_schema, self.conn_bar.uri_input.text())
+        self.start_process(
+            "Schema scan", worker_scan_schema, self.conn_bar.uri_input.text(), dict(self.erd_view.fingerprints)
+        )
+
+    def trigger_fk_scan(self):
+        if not self.erd_view.nodes_map:
+            return
+        if self.db is None:
+            # Diagram loaded without a connection: names are all there is
+            return self.erd_view.auto_connect_fk()
+        self.start_process("Relationship scan", worker_detect_relationships, self.conn_bar.uri_input.text())
 
     def export_erd_image(self):
-        path, _ = QFileDialog.getSaveFileName(
-            self, "Save Image", "erd_diagram.png", "PNG Image (*.png)"
+        self.tabs.setCurrentWidget(self.erd_view)
+        self.erd_view.export_image_signal()
+
+    def start_process(self, name, target_func, *args, pooled=True, focus=True):
+        """
+        Queues a background job; it starts as soon as a slot is free.
+        Pooled jobs reuse this connection's warm worker processes.
+        """
+        pool_key = self.conn_bar.uri_input.text() if pooled else None
+        job = self.jobs.submit(
+            name, target_func, args, owner=self, label=self.connection_label(), pool_key=pool_key
         )
-        if path:
-            img = self.erd_view.get_image()
-            img.save(path)
-            QMessageBox.information(self, "Saved", f"ERD saved to {path}")
-
-    def start_process(self, target_func, *args):
-        if self.process is not None:
-            return QMessageBox.warning(self, "Busy", "Background task running.")
-        # Switch to Logs Tab (index 5)
-        self.tabs.setCurrentIndex(5)
-        self.progress.setVisible(True)
-        self.progress.setValue(0)
-        self.queue = Queue()
-        self.process = Process(target=target_func, args=args + (self.queue,))
-        self.process.start()
-        self.timer.start(100)
-
-    def check_process_queue(self):
-        if self.queue is None:
+        if focus:
+            self.tabs.setCurrentWidget(self.jobs_panel)
+        self.update_job_progress()
+        return job
+
+    # --- MATERIALIZED VIEWS ---
+    def save_matview(self, stages):
+        coll = self.agg_view.collection
+        if self.db is None or coll is None:
             return
-        while self.queue and not self.queue.empty():
-            try:
-                msg = self.queue.get_nowait()
-                msg_type, content = msg[0], msg[1]
-                if msg_type == "progress":
-                    self.log_view.append(f"PROCESSING: {content}")
-                    if len(msg) > 2:
-                        self.progress.setValue(msg[2])
-                elif msg_type == "log":
-                    self.log_view.append(f"LOG: {content}")
-                elif msg_type == "finished":
-                    self.cleanup_process()
-                    QMessageBox.information(self, "Task Complete", content)
-                    return
-                elif msg_type == "error":
-                    self.cleanup_process()
-                    QMessageBox.critical(self, "Error", content)
-                    return
-                elif msg_type == "schema_result":
-                    self.erd_view.render_schema(json.loads(content))
-                    self.tabs.setCurrentIndex(4)
-            except Exception:
-                break
-
-    def cleanup_process(self):
-        self.timer.stop()
-        if self.process and self.process.is_alive():
-            self.process.terminate()
-            self.process.join()
-        self.process = None
-        self.queue = None
-        self.progress.setVisible(False)
+        dlg = SaveViewDialog(coll.name, self)
+        if not dlg.exec():
+            return
+        try:
+            view = dlg.build_view(conn_key(self.conn_bar.uri_input.text()), self.db.name, coll.name, stages)
+        except ValueError as e:
+            QMessageBox.warning(self, "Materialized View", str(e))
+            return
+        if MatViewStore.load(view["id"]) is not None:
+            reply = QMessageBox.question(
+                self, "Materialized View", f"Replace the existing view '{view['name']}'?",
+                QMessageBox.Yes | QMessageBox.No,
+            )
+            if reply != QMessageBox.Yes:
+                return
+        MatViewStore.save(view)
+        self.log_view.append(f"Saved materialized view '{view['name']}' -> {view['target']}.")
+        self.refresh_matview(view["id"], True)
+
+    def open_matviews(self):
+        if self.db is None:
+            return
+        self.matview_dialog = MatViewDialog(conn_key(self.conn_bar.uri_input.text()), self.db.name, self)
+        self.matview_dialog.refresh_requested.connect(self.refresh_matview)
+        self.matview_dialog.exec()
+        self.matview_dialog = None
+
+    def refresh_matview(self, view_id, full=False, scheduled=False):
+        running = self.matview_jobs.get(view_id)
+        if running is not None and not running.finished:
+            if not scheduled:
+                self.log_view.append("That view is already being refreshed.")
+            return
+        view = MatViewStore.load(view_id)
+        if view is None:
+            return
+        kind = "Rebuild" if full else "Refresh"
+        job = self.start_process(
+            f"{kind} view {view['name']}", worker_refresh_matview,
+            self.conn_bar.uri_input.text(), view_id, full, focus=not scheduled,
+        )
+        # A broken view must not raise a dialog on every interval
+        job.quiet = scheduled
+        self.matview_jobs[view_id] = job
+
+    def check_matviews(self):
+        """Queues scheduled refreshes of this database's views that are due."""
+        if self.db is None:
+            return
+        for view in MatViewStore.list(conn_key(self.conn_bar.uri_input.text()), self.db.name):
+            if is_due(view):
+                self.refresh_matview(view["id"], scheduled=True)
+
+    def handle_job_message(self, job, msg):
+        if job.owner is not self:
+            return
+        msg_type, content = msg[0], msg[1]
+        if msg_type == "log":
+            self.log_view.append(f"LOG [{job.name}]: {content}")
+        elif msg_type == "finished":
+            self.log_view.append(f"DONE [{job.name}]: {content}")
+            if not job.quiet:
+                # Deferred so the modal box does not block the manager's poll loop
+                QTimer.singleShot(0, lambda: QMessageBox.information(self, "Task Complete", content))
+        elif msg_type == "error":
+            self.log_view.append(f"ERROR [{job.name}]: {content}")
+            if not job.quiet:
+                QTimer.singleShot(0, lambda: QMessageBox.critical(self, "Error", content))
+        elif msg_type == "schema_result":
+            self.erd_view.apply_schema(json_util.loads(content))
+            self.tabs.setCurrentWidget(self.erd_view)
+        elif msg_type == "matview":
+            if self.matview_dialog is not None:
+                self.matview_dialog.reload()
+        elif msg_type == "relationships":
+            edges = json_util.loads(content)
+            self.data_view.relationships = {(e["source"], e["field"]): e for e in edges}
+            self.erd_view.apply_relationships(edges)
+            self.tabs.setCurrentWidget(self.erd_view)
+
+    def update_job_progress(self):
+        """The tab's progress bar follows this tab's own running jobs."""
+        active = [j for j in self.jobs.jobs_for(self) if j.active]
+        self.progress.setVisible(bool(active))
+        if active:
+            self.progress.setValue(sum(j.last["pct"] for j in active) // len(active))
         
\ No newline at end of file
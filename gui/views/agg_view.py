@@ -1,14 +1,92 @@
-import json
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QTextEdit, 
-    QPushButton, QSplitter, QLabel, QTableWidget, QTableWidgetItem, QMessageBox,
-    QHeaderView, QComboBox
+    QPushButton, QSplitter, QLabel, QTableView, QMessageBox,
+    QHeaderView, QComboBox, QCheckBox, QSpinBox, QLineEdit
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThread, QTimer, Signal
 from PySide6.QtGui import QFont, QColor
 from bson import json_util, ObjectId
+from config.settings import AGG_PREVIEW_LIMIT, AGG_SAMPLE_SIZE, AGG_RUN_ROW_CAP
+from core.agg_preview import PrefixCache, preview_stage
+from core.agg_sample import preview_sampled, drop_samples, sampled_source
+from core.agg_runner import run_tag, stream_pipeline, kill_run
+from core.agg_profile import explain_pipeline, profile_pipeline, compare_pipelines
+from gui.dialogs.optimize_dialog import OptimizeDialog
+from gui.widgets.doc_table_model import DocumentTableModel
+from utils.pipeline_tools import parse_pipeline, stage_name, optimize_pipeline, lint_pipeline
+
+PREVIEW_DELAY_MS = 400  # pause after the last edit before a preview runs
+
+
+class BackgroundCall(QThread):
+    """Runs func(*args) off the GUI thread; the generation lets callers drop stale results."""
+    done = Signal(int, object)
+    failed = Signal(int, str)
+
+    def __init__(self, generation, func, *args, parent=None):
+        super().__init__(parent)
+        self.generation = generation
+        self.func = func
+        self.args = args
+
+    def run(self):
+        try:
+            self.done.emit(self.generation, self.func(*self.args))
+        except Exception as e:
+            self.failed.emit(self.generation, str(e))
+
+
+class StreamTask(QThread):
+    """Streams a full pipeline run; rows arrive in batches while the cursor is read."""
+    rows = Signal(int, object)
+    done = Signal(int, object)
+    failed = Signal(int, str)
+
+    def __init__(self, generation, collection, stages, cap, sample, parent=None):
+        super().__init__(parent)
+        self.generation = generation
+        self.collection = collection
+        self.stages = stages
+        self.cap = cap
+        self.sample = sample
+        self.tag = run_tag()
+        self.stop_requested = False
+
+    def stop(self):
+        self.stop_requested = True
+
+    def run(self):
+        try:
+            source, prefix, sample_info = self.collection, [], None
+            if self.sample:
+                source, prefix, sample_info = sampled_source(self.collection, *self.sample)
+            stats = stream_pipeline(
+                source, prefix + self.stages, self.cap,
+                lambda docs: self.rows.emit(self.generation, docs),
+                lambda: self.stop_requested, self.tag,
+            )
+            stats["sample"] = sample_info
+            self.done.emit(self.generation, stats)
+        except Exception as e:
+            self.failed.emit(self.generation, "Stopped." if self.stop_requested else str(e))
+
+
+def _fmt_count(n):
+    return "?" if n is None else f"{n:,}"
+
+
+def _fmt_bytes(n):
+    if n is None: return ""
+    for unit in ("B", "KB", "MB"):
+        if n < 1024: return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
 
 class AggregationView(QWidget):
+    request_save_view = Signal(object)  # parsed pipeline stages
+    request_view_manager = Signal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.collection = None
@@ -25,17 +103,91 @@ class AggregationView(QWidget):
         self.run_btn = QPushButton("Run Pipeline")
         self.run_btn.setStyleSheet("background-color: #0d6efd; color: white; font-weight: bold;")
         self.run_btn.clicked.connect(self.run_pipeline)
+
+        self.stop_btn = QPushButton("Stop")
+        self.stop_btn.setToolTip("Stop reading and kill the running server operation")
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(lambda: self.stop_run(kill=True))
+
+        self.row_cap = QSpinBox()
+        self.row_cap.setRange(0, 10000000)
+        self.row_cap.setSingleStep(1000)
+        self.row_cap.setValue(AGG_RUN_ROW_CAP)
+        self.row_cap.setSpecialValueText("No cap")
+        self.row_cap.setToolTip("Rows fetched by Run Pipeline (stage previews show the first few)")
         
         clear_btn = QPushButton("Clear All")
         clear_btn.clicked.connect(self.clear_stages)
+
+        self.profile_btn = QPushButton("Profile")
+        self.profile_btn.setToolTip("Run the pipeline with explain(executionStats) and show per-stage cost")
+        self.profile_btn.clicked.connect(self.profile_pipeline)
+
+        optimize_btn = QPushButton("Optimize")
+        optimize_btn.setToolTip("Reorder and merge stages so the pipeline can use indexes")
+        optimize_btn.clicked.connect(self.optimize_pipeline)
+
+        save_view_btn = QPushButton("Save as View")
+        save_view_btn.setToolTip("Materialize the pipeline's results into a collection with $merge")
+        save_view_btn.clicked.connect(self.save_as_view)
+
+        views_btn = QPushButton("Views")
+        views_btn.setToolTip("Materialized views of this database, their schedules and refresh history")
+        views_btn.clicked.connect(self.request_view_manager.emit)
+
+        cache_btn = QPushButton("Clear Cache")
+        cache_btn.setToolTip("Forget cached stage results and drop temporary sample collections")
+        cache_btn.clicked.connect(self.clear_cache)
         
         toolbar.addWidget(QLabel("Stage:"))
         toolbar.addWidget(self.stage_combo)
         toolbar.addWidget(add_btn)
         toolbar.addStretch()
+        toolbar.addWidget(views_btn)
+        toolbar.addWidget(save_view_btn)
+        toolbar.addWidget(cache_btn)
         toolbar.addWidget(clear_btn)
+        toolbar.addWidget(optimize_btn)
+        toolbar.addWidget(self.profile_btn)
+        toolbar.addWidget(QLabel("Rows:"))
+        toolbar.addWidget(self.row_cap)
+        toolbar.addWidget(self.stop_btn)
         toolbar.addWidget(self.run_btn)
         self.layout.addLayout(toolbar)
+
+        # --- Sampled Input ---
+        sample_bar = QHBoxLayout()
+        self.sample_check = QCheckBox("Sampled input")
+        self.sample_check.setToolTip("Run stages on a subset while iterating; results are approximate")
+        self.sample_check.toggled.connect(self.toggle_sampling)
+        self.sample_mode = QComboBox()
+        self.sample_mode.addItems(["$sample", "Range"])
+        self.sample_mode.currentIndexChanged.connect(self.sample_settings_changed)
+        self.sample_size = QSpinBox()
+        self.sample_size.setRange(100, 10000000)
+        self.sample_size.setSingleStep(1000)
+        self.sample_size.setValue(AGG_SAMPLE_SIZE)
+        self.sample_size.valueChanged.connect(self.sample_settings_changed)
+        self.sample_seed = QSpinBox()
+        self.sample_seed.setRange(1, 999999)
+        self.sample_seed.setToolTip("The same seed reuses the same cached subset")
+        self.sample_seed.valueChanged.connect(self.sample_settings_changed)
+        new_seed_btn = QPushButton("New Sample")
+        new_seed_btn.clicked.connect(lambda: self.sample_seed.setValue(self.sample_seed.value() + 1))
+        self.range_edit = QLineEdit()
+        self.range_edit.setPlaceholderText('Range filter, e.g. {"created_at": {"$gte": {"$date": "2024-01-01T00:00:00Z"}}}')
+        self.range_edit.editingFinished.connect(self.sample_settings_changed)
+
+        sample_bar.addWidget(self.sample_check)
+        sample_bar.addWidget(self.sample_mode)
+        sample_bar.addWidget(QLabel("Size:"))
+        sample_bar.addWidget(self.sample_size)
+        sample_bar.addWidget(QLabel("Seed:"))
+        sample_bar.addWidget(self.sample_seed)
+        sample_bar.addWidget(new_seed_btn)
+        sample_bar.addWidget(self.range_edit, 1)
+        self.layout.addLayout(sample_bar)
+        self.sample_settings_changed()
         
         # --- Main Splitter ---
         splitter = QSplitter(Qt.Horizontal)
@@ -47,6 +199,7 @@ class AggregationView(QWidget):
         left_layout.addWidget(QLabel("<b>Pipeline Stages</b>"))
         self.stage_list = QListWidget()
         self.stage_list.currentRowChanged.connect(self.load_stage_json)
+        self.stage_list.currentRowChanged.connect(self.schedule_preview)
         
         # Remove Stage Button
         del_stage_btn = QPushButton("Remove Selected Stage")
@@ -65,6 +218,7 @@ class AggregationView(QWidget):
         self.json_edit = QTextEdit()
         self.json_edit.setFont(QFont("Consolas", 10))
         self.json_edit.textChanged.connect(self.save_current_stage)
+        self.json_edit.textChanged.connect(self.schedule_preview)
         center_layout.addWidget(self.json_edit)
         splitter.addWidget(center_widget)
         
@@ -72,9 +226,17 @@ class AggregationView(QWidget):
         right_widget = QWidget()
         right_layout = QVBoxLayout(right_widget)
         right_layout.setContentsMargins(0,0,0,0)
-        right_layout.addWidget(QLabel("<b>Result Preview (First 20)</b>"))
-        self.result_table = QTableWidget()
+        self.preview_label = QLabel(f"<b>Result Preview (First {AGG_PREVIEW_LIMIT})</b>")
+        right_layout.addWidget(self.preview_label)
+        self.result_model = DocumentTableModel(self)
+        self.result_table = QTableView()
+        self.result_table.setModel(self.result_model)
+        self.result_table.horizontalHeader().setDefaultSectionSize(140)
         right_layout.addWidget(self.result_table)
+        self.preview_status = QLabel("Select a stage to preview its output.")
+        self.preview_status.setStyleSheet("color: gray;")
+        self.preview_status.setWordWrap(True)
+        right_layout.addWidget(self.preview_status)
         splitter.addWidget(right_widget)
         
         splitter.setSizes([200, 300, 500])
@@ -83,6 +245,21 @@ class AggregationView(QWidget):
         # Data
         self.pipeline_data = [] # List of dicts: {'type': '$match', 'json': '{}'}
 
+        # Stage previews: prefix results are cached; stale results are dropped by generation
+        self.cache = PrefixCache()
+        self.replay = True  # cleared once the server rejects $documents
+        self.preview_generation = 0
+        self.profile_generation = 0
+        self.compare_generation = 0
+        self.run_generation = 0
+        self.run_task = None
+        self.preview_tasks = set()
+        self.profile = None  # per-stage explain figures, cleared on edit
+        self.profiled_data = None
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.timeout.connect(lambda: self.preview_stage(self.stage_list.currentRow()))
+
     def set_collection(self, collection):
         self.collection = collection
         self.clear_stages()
@@ -100,6 +277,7 @@ class AggregationView(QWidget):
         
         self.pipeline_data.append({'type': stage_type, 'json': default_json})
         self.stage_list.addItem(f"{len(self.pipeline_data)}. {stage_type}")
+        self.clear_profile()
         self.stage_list.setCurrentRow(len(self.pipeline_data) - 1)
 
     def remove_stage(self):
@@ -107,6 +285,7 @@ class AggregationView(QWidget):
         if row >= 0:
             self.pipeline_data.pop(row)
             self.stage_list.takeItem(row)
+            self.clear_profile()
             if self.pipeline_data:
                 self.stage_list.setCurrentRow(max(0, row-1))
             else:
@@ -114,10 +293,10 @@ class AggregationView(QWidget):
 
     def clear_stages(self):
         self.pipeline_data = []
+        self.profile = None
         self.stage_list.clear()
         self.json_edit.clear()
-        self.result_table.clear()
-        self.result_table.setRowCount(0)
+        self.result_model.clear()
 
     def load_stage_json(self, row):
         if row >= 0 and row < len(self.pipeline_data):
@@ -129,53 +308,315 @@ class AggregationView(QWidget):
         row = self.stage_list.currentRow()
         if row >= 0:
             self.pipeline_data[row]['json'] = self.json_edit.toPlainText()
+            if self.profile is not None: self.clear_profile()
 
+    # --- FULL RUN ---
     def run_pipeline(self):
+        """Streams the whole pipeline's output, up to the row cap, into the result table."""
         if self.collection is None: return
-        
-        # Build Pipeline
-        pipeline = []
         try:
-            for item in self.pipeline_data:
-                stage_key = item['type']
-                stage_content_str = item['json']
-                
-                # Parse JSON
-                try:
-                    content = json.loads(stage_content_str, object_hook=json_util.object_hook)
-                except json.JSONDecodeError:
-                    # Allow simple integers for $limit/$skip
-                    if stage_key in ["$limit", "$skip", "$count"] and stage_content_str.strip().isdigit():
-                         content = int(stage_content_str.strip())
-                    else:
-                        raise Exception(f"Invalid JSON in {stage_key}")
-                
-                pipeline.append({stage_key: content})
-                
-            # Run
-            results = list(self.collection.aggregate(pipeline + [{"$limit": 20}])) 
-            self.render_table(results)
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Pipeline Error", str(e))
+            stages = parse_pipeline(self.pipeline_data)
+            sample = self.sample_args()
+        except ValueError as e:
+            return QMessageBox.critical(self, "Pipeline Error", str(e))
 
-    def render_table(self, docs):
-        self.result_table.clear()
-        if not docs:
-            self.result_table.setRowCount(0)
+        self.stop_run(kill=True)
+        self.preview_timer.stop()
+        self.preview_generation += 1  # a late preview must not land in the run's table
+        self.run_generation += 1
+        self.result_model.clear()
+        approx = "≈ Approximate: " if sample else ""
+        self.preview_label.setText(f"<b>{approx}Pipeline result (streaming...)</b>")
+        self.preview_status.setText("Waiting for the first batch...")
+        task = StreamTask(self.run_generation, self.collection, stages, self.row_cap.value(), sample, parent=self)
+        task.rows.connect(self.append_rows)
+        task.done.connect(self.run_finished)
+        task.failed.connect(self.run_failed)
+        task.finished.connect(lambda: self.run_task is task and self.set_running(None))
+        self.set_running(task)
+        self.start_task(task)
+
+    def set_running(self, task):
+        self.run_task = task
+        self.stop_btn.setEnabled(task is not None)
+
+    def append_rows(self, generation, docs):
+        if generation != self.run_generation: return
+        self.result_model.append_docs(docs)
+        self.preview_status.setText(f"{_fmt_count(self.result_model.rowCount())} row(s) so far...")
+
+    def run_finished(self, generation, stats):
+        if generation != self.run_generation: return
+        sample = stats.get("sample")
+        if sample:
+            label = f"<b style='color:#b35c00'>≈ Approximate: pipeline on {_fmt_count(sample['size'])} of ~{_fmt_count(sample['total'])} documents</b>"
+        else:
+            label = "<b>Pipeline result</b>"
+        self.preview_label.setText(label)
+        parts = [f"{_fmt_count(stats['rows'])} row(s) in {stats['ms']} ms"]
+        if stats["first_ms"] is not None: parts.append(f"first rows after {stats['first_ms']} ms")
+        if stats["capped"]: parts.append(f"capped at {_fmt_count(self.row_cap.value())}")
+        if stats["stopped"]: parts.append("stopped")
+        self.preview_status.setText(" · ".join(parts) + self.suggest_optimization())
+
+    def run_failed(self, generation, error):
+        if generation != self.run_generation: return
+        self.preview_label.setText("<b>Pipeline result</b>")
+        self.preview_status.setText(f"Run failed: {error}" if error != "Stopped." else "Stopped.")
+        if error != "Stopped.": QMessageBox.critical(self, "Pipeline Error", error)
+
+    def stop_run(self, kill=False):
+        """Stops the running pipeline; with `kill` its server operation is killed too."""
+        task = self.run_task
+        if task is None: return
+        task.stop()
+        self.set_running(None)
+        if kill and self.collection is not None:
+            killer = BackgroundCall(0, kill_run, self.collection.database.client, task.tag, parent=self)
+            killer.failed.connect(lambda gen, err: self.preview_status.setText(f"Stopped; could not kill the server operation: {err}"))
+            self.start_task(killer)
+        self.preview_status.setText("Stopping...")
+
+    def schedule_preview(self, *args):
+        if self.collection is not None and self.stage_list.currentRow() >= 0:
+            self.preview_timer.start(PREVIEW_DELAY_MS)
+
+    def preview_stage(self, index, explicit=False):
+        if self.collection is None or index < 0 or index >= len(self.pipeline_data): return
+        self.preview_timer.stop()
+        self.stop_run(kill=True)
+        self.run_generation += 1
+        try:
+            stages = parse_pipeline(self.pipeline_data[: index + 1])
+            sample = self.sample_args()
+        except ValueError as e:
+            # While typing, a half-written stage is not worth a dialog
+            if explicit: QMessageBox.critical(self, "Pipeline Error", str(e))
+            self.preview_status.setText(str(e))
             return
 
-        headers = []
-        for d in docs:
-            for k in d.keys():
-                if k not in headers: headers.append(k)
-        
-        self.result_table.setColumnCount(len(headers))
-        self.result_table.setHorizontalHeaderLabels(headers)
-        self.result_table.setRowCount(len(docs))
-        
-        for r, d in enumerate(docs):
-            for c, h in enumerate(headers):
-                val = d.get(h, "")
-                if isinstance(val, (dict, list)): val = json_util.dumps(val)
-                self.result_table.setItem(r, c, QTableWidgetItem(str(val)))
\ No newline at end of file
+        self.preview_generation += 1
+        args = (self.collection, stages, index, self.cache, AGG_PREVIEW_LIMIT, self.replay)
+        if sample:
+            task = BackgroundCall(self.preview_generation, preview_sampled, *args, *sample, parent=self)
+        else:
+            task = BackgroundCall(self.preview_generation, preview_stage, *args, parent=self)
+        task.done.connect(lambda gen, result: self.show_preview(gen, index, *result))
+        task.failed.connect(lambda gen, err: self.preview_failed(gen, err, explicit))
+        self.start_task(task)
+        self.preview_status.setText(f"Running stages 1-{index + 1}...")
+
+    def start_task(self, task):
+        task.finished.connect(lambda: self.preview_tasks.discard(task))
+        task.finished.connect(task.deleteLater)
+        self.preview_tasks.add(task)
+        task.start()
+
+    def show_preview(self, generation, index, docs, info):
+        if generation != self.preview_generation: return
+        self.replay = info["replay"]
+        hint = self.suggest_optimization() if index == len(self.pipeline_data) - 1 else ""
+        stage = self.pipeline_data[index]['type'] if index < len(self.pipeline_data) else ""
+        sample = info.get("sample")
+        if sample:
+            share = f" ({sample['size'] / sample['total']:.2%})" if sample["total"] else ""
+            self.preview_label.setText(
+                f"<b style='color:#b35c00'>≈ Approximate: stage {index + 1} ({stage}) on "
+                f"{_fmt_count(sample['size'])} of ~{_fmt_count(sample['total'])} documents{share}</b>"
+            )
+        else:
+            self.preview_label.setText(f"<b>Output of stage {index + 1} ({stage}) - first {AGG_PREVIEW_LIMIT}</b>")
+        source = {
+            "cache": "cached result",
+            "replay": "replayed from cached sample" if info["from_stage"] is None
+            else f"replayed from cached stage {info['from_stage'] + 1}",
+            "collection": "ran on sample" if sample else "ran on collection",
+        }[info["source"]]
+        if sample and not sample["temp"]:
+            source += " (no write access: subset is redrawn on every run)"
+        elif sample and not sample["cached"]:
+            source += " (new sample saved)"
+        self.preview_status.setText(f"{len(docs)} document(s) · {source} · {info['ms']:.0f} ms{hint}")
+        self.render_table(docs)
+
+    def preview_failed(self, generation, error, explicit):
+        if generation != self.preview_generation: return
+        self.preview_status.setText(f"Error: {error}")
+        if explicit: QMessageBox.critical(self, "Pipeline Error", error)
+
+    def stop_previews(self):
+        """Drops pending previews and waits for running ones (a running QThread must not be destroyed)."""
+        self.preview_timer.stop()
+        self.preview_generation += 1
+        self.profile_generation += 1
+        self.compare_generation += 1
+        self.run_generation += 1
+        self.stop_run()
+        self.profile_btn.setEnabled(True)
+        for task in list(self.preview_tasks):
+            task.wait()
+
+    # --- PROFILER ---
+    def profile_pipeline(self):
+        if self.collection is None or not self.pipeline_data: return
+        try:
+            stages = parse_pipeline(self.pipeline_data)
+        except ValueError as e:
+            return QMessageBox.critical(self, "Pipeline Error", str(e))
+
+        def run(collection, stages):
+            return profile_pipeline(explain_pipeline(collection, stages), stages)
+
+        self.profile_generation += 1
+        self.profiled_data = [dict(d) for d in self.pipeline_data]
+        task = BackgroundCall(self.profile_generation, run, self.collection, stages, parent=self)
+        task.done.connect(self.show_profile)
+        task.failed.connect(self.profile_failed)
+        self.profile_btn.setEnabled(False)
+        self.preview_status.setText("Profiling: the full pipeline runs under explain(executionStats)...")
+        self.start_task(task)
+
+    def show_profile(self, generation, profile):
+        if generation != self.profile_generation: return
+        self.profile_btn.setEnabled(True)
+        # The pipeline was edited while it ran
+        if self.pipeline_data != self.profiled_data:
+            return self.preview_status.setText("Pipeline changed during profiling; run Profile again.")
+        self.profile = profile
+        self.refresh_stage_labels()
+        total = sum(p["ms"] or 0 for p in profile)
+        self.preview_status.setText(f"Profiled: ~{total} ms in total. Hover a stage for details.")
+
+    def profile_failed(self, generation, error):
+        if generation != self.profile_generation: return
+        self.profile_btn.setEnabled(True)
+        self.preview_status.setText(f"Profile failed: {error}")
+        QMessageBox.critical(self, "Profile Error", error)
+
+    def clear_profile(self):
+        self.profile = None
+        self.refresh_stage_labels()
+
+    def refresh_stage_labels(self):
+        """Stage rows with their explain figures; costly stages are highlighted."""
+        for i, item_data in enumerate(self.pipeline_data):
+            item = self.stage_list.item(i)
+            if item is None: continue
+            text = f"{i + 1}. {item_data['type']}"
+            stats = self.profile[i] if self.profile else None
+            tooltip, color = "", None
+            if stats:
+                if stats["ms"] is None:
+                    text += "   (in query)"
+                else:
+                    text += f"   {stats['ms']} ms · {_fmt_count(stats.get('n_in'))} → {_fmt_count(stats.get('n_out'))}"
+                if stats.get("memory"): text += f" · {_fmt_bytes(stats['memory'])}"
+                warnings = []
+                if stats.get("collscan"): warnings.append("COLLSCAN: no index supports this stage")
+                if stats.get("memory_sort"): warnings.append("Blocking in-memory sort")
+                if stats.get("spilled"): warnings.append("Spilled to disk")
+                if warnings:
+                    text = "⚠ " + text
+                    color = QColor("#f8d7da")
+                details = [
+                    f"Time: {stats['ms']} ms" if stats["ms"] is not None else "Executed inside the initial query",
+                    f"Documents in/out: {_fmt_count(stats.get('n_in'))} / {_fmt_count(stats.get('n_out'))}",
+                ]
+                if stats.get("docs_examined") is not None:
+                    details.append(f"Docs/keys examined: {_fmt_count(stats['docs_examined'])} / {_fmt_count(stats.get('keys_examined'))}")
+                if stats.get("plan"): details.append(f"Plan: {stats['plan']}")
+                tooltip = "\n".join(warnings + details)
+            item.setText(text)
+            item.setToolTip(tooltip)
+            item.setBackground(color if color else QColor(0, 0, 0, 0))
+
+    # --- OPTIMIZER ---
+    def suggest_optimization(self):
+        """Status suffix pointing at the optimizer when it would rewrite the pipeline."""
+        try:
+            _, notes = optimize_pipeline(parse_pipeline(self.pipeline_data))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return ""
+        return f" · {len(notes)} rewrite(s) available: click Optimize" if notes else ""
+
+    def optimize_pipeline(self):
+        if not self.pipeline_data: return
+        try:
+            stages = parse_pipeline(self.pipeline_data)
+            rewritten, notes = optimize_pipeline(stages)
+        except ValueError as e:
+            return QMessageBox.critical(self, "Pipeline Error", str(e))
+        except (KeyError, TypeError, AttributeError) as e:
+            return QMessageBox.critical(self, "Pipeline Error", f"Malformed stage: {e}")
+
+        dialog = OptimizeDialog(stages, rewritten, notes, lint_pipeline(rewritten), self)
+        dialog.compare_requested.connect(lambda: self.compare_rewrite(dialog, stages, rewritten))
+        accepted = dialog.exec()
+        self.compare_generation += 1  # the dialog is gone; drop a running comparison
+        if accepted: self.apply_rewrite(rewritten)
+
+    def compare_rewrite(self, dialog, stages, rewritten):
+        if self.collection is None:
+            return dialog.show_compare_error("No collection selected.")
+        self.compare_generation += 1
+        task = BackgroundCall(self.compare_generation, compare_pipelines, self.collection, stages, rewritten, parent=self)
+        task.done.connect(lambda gen, results: gen == self.compare_generation and dialog.show_comparison(results))
+        task.failed.connect(lambda gen, err: gen == self.compare_generation and dialog.show_compare_error(err))
+        self.start_task(task)
+
+    def apply_rewrite(self, stages):
+        self.pipeline_data = [
+            {'type': stage_name(s), 'json': json_util.dumps(s[stage_name(s)], indent=2)} for s in stages
+        ]
+        self.stage_list.clear()
+        for i, item in enumerate(self.pipeline_data):
+            self.stage_list.addItem(f"{i + 1}. {item['type']}")
+        self.clear_profile()
+        self.stage_list.setCurrentRow(len(self.pipeline_data) - 1)
+
+    # --- MATERIALIZED VIEWS ---
+    def save_as_view(self):
+        if self.collection is None or not self.pipeline_data: return
+        try:
+            stages = parse_pipeline(self.pipeline_data)
+        except ValueError as e:
+            return QMessageBox.critical(self, "Pipeline Error", str(e))
+        self.request_save_view.emit(stages)
+
+    # --- SAMPLED INPUT ---
+    def sample_args(self):
+        """(size, seed, range_filter) while sampling is on, else None. Raises ValueError on a bad filter."""
+        if not self.sample_check.isChecked(): return None
+        range_filter = None
+        if self.sample_mode.currentText() == "Range":
+            text = self.range_edit.text().strip()
+            if not text: raise ValueError("Enter a range filter for Range sampling.")
+            try:
+                range_filter = json_util.loads(text)
+            except ValueError:
+                raise ValueError("Invalid JSON in range filter")
+            if not isinstance(range_filter, dict): raise ValueError("The range filter must be a JSON object.")
+        seed = 0 if range_filter else self.sample_seed.value()
+        return self.sample_size.value(), seed, range_filter
+
+    def sample_settings_changed(self, *args):
+        ranged = self.sample_mode.currentText() == "Range"
+        self.range_edit.setVisible(ranged)
+        self.sample_seed.setEnabled(not ranged)  # a range subset is the same for every seed
+        if self.sample_check.isChecked(): self.schedule_preview()
+
+    def toggle_sampling(self, checked):
+        # Switching off re-runs on the full collection
+        if self.pipeline_data: self.run_pipeline()
+
+    def clear_cache(self):
+        self.cache.clear()
+        if self.collection is None:
+            return self.preview_status.setText("Cache cleared.")
+        task = BackgroundCall(0, drop_samples, self.collection.database, parent=self)
+        task.done.connect(lambda gen, n: self.preview_status.setText(f"Cache cleared · {n} sample collection(s) dropped."))
+        task.failed.connect(lambda gen, err: self.preview_status.setText(f"Cache cleared · could not drop samples: {err}"))
+        self.start_task(task)
+
+    def render_table(self, docs):
+        self.result_model.set_docs(docs)
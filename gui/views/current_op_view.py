@@ -0,0 +1,278 @@
+import threading
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QDoubleSpinBox, QCheckBox,
+    QPushButton, QTreeWidget, QTreeWidgetItem, QAbstractItemView, QHeaderView, QMessageBox
+)
+from PySide6.QtCore import QThread, Signal, Qt
+from PySide6.QtGui import QColor
+from config.settings import CURRENTOP_POLL_SECONDS, CURRENTOP_SLOW_SECONDS
+from core.current_ops import op_filter, fetch_ops, describe_op, group_ops, kill_ops
+
+COLLSCAN_COLOR = "#f8d7da"
+
+
+def _fmt_secs(secs):
+    if secs >= 60:
+        return f"{int(secs) // 60}m {int(secs) % 60:02d}s"
+    return f"{secs:.1f}s"
+
+
+class OpPoller(QThread):
+    """
+    Lists current operations every `interval` seconds off the GUI thread.
+    Filtering and trimming happen on the server, so a poll stays small even
+    on a busy instance; `match` is swapped whole by the GUI.
+    """
+    ops = Signal(object, bool)  # rows, all users visible
+    failed = Signal(str)
+
+    def __init__(self, client, match, interval=CURRENTOP_POLL_SECONDS, parent=None):
+        super().__init__(parent)
+        self.client = client
+        self.match = match
+        self.interval = interval
+        self.paused = False
+        self.stopping = False
+        self.wake = threading.Event()
+
+    def stop(self):
+        self.stopping = True
+        self.wake.set()
+
+    def poll_now(self):
+        self.wake.set()
+
+    def run(self):
+        all_users = True
+        while not self.stopping:
+            if not self.paused:
+                try:
+                    raw, all_users = fetch_ops(self.client, self.match, all_users)
+                    if not self.stopping:
+                        self.ops.emit([describe_op(op) for op in raw], all_users)
+                except Exception as e:
+                    if not self.stopping:
+                        self.failed.emit(str(e))
+            self.wake.wait(self.interval)
+            self.wake.clear()
+
+
+class CurrentOpView(QWidget):
+    """
+    Live view of the server's running operations, grouped by namespace and
+    query shape, slowest first. Collection scans are highlighted; selected
+    operations (or whole groups) can be killed.
+    """
+
+    COLUMNS = ["Namespace / Operation", "Shape", "Ops", "Running", "Plan", "Client", "Op ID"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.client = None
+        self.poller = None
+        self.rows = []
+        layout = QVBoxLayout(self)
+
+        # --- Filters ---
+        bar = QHBoxLayout()
+        bar.addWidget(QLabel("Namespace:"))
+        self.ns_input = QLineEdit()
+        self.ns_input.setPlaceholderText("contains...")
+        self.ns_input.editingFinished.connect(self.filters_changed)
+        bar.addWidget(self.ns_input)
+        bar.addWidget(QLabel("Running ≥"))
+        self.min_secs = QDoubleSpinBox()
+        self.min_secs.setRange(0, 86400)
+        self.min_secs.setDecimals(1)
+        self.min_secs.setSuffix(" s")
+        self.min_secs.valueChanged.connect(self.filters_changed)
+        bar.addWidget(self.min_secs)
+        self.active_chk = QCheckBox("Active only")
+        self.active_chk.setChecked(True)
+        self.active_chk.toggled.connect(self.filters_changed)
+        bar.addWidget(self.active_chk)
+        self.system_chk = QCheckBox("Internal ops")
+        self.system_chk.setToolTip("Include server threads with no client (replication, TTL monitor, ...)")
+        self.system_chk.toggled.connect(self.filters_changed)
+        bar.addWidget(self.system_chk)
+        self.group_chk = QCheckBox("Group by shape")
+        self.group_chk.setChecked(True)
+        self.group_chk.toggled.connect(self.render)
+        bar.addWidget(self.group_chk)
+        bar.addStretch()
+        self.pause_btn = QPushButton("Pause")
+        self.pause_btn.setCheckable(True)
+        self.pause_btn.setToolTip("Freeze the list, e.g. while picking operations to kill")
+        self.pause_btn.toggled.connect(self.toggle_pause)
+        bar.addWidget(self.pause_btn)
+        self.kill_btn = QPushButton("Kill Selected")
+        self.kill_btn.setStyleSheet("color: red;")
+        self.kill_btn.clicked.connect(self.kill_selected)
+        bar.addWidget(self.kill_btn)
+        layout.addLayout(bar)
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(self.COLUMNS)
+        self.tree.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.tree.setUniformRowHeights(True)
+        self.tree.header().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.tree.header().setSectionResizeMode(1, QHeaderView.Stretch)
+        layout.addWidget(self.tree)
+
+        self.status_lbl = QLabel("Not connected")
+        self.status_lbl.setStyleSheet("color: gray;")
+        layout.addWidget(self.status_lbl)
+
+    def set_db(self, db):
+        self.stop_poller()
+        self.client = db.client if db is not None else None
+        self.rows = []
+        self.render()
+        if self.client is not None:
+            self.poller = OpPoller(self.client, self.current_filter(), parent=self)
+            self.poller.ops.connect(self.show_ops)
+            self.poller.failed.connect(self.poll_failed)
+            self.poller.paused = self.pause_btn.isChecked() or not self.isVisible()
+            self.poller.start()
+            self.status_lbl.setText("Waiting for data...")
+
+    def stop_poller(self):
+        if self.poller is not None:
+            self.poller.stop()
+            self.poller.wait()
+            self.poller.deleteLater()
+            self.poller = None
+
+    def current_filter(self):
+        return op_filter(
+            self.ns_input.text().strip(), self.min_secs.value(),
+            self.active_chk.isChecked(), self.system_chk.isChecked(),
+        )
+
+    def filters_changed(self, *args):
+        if self.poller is not None:
+            self.poller.match = self.current_filter()
+            self.poller.poll_now()
+
+    def refresh_ops(self):
+        if self.poller is not None:
+            self.poller.poll_now()
+
+    def toggle_pause(self, paused):
+        self.pause_btn.setText("Resume" if paused else "Pause")
+        if self.poller is not None:
+            self.poller.paused = paused or not self.isVisible()
+            self.poller.poll_now()
+
+    # --- Polling only while shown keeps an idle tab off the server ---
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.poller is not None:
+            self.poller.paused = self.pause_btn.isChecked()
+            self.poller.poll_now()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        if self.poller is not None:
+            self.poller.paused = True
+
+    def show_ops(self, rows, all_users):
+        if self.pause_btn.isChecked():
+            return  # a poll that was in flight when paused
+        self.rows = rows
+        self.render()
+        scans = sum(1 for r in rows if r["collscan"])
+        text = f"{len(rows)} operations"
+        if scans:
+            text += f" | {scans} collection scans"
+        if not all_users:
+            text += " | showing own operations only (no inprog privilege)"
+        self.status_lbl.setText(text)
+
+    def poll_failed(self, error):
+        self.status_lbl.setText(f"Error listing operations: {error}")
+
+    def render(self, *args):
+        selected = {tuple(self.item_opids(i)) for i in self.tree.selectedItems()}
+        expanded = {
+            self.tree.topLevelItem(i).data(0, Qt.UserRole + 1)
+            for i in range(self.tree.topLevelItemCount())
+            if self.tree.topLevelItem(i).isExpanded()
+        }
+        self.tree.clear()
+        if self.group_chk.isChecked():
+            for g in group_ops(self.rows):
+                key = "\n".join((g["ns"], g["command"], g["shape"]))
+                item = QTreeWidgetItem([
+                    g["ns"] or "(none)", f"{g['command']} {g['shape']}".strip(), str(len(g["ops"])),
+                    _fmt_secs(g["max_secs"]), "COLLSCAN" if g["collscan"] else "", "", "",
+                ])
+                item.setData(0, Qt.UserRole + 1, key)
+                self._style(item, g["max_secs"], g["collscan"])
+                for row in g["ops"]:
+                    item.addChild(self._op_item(row))
+                self.tree.addTopLevelItem(item)
+                item.setExpanded(key in expanded)
+        else:
+            for row in sorted(self.rows, key=lambda r: -r["secs"]):
+                self.tree.addTopLevelItem(self._op_item(row))
+        for item in self._all_items():
+            opids = self.item_opids(item)
+            if opids and tuple(opids) in selected:
+                item.setSelected(True)
+
+    def _op_item(self, row):
+        client = row["client"] + (f" ({row['app']})" if row["app"] else "")
+        item = QTreeWidgetItem([
+            row["ns"] or row["op"], f"{row['command'] or row['op']} {row['shape']}".strip(), "",
+            _fmt_secs(row["secs"]) + (" 🔒" if row["waiting"] else ""),
+            row["plan"], client, str(row["opid"]),
+        ])
+        item.setData(0, Qt.UserRole, row["opid"])
+        item.setToolTip(1, row["shape"])
+        self._style(item, row["secs"], row["collscan"])
+        return item
+
+    def _style(self, item, secs, collscan):
+        for c in range(len(self.COLUMNS)):
+            if collscan:
+                item.setBackground(c, QColor(COLLSCAN_COLOR))
+            if secs >= CURRENTOP_SLOW_SECONDS:
+                font = item.font(c)
+                font.setBold(True)
+                item.setFont(c, font)
+
+    def _all_items(self):
+        for i in range(self.tree.topLevelItemCount()):
+            top = self.tree.topLevelItem(i)
+            yield top
+            for j in range(top.childCount()):
+                yield top.child(j)
+
+    def item_opids(self, item):
+        """The operation behind an item, or all of a group's operations."""
+        opid = item.data(0, Qt.UserRole)
+        if opid is not None:
+            return [opid]
+        return [item.child(j).data(0, Qt.UserRole) for j in range(item.childCount())]
+
+    def kill_selected(self):
+        if self.client is None:
+            return
+        opids = []
+        for item in self.tree.selectedItems():
+            opids += [o for o in self.item_opids(item) if o not in opids]
+        if not opids:
+            QMessageBox.information(self, "Kill Operations", "Select operations (or a group) first.")
+            return
+        reply = QMessageBox.question(
+            self, "Kill Operations",
+            f"Kill {len(opids)} operation(s)? Their clients will receive an error.",
+            QMessageBox.Yes | QMessageBox.No,
+        )
+        if reply != QMessageBox.Yes:
+            return
+        killed, errors = kill_ops(self.client, opids)
+        if errors:
+            QMessageBox.warning(self, "Kill Operations", f"Killed {killed}; failed:\n" + "\n".join(errors))
+        self.refresh_ops()
@@ -1,3 +1,5 @@
+import threading
+import time
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -6,18 +8,39 @@ from PySide6.QtWidgets import (
     QProgressBar,
     QFrame,
     QGridLayout,
+    QComboBox,
+    QTabWidget,
     QSizePolicy, # Added QSizePolicy
 )
-from PySide6.QtCore import QTimer, Qt
+from PySide6.QtCore import QThread, Signal, Qt
 from PySide6.QtGui import QFont, QColor
+import numpy as np
+from config.settings import (
+    DASHBOARD_POLL_SECONDS, DASHBOARD_HISTORY_SECONDS, DASHBOARD_WINDOWS, WT_THRESHOLDS, WT_WORKING_SET_SECONDS
+)
+from core.server_metrics import FIELDS, MetricsTracker, health
+from gui.widgets.time_chart import TimeSeriesChart, fmt_number, fmt_bytes
+from utils.ring_buffer import RingBuffer
+
+OP_FIELDS = ["op_insert", "op_query", "op_update", "op_delete", "op_getmore", "op_command"]
+# Worked out by the view from the history, stored alongside the samples
+VIEW_FIELDS = ["wt_working_set", "wt_working_set_pct"]
+HEALTH_COLORS = {"ok": "#198754", "warning": "#fd7e14", "critical": "#dc3545", None: "#6c757d"}
+
+
+def _fmt_pct(value):
+    return f"{value:.1f}%" if value is not None else "-"
+
+
+def threshold_lines(field):
+    warning, critical = WT_THRESHOLDS[field]
+    return [(warning, HEALTH_COLORS["warning"]), (critical, HEALTH_COLORS["critical"])]
 
 
 class MetricCard(QFrame):
     def __init__(self, title, color="#0d6efd", parent=None):
         super().__init__(parent)
-        self.setStyleSheet(
-            f"background-color: white; border: 1px solid #dee2e6; border-radius: 8px; border-left: 5px solid {color};"
-        )
+        self.set_color(color)
         layout = QVBoxLayout(self)
 
         lbl_title = QLabel(title)
@@ -32,18 +55,180 @@ class MetricCard(QFrame):
     def set_value(self, val):
         self.lbl_value.setText(str(val))
 
+    def set_color(self, color):
+        self.setStyleSheet(
+            f"background-color: white; border: 1px solid #dee2e6; border-radius: 8px; border-left: 5px solid {color};"
+        )
+
+
+class StatusPoller(QThread):
+    """
+    Runs serverStatus every `interval` seconds off the GUI thread, so a slow
+    server delays samples instead of freezing the window. Rates are worked
+    out here; the GUI only appends the sample and repaints.
+    """
+    sample = Signal(object)  # {"ts", "values", "info", "restarted"}
+    failed = Signal(str)
+
+    def __init__(self, db, interval=DASHBOARD_POLL_SECONDS, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.interval = interval
+        self.stopping = False
+        self.wake = threading.Event()
+
+    def stop(self):
+        self.stopping = True
+        self.wake.set()
+
+    def poll_now(self):
+        self.wake.set()
+
+    def run(self):
+        tracker = MetricsTracker()
+        ram_mb = None
+        try:
+            # Once per connection; serverStatus does not report the machine's memory
+            ram_mb = self.db.client.admin.command("hostInfo")["system"]["memSizeMB"]
+        except Exception:
+            pass
+        while not self.stopping:
+            try:
+                status = self.db.command("serverStatus")
+                now = time.time()
+                info = {k: status.get(k) for k in ("version", "process", "host", "uptime")}
+                info["engine"] = (status.get("storageEngine") or {}).get("name")
+                info["ram_mb"] = ram_mb
+                values = tracker.update(status, now)
+                self.sample.emit({"ts": now, "values": values, "info": info, "restarted": tracker.restarted})
+            except Exception as e:
+                tracker.reset()  # the next rate must not span the outage
+                if not self.stopping:
+                    self.failed.emit(str(e))
+            self.wake.wait(self.interval)
+            self.wake.clear()
+
+
+class StoragePanel(QWidget):
+    """
+    WiredTiger health: cache fill and dirty ratios, eviction, reads into the
+    cache, ticket use, checkpoint time and a working-set estimate. Cards
+    take the colour of their threshold level; charts show the thresholds.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+
+        grid = QGridLayout()
+        self.cards = {
+            "wt_cache_fill_pct": MetricCard("Cache Fill"),
+            "wt_cache_dirty_pct": MetricCard("Dirty"),
+            "wt_read_used_pct": MetricCard("Read Tickets Free"),
+            "wt_write_used_pct": MetricCard("Write Tickets Free"),
+            "wt_checkpoint_ms": MetricCard("Last Checkpoint"),
+            "wt_evict_app": MetricCard("App-Thread Evictions / s"),
+            "wt_working_set_pct": MetricCard("Working Set (est.)"),
+        }
+        self.cards["wt_evict_app"].setToolTip(
+            "Pages evicted by application threads: eviction is falling behind and operations stall"
+        )
+        self.cards["wt_working_set_pct"].setToolTip(
+            f"Cache in use plus data read into the cache over the last {WT_WORKING_SET_SECONDS // 60} min. "
+            "A working set that fits stops reading once warm; one that does not keeps reading."
+        )
+        for i, card in enumerate(self.cards.values()):
+            grid.addWidget(card, 0, i)
+        layout.addLayout(grid)
+
+        self.note_lbl = QLabel()
+        self.note_lbl.setStyleSheet("color: gray;")
+        layout.addWidget(self.note_lbl)
+
+        charts = QGridLayout()
+        fill = TimeSeriesChart("Cache Fill (%)", [("wt_cache_fill_pct", "fill", "#0d6efd")])
+        fill.thresholds = threshold_lines("wt_cache_fill_pct")
+        dirty = TimeSeriesChart("Dirty (%)", [("wt_cache_dirty_pct", "dirty", "#fd7e14")])
+        dirty.thresholds = threshold_lines("wt_cache_dirty_pct")
+        tickets = TimeSeriesChart("Tickets In Use (%)", [
+            ("wt_read_used_pct", "read", "#0d6efd"), ("wt_write_used_pct", "write", "#fd7e14"),
+        ])
+        tickets.thresholds = threshold_lines("wt_read_used_pct")
+        checkpoint = TimeSeriesChart("Checkpoint Duration (ms)", [("wt_checkpoint_ms", "last", "#6f42c1")])
+        checkpoint.thresholds = threshold_lines("wt_checkpoint_ms")
+        working_set = TimeSeriesChart("Working Set / Cache Size (%)", [("wt_working_set_pct", "estimate", "#198754")])
+        working_set.thresholds = threshold_lines("wt_working_set_pct")
+        self.charts = [
+            fill,
+            dirty,
+            TimeSeriesChart("Eviction (pages / s)", [
+                ("wt_evict_clean", "clean", "#198754"),
+                ("wt_evict_dirty", "dirty", "#fd7e14"),
+                ("wt_evict_app", "app threads", "#dc3545"),
+            ]),
+            TimeSeriesChart("Pages Read into Cache / s", [("wt_pages_read", "pages", "#0d6efd")]),
+            tickets,
+            checkpoint,
+            working_set,
+        ]
+        for i, chart in enumerate(self.charts):
+            charts.addWidget(chart, i // 2, i % 2)
+        layout.addLayout(charts, 1)
+
+    def update_values(self, values, info):
+        for field, card in self.cards.items():
+            card.set_color(HEALTH_COLORS[health(field, values.get(field))])
+        self.cards["wt_cache_fill_pct"].set_value(_fmt_pct(values.get("wt_cache_fill_pct")))
+        self.cards["wt_cache_dirty_pct"].set_value(_fmt_pct(values.get("wt_cache_dirty_pct")))
+        for kind in ("read", "write"):
+            out, available = values.get(f"wt_{kind}_out"), values.get(f"wt_{kind}_available")
+            text = f"{int(available)} / {int(out + available)}" if out is not None and available is not None else "-"
+            self.cards[f"wt_{kind}_used_pct"].set_value(text)
+        checkpoint = values.get("wt_checkpoint_ms")
+        self.cards["wt_checkpoint_ms"].set_value(f"{checkpoint / 1000:.1f} s" if checkpoint is not None else "-")
+        self.cards["wt_evict_app"].set_value(fmt_number(values.get("wt_evict_app")))
+        self.cards["wt_working_set_pct"].set_value(fmt_bytes(values.get("wt_working_set")))
+
+        if values.get("wt_cache_max") is None:
+            self.note_lbl.setText(f"No WiredTiger statistics (storage engine: {info.get('engine') or 'n/a'})")
+            return
+        note = f"Cache size {fmt_bytes(values['wt_cache_max'])}"
+        if info.get("ram_mb"):
+            ram = info["ram_mb"] * 1024 ** 2
+            note += f" of {fmt_bytes(ram)} RAM"
+            if values.get("wt_working_set") is not None:
+                note += f" | working set ≈ {100 * values['wt_working_set'] / ram:.0f}% of RAM"
+        self.note_lbl.setText(note)
+
 
 class DashboardView(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.db = None
+        self.poller = None
+        self.history = RingBuffer(int(DASHBOARD_HISTORY_SECONDS / DASHBOARD_POLL_SECONDS), FIELDS + VIEW_FIELDS)
+        self.restarts = []  # sample times at which the server had restarted
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(20, 20, 20, 20)
 
         # --- Header ---
+        header_row = QHBoxLayout()
         header = QLabel("Server Status (Real-time)")
         header.setFont(QFont("Arial", 16, QFont.Bold))
-        self.layout.addWidget(header)
+        header_row.addWidget(header)
+        header_row.addStretch()
+        header_row.addWidget(QLabel("Window:"))
+        self.window_combo = QComboBox()
+        for label, seconds in DASHBOARD_WINDOWS:
+            self.window_combo.addItem(label, seconds)
+        self.window_combo.currentIndexChanged.connect(self.redraw_charts)
+        header_row.addWidget(self.window_combo)
+        self.layout.addLayout(header_row)
+
+        # --- Panels: overview and storage engine, fed by the same samples ---
+        self.panels = QTabWidget()
+        overview = QWidget()
+        overview_layout = QVBoxLayout(overview)
 
         # --- Row 1: Key Metrics ---
         grid = QGridLayout()
@@ -56,96 +241,173 @@ class DashboardView(QWidget):
         grid.addWidget(self.card_mem, 0, 1)
         grid.addWidget(self.card_ops, 0, 2)
         grid.addWidget(self.card_uptime, 0, 3)
-        self.layout.addLayout(grid)
+        overview_layout.addLayout(grid)
 
         # --- Row 2: Capacity Bars ---
-        self.layout.addSpacing(20)
+        overview_layout.addSpacing(10)
 
         # Connection Capacity
         self.conn_lbl = QLabel("Connection Pool Usage:")
-        self.layout.addWidget(self.conn_lbl)
+        overview_layout.addWidget(self.conn_lbl)
         self.conn_bar = QProgressBar()
         self.conn_bar.setStyleSheet(
             "QProgressBar::chunk { background-color: #198754; }"
         )
         # --- FIX: Prevent vertical expansion ---
         self.conn_bar.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        self.conn_bar.setFixedHeight(15) 
+        self.conn_bar.setFixedHeight(15)
         # ---------------------------------------
-        self.layout.addWidget(self.conn_bar)
+        overview_layout.addWidget(self.conn_bar)
 
-        self.layout.addSpacing(10)
+        # --- Row 3: History Charts ---
+        charts = QGridLayout()
+        self.charts = [
+            TimeSeriesChart("Connections", [("conn_current", "current", "#198754")]),
+            TimeSeriesChart(
+                "Memory (MB)", [("mem_resident", "resident", "#0dcaf0"), ("mem_virtual", "virtual", "#6c757d")]
+            ),
+            TimeSeriesChart("Operations / s", [
+                ("op_insert", "insert", "#198754"),
+                ("op_query", "query", "#0d6efd"),
+                ("op_update", "update", "#fd7e14"),
+                ("op_delete", "delete", "#dc3545"),
+                ("op_getmore", "getmore", "#6f42c1"),
+                ("op_command", "command", "#6c757d"),
+            ]),
+            TimeSeriesChart("Ops / s by Class (opLatencies)", [
+                ("lat_reads_ops", "reads", "#0d6efd"),
+                ("lat_writes_ops", "writes", "#fd7e14"),
+                ("lat_commands_ops", "commands", "#6c757d"),
+            ]),
+            TimeSeriesChart("Mean Latency (ms)", [
+                ("lat_reads_ms", "reads", "#0d6efd"),
+                ("lat_writes_ms", "writes", "#fd7e14"),
+                ("lat_commands_ms", "commands", "#6c757d"),
+            ]),
+            TimeSeriesChart(
+                "Network / s", [("net_in", "in", "#0d6efd"), ("net_out", "out", "#fd7e14")], fmt=fmt_bytes
+            ),
+            TimeSeriesChart("Queues & Active Clients", [
+                ("queue_readers", "queued R", "#dc3545"),
+                ("queue_writers", "queued W", "#fd7e14"),
+                ("active_readers", "active R", "#0d6efd"),
+                ("active_writers", "active W", "#198754"),
+            ]),
+        ]
+        for i, chart in enumerate(self.charts):
+            charts.addWidget(chart, i // 2, i % 2)
+        overview_layout.addLayout(charts, 1)
+
+        self.storage = StoragePanel()
+        self.panels.addTab(overview, "Overview")
+        self.panels.addTab(self.storage, "Storage Engine")
+        self.panels.currentChanged.connect(self.redraw_charts)
+        self.layout.addWidget(self.panels, 1)
 
         # Network Info
         self.info_lbl = QLabel("Waiting for data...")
         self.info_lbl.setStyleSheet("color: gray; font-family: Consolas;")
         self.layout.addWidget(self.info_lbl)
 
-        self.layout.addStretch()
-
-        # --- Timer ---
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.refresh_stats)
-
-        self.last_ops_total = 0
-        self.last_check_time = 0
-
     def set_db(self, db):
+        self.stop_poller()
         self.db = db
+        self.history.clear()
+        self.restarts = []
         # --- CRITICAL FIX: Explicit check against None ---
         if self.db is not None:
-            self.timer.start(2000)  # Refresh every 2s
-            self.refresh_stats()
-        else:
-            self.timer.stop()
+            self.poller = StatusPoller(self.db, parent=self)
+            self.poller.sample.connect(self.add_sample)
+            self.poller.failed.connect(self.poll_failed)
+            self.poller.start()
+        self.redraw_charts()
+
+    def stop_poller(self):
+        if self.poller is not None:
+            self.poller.stop()
+            self.poller.wait()  # a running QThread must not be destroyed
+            self.poller.deleteLater()
+            self.poller = None
 
     def refresh_stats(self):
-        # --- CRITICAL FIX: Explicit check against None ---
-        if self.db is None:
-            return
+        """Takes a sample now instead of at the next interval."""
+        if self.poller is not None:
+            self.poller.poll_now()
 
-        try:
-            status = self.db.command("serverStatus")
-
-            # 1. Connections
-            conns = status.get("connections", {})
-            curr = conns.get("current", 0)
-            avail = conns.get("available", 1)
-            total = curr + avail
-            self.card_conns.set_value(curr)
-            self.conn_bar.setMaximum(total)
-            self.conn_bar.setValue(curr)
-            self.conn_lbl.setText(f"Connection Pool: {curr} / {total}")
-
-            # 2. Memory
-            mem = status.get("mem", {})
-            resident = mem.get("resident", 0)
-            self.card_mem.set_value(resident)
-
-            # 3. Ops Per Sec (Rough Calc)
-            opcounters = status.get("opcounters", {})
-            total_ops = sum(opcounters.values())
-
-            if self.last_ops_total > 0:
-                diff = total_ops - self.last_ops_total
-                self.card_ops.set_value(int(diff / 2))
-
-            self.last_ops_total = total_ops
-
-            # 4. Uptime
-            uptime = status.get("uptime", 0)
-            hours = int(uptime / 3600)
-            self.card_uptime.set_value(hours)
-
-            # 5. Info
-            version = status.get("version", "Unknown")
-            process = status.get("process", "mongod")
-            host = status.get("host", "Unknown")
-            self.info_lbl.setText(
-                f"Process: {process} | Version: {version} | Host: {host}"
-            )
-
-        except Exception as e:
-            self.info_lbl.setText(f"Error fetching stats: {e}")
-            self.timer.stop()
-            
\ No newline at end of file
+    def working_set(self, ts, values):
+        """
+        Rough working-set size: what the cache holds now plus what had to be
+        read into it over the last WT_WORKING_SET_SECONDS.
+        """
+        cache, size = values.get("wt_cache_bytes"), values.get("wt_cache_max")
+        if cache is None or not size:
+            return {}
+        t, past = self.history.window(WT_WORKING_SET_SECONDS, ["wt_bytes_read"], now=ts)
+        current = values.get("wt_bytes_read")
+        t = np.append(t, ts)
+        rates = np.append(past["wt_bytes_read"], np.nan if current is None else current)
+        # Each rate covers the interval since the sample before it
+        read = float(np.nansum(rates * np.diff(t, prepend=t[0])))
+        return {"wt_working_set": cache + read, "wt_working_set_pct": 100 * (cache + read) / size}
+
+    def add_sample(self, sample):
+        values, info = sample["values"], sample["info"]
+        values = {**values, **self.working_set(sample["ts"], values)}
+        self.history.append(sample["ts"], values)
+        if sample["restarted"]:
+            self.restarts.append(sample["ts"])
+
+        # 1. Connections
+        curr = int(values["conn_current"] or 0)
+        total = curr + int(values["conn_available"] or 0)
+        self.card_conns.set_value(curr)
+        self.conn_bar.setMaximum(max(total, 1))
+        self.conn_bar.setValue(curr)
+        self.conn_lbl.setText(f"Connection Pool: {curr} / {total}")
+
+        # 2. Memory
+        self.card_mem.set_value(int(values["mem_resident"] or 0))
+
+        # 3. Ops Per Sec (over the server's own interval; none across a restart)
+        rates = [values.get(f) for f in OP_FIELDS]
+        if any(r is not None for r in rates):
+            self.card_ops.set_value(fmt_number(sum(r or 0 for r in rates)))
+        else:
+            self.card_ops.set_value("-")
+
+        # 4. Uptime
+        self.card_uptime.set_value(int((info.get("uptime") or 0) / 3600))
+
+        # 5. Storage Engine
+        self.storage.update_values(values, info)
+
+        # 6. Info
+        restart = ""
+        if self.restarts:
+            restart = f" | Restart detected at {time.strftime('%H:%M:%S', time.localtime(self.restarts[-1]))}"
+        self.info_lbl.setText(
+            f"Process: {info.get('process') or 'mongod'} | Version: {info.get('version') or 'Unknown'} | "
+            f"Host: {info.get('host') or 'Unknown'} | {len(self.history)} samples{restart}"
+        )
+        self.redraw_charts()
+
+    def poll_failed(self, error):
+        self.info_lbl.setText(f"Error fetching stats: {error} (retrying every {DASHBOARD_POLL_SECONDS}s)")
+
+    def redraw_charts(self, *args):
+        if not self.isVisible() and len(self.history):
+            return  # hidden charts are brought up to date on showEvent
+        window = self.window_combo.currentData()
+        now = time.time()
+        # Only the shown panel is drawn; switching panels redraws
+        charts = self.charts if self.panels.currentWidget() is not self.storage else self.storage.charts
+        # One window read for all charts, decimated to about one point per pixel
+        width = max(chart.plot_width() for chart in charts)
+        t, values = self.history.window(window, max_points=2 * width, now=now)
+        markers = [ts for ts in self.restarts if ts >= now - window]
+        for chart in charts:
+            chart.set_data(t, {f: values[f] for f in chart.fields()}, window, now, markers)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.redraw_charts()
@@ -33,6 +33,7 @@ from bson import json_util, ObjectId
 from gui.dialogs.explain_dialog import ExplainDialog
 from PySide6.QtWidgets import QInputDialog
 from utils.query_manager import QueryManager
+from core.schema_stats import CollectionStats, StatsStore
 
 
 # --- 1. SIMPLE SEARCH WIDGET (UPDATED) ---
@@ -236,6 +237,8 @@ class DataView(QWidget):
         self.active_filters = {}
         self.current_headers = []
         self.schema_keys = set()
+        self.stats_conn = None  # schema stats store key, set by the tab on connect
+        self.relationships = {}  # (collection, field) -> verified edge, set by the tab
 
         # Search Bar
         search_bar = QHBoxLayout()
@@ -552,30 +555,40 @@ class DataView(QWidget):
         if not item:
             return
         val = item.text().strip('"').strip("'")
-        is_fk = header.lower().endswith("id") and header != "_id"
+        edge = self.relationships.get((self.collection.name, header))
+        is_fk = edge is not None or (header.lower().endswith("id") and header != "_id")
 
         if is_fk:
             base_name = re.sub(r"_?id$", "", header, flags=re.IGNORECASE)
-            guesses = [base_name + "s", base_name + "es", base_name]
-            db = self.collection.database
             target_coll = None
-            existing_colls = db.list_collection_names()
-            for g in guesses:
-                match = next(
-                    (c for c in existing_colls if c.lower() == g.lower()), None
-                )
-                if match:
-                    target_coll = match
-                    break
+            if edge is not None:
+                # Verified by the ERD relationship scan
+                target_coll = edge["target"]
+            else:
+                guesses = [base_name + "s", base_name + "es", base_name]
+                db = self.collection.database
+                existing_colls = db.list_collection_names()
+                for g in guesses:
+                    match = next(
+                        (c for c in existing_colls if c.lower() == g.lower()), None
+                    )
+                    if match:
+                        target_coll = match
+                        break
 
             if target_coll:
                 query_val = val
                 if ObjectId.is_valid(val):
                     query_val = ObjectId(val)
+                elif edge is not None and val.lstrip("-").isdigit():
+                    query_val = int(val)
+                detail = ""
+                if edge is not None:
+                    detail = f" ({edge['confidence']:.0%} of sampled values match, {edge['cardinality']})"
                 reply = QMessageBox.question(
                     self,
                     "Navigate",
-                    f"Found potential link to '{target_coll}'.\nGo to document {val}?",
+                    f"Found link to '{target_coll}'{detail}.\nGo to document {val}?",
                     QMessageBox.Yes | QMessageBox.No,
                 )
                 if reply == QMessageBox.Yes:
@@ -683,11 +696,15 @@ class DataView(QWidget):
         if self.collection is None:
             return
         try:
-            pipeline = [{"$sample": {"size": 20}}]
-            samples = list(self.collection.aggregate(pipeline))
-            self.schema_keys = set()
-            for doc in samples:
-                self.schema_keys.update(doc.keys())
+            db_name, name = self.collection.database.name, self.collection.name
+            stats = StatsStore.load(self.stats_conn, db_name, name) if self.stats_conn else None
+            # Shared stats from the ERD scan / exports are reused while fresh
+            if stats is None or not stats.is_fresh():
+                samples = self.collection.aggregate([{"$sample": {"size": 20}}])
+                stats = CollectionStats().add_documents(samples)
+                if self.stats_conn:
+                    stats = StatsStore.save(self.stats_conn, db_name, name, stats)
+            self.schema_keys = set(stats.query_paths())
             self.search_widget.set_fields(list(self.schema_keys))
         except Exception as e:
             print(f"Schema scan warning: {e}")
@@ -0,0 +1,174 @@
+import math
+import os
+from PySide6.QtWidgets import QProgressDialog, QApplication
+from PySide6.QtGui import QPainter, QImage, QColor, QPdfWriter, QPageSize, QPageLayout
+from PySide6.QtSvg import QSvgGenerator
+from PySide6.QtCore import Qt, QRectF, QMarginsF, QSize
+from utils.png_writer import PngWriter
+
+# --- TILING ---
+TILE_SIZE = 1024  # pixels per tile edge
+SVG_REGION = 4000  # scene units per split SVG file edge
+SCREEN_DPI = 96
+MAX_PNG_EDGE = 2 ** 31 - 1  # PNG header limit
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class ExportProgress:
+    """Modal progress dialog shared by the exporters; raises on Cancel."""
+
+    def __init__(self, parent, title, total):
+        self.dialog = QProgressDialog(title, "Cancel", 0, max(total, 1), parent)
+        self.dialog.setWindowModality(Qt.WindowModal)
+        self.dialog.setMinimumDuration(300)
+        self.done = 0
+
+    def step(self, label):
+        self.done += 1
+        self.dialog.setLabelText(label)
+        self.dialog.setValue(self.done)
+        QApplication.processEvents()
+        if self.dialog.wasCanceled():
+            raise ExportCancelled()
+
+    def close(self):
+        self.dialog.close()
+
+
+def _render(scene, painter, target, source):
+    scene.render(painter, target, source, Qt.IgnoreAspectRatio)
+
+
+def export_png_tiled(scene, path, scale=1.0, parent=None):
+    """
+    Renders the scene in TILE_SIZE tiles, one horizontal band at a time,
+    and streams the band's scanlines into a PNG. Memory is bounded by one
+    band (width x TILE_SIZE pixels), whatever the diagram's height.
+    """
+    rect = scene.sceneRect()
+    width = max(1, int(math.ceil(rect.width() * scale)))
+    height = max(1, int(math.ceil(rect.height() * scale)))
+    if max(width, height) > MAX_PNG_EDGE:
+        raise ValueError("Diagram too large for PNG at this scale; use PDF.")
+
+    cols = math.ceil(width / TILE_SIZE)
+    bands = math.ceil(height / TILE_SIZE)
+    progress = ExportProgress(parent, "Rendering PNG tiles...", cols * bands)
+    writer = PngWriter(path, width, height)
+    ok = False
+    try:
+        for band in range(bands):
+            y0 = band * TILE_SIZE
+            band_h = min(TILE_SIZE, height - y0)
+            tiles = []
+            for col in range(cols):
+                x0 = col * TILE_SIZE
+                tile_w = min(TILE_SIZE, width - x0)
+                tile = QImage(tile_w, band_h, QImage.Format_RGB888)
+                tile.fill(QColor("#ffffff"))
+                painter = QPainter(tile)
+                painter.setRenderHint(QPainter.Antialiasing)
+                painter.setRenderHint(QPainter.TextAntialiasing)
+                source = QRectF(
+                    rect.left() + x0 / scale, rect.top() + y0 / scale, tile_w / scale, band_h / scale
+                )
+                _render(scene, painter, QRectF(0, 0, tile_w, band_h), source)
+                painter.end()
+                tiles.append(tile)
+                progress.step(f"Tile {band * cols + col + 1} of {cols * bands}")
+
+            # Scanlines are padded to 4 bytes; keep only the pixels
+            views = [(t.constBits(), t.bytesPerLine(), t.width() * 3) for t in tiles]
+            for y in range(band_h):
+                writer.write_row(b"".join(bytes(bits[y * bpl : y * bpl + n]) for bits, bpl, n in views))
+        writer.close()
+        ok = True
+    finally:
+        progress.close()
+        if not ok:
+            writer.abort()
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def export_pdf_pages(scene, path, scale=1.0, dpi=300, page=QPageSize.A4, parent=None):
+    """
+    Splits the scene over as many landscape pages as needed at `scale`
+    (1.0 = one scene unit per screen pixel). QPdfWriter emits each page as
+    it is drawn, so the page count does not raise memory use.
+    """
+    rect = scene.sceneRect()
+    writer = QPdfWriter(path)
+    writer.setResolution(dpi)
+    writer.setPageSize(QPageSize(page))
+    writer.setPageOrientation(QPageLayout.Landscape)
+    writer.setPageMargins(QMarginsF(10, 10, 10, 10))
+    writer.setTitle(os.path.splitext(os.path.basename(path))[0])
+
+    paint_rect = writer.pageLayout().paintRectPixels(dpi)
+    # Scene units covered by one page
+    unit = dpi / SCREEN_DPI * scale
+    page_w = paint_rect.width() / unit
+    page_h = paint_rect.height() / unit
+    cols = max(1, math.ceil(rect.width() / page_w))
+    rows = max(1, math.ceil(rect.height() / page_h))
+
+    progress = ExportProgress(parent, "Rendering PDF pages...", cols * rows)
+    painter = QPainter(writer)
+    ok = False
+    try:
+        for row in range(rows):
+            for col in range(cols):
+                if row or col:
+                    writer.newPage()
+                source = QRectF(rect.left() + col * page_w, rect.top() + row * page_h, page_w, page_h)
+                _render(scene, painter, QRectF(0, 0, paint_rect.width(), paint_rect.height()), source)
+                progress.step(f"Page {row * cols + col + 1} of {cols * rows}")
+        ok = True
+    finally:
+        painter.end()
+        progress.close()
+        if not ok and os.path.exists(path):
+            os.remove(path)
+    return cols * rows
+
+
+def export_svg_regions(scene, path, parent=None):
+    """
+    One SVG per SVG_REGION square of the scene ("erd_r1_c2.svg"), or a
+    single file when the diagram fits in one region. Returns the paths.
+    """
+    rect = scene.sceneRect()
+    cols = max(1, math.ceil(rect.width() / SVG_REGION))
+    rows = max(1, math.ceil(rect.height() / SVG_REGION))
+    base, ext = os.path.splitext(path)
+
+    progress = ExportProgress(parent, "Writing SVG regions...", cols * rows)
+    written = []
+    try:
+        for row in range(rows):
+            for col in range(cols):
+                source = QRectF(
+                    rect.left() + col * SVG_REGION,
+                    rect.top() + row * SVG_REGION,
+                    min(SVG_REGION, rect.width() - col * SVG_REGION),
+                    min(SVG_REGION, rect.height() - row * SVG_REGION),
+                )
+                target = path if cols * rows == 1 else f"{base}_r{row + 1}_c{col + 1}{ext or '.svg'}"
+                generator = QSvgGenerator()
+                generator.setFileName(target)
+                generator.setSize(QSize(int(source.width()), int(source.height())))
+                generator.setViewBox(QRectF(0, 0, source.width(), source.height()))
+
+                painter = QPainter()
+                painter.begin(generator)
+                _render(scene, painter, QRectF(0, 0, source.width(), source.height()), source)
+                painter.end()
+                written.append(target)
+                progress.step(f"Region {len(written)} of {cols * rows}")
+    finally:
+        progress.close()
+    return written
@@ -1,5 +1,6 @@
 import math
 import json
+import os
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -12,7 +13,7 @@ from PySide6.QtWidgets import (
     QGraphicsRectItem,
     QFileDialog,
     QMessageBox,
-    QGraphicsDropShadowEffect,
+    QInputDialog,
 )
 from PySide6.QtGui import (
     QPainter,
@@ -25,8 +26,24 @@ from PySide6.QtGui import (
     QTransform,
     QWheelEvent,
 )
-from PySide6.QtSvg import QSvgGenerator
-from PySide6.QtCore import Qt, QRectF, QPointF, Signal, QSize, QLineF
+from PySide6.QtCore import (
+    Qt,
+    QRectF,
+    QPointF,
+    Signal,
+    QLineF,
+    QTimer,
+    QThread,
+    QVariantAnimation,
+    QEasingCurve,
+)
+from utils.graph_layout import layered_layout
+from gui.views.erd_export import (
+    ExportCancelled,
+    export_png_tiled,
+    export_pdf_pages,
+    export_svg_regions,
+)
 
 # --- CONSTANTS ---
 NODE_WIDTH = 250
@@ -37,6 +54,24 @@ GRID_SIZE = 40
 GAP_X = 100
 GAP_Y = 60
 
+# --- LEVEL OF DETAIL ---
+# Below these zoom levels nodes drop their field rows, then their text
+LOD_FIELDS = 0.5
+LOD_TEXT = 0.2
+SHADOW_OFFSET = 4
+SHADOW_COLOR = QColor(0, 0, 0, 28)
+
+# --- EXPORT ---
+# PNG pixels per scene unit (PDF and SVG are vector)
+EXPORT_SCALES = {
+    "1x (screen)": 1.0,
+    "2x": 2.0,
+    "3x (print, ~300 dpi)": 3.125,
+}
+
+# --- AUTO LAYOUT ---
+LAYOUT_ANIMATION_MS = 450
+
 HEADER_COLORS = [
     "#2196F3",
     "#009688",
@@ -51,24 +86,71 @@ HEADER_COLORS = [
 ]
 
 
+def field_label(info, elements=None):
+    """
+    Display text for one scanned field: the dominant types, '[elem]' for
+    arrays (from the '<path>[]' entry) and the presence ratio when the field
+    is missing from some documents. Plain strings pass through unchanged.
+    """
+    if not isinstance(info, dict):
+        return str(info)
+    types = [t for t in info.get("types", {}) if t != "array"]
+    if info.get("array"):
+        elem_types = list((elements or {}).get("types", {}))[:2]
+        types.insert(0, f"[{'|'.join(elem_types) or '?'}]")
+    label = "|".join(types[:2]) + ("|..." if len(types) > 2 else "")
+    presence = info.get("presence", 1)
+    if presence < 1:
+        label += f" {presence:.0%}"
+    return label
+
+
+def flatten_schema(schema_data):
+    """Turns scan results into {collection: {path: label}} for the nodes."""
+    tables = {}
+    for name, entry in schema_data.items():
+        if isinstance(entry, dict) and "fields" in entry:
+            fields = entry["fields"]
+            # Element entries ("tags[]") are folded into their array's label
+            tables[name] = {
+                path: field_label(info, fields.get(path + "[]"))
+                for path, info in fields.items()
+                if not path.endswith("[]")
+            }
+        else:
+            tables[name] = entry
+    return tables
+
+
 class RelationshipLine(QGraphicsPathItem):
     """
     Orthogonal (Manhattan Style) connection line.
-    Now stores the Foreign Key field name.
+    Stores the Foreign Key field name and, for verified links, the share of
+    sampled values found in the target and the estimated cardinality.
     """
 
-    def __init__(self, start_item, end_item, fk_field=None, parent=None):
+    def __init__(self, start_item, end_item, fk_field=None, confidence=None, cardinality=None, parent=None):
         super().__init__(parent)
         self.start_item = start_item
         self.end_item = end_item
         self.fk_field = fk_field  # Store the field name (e.g., 'user_id')
+        self.confidence = confidence
+        self.cardinality = cardinality
         self.setZValue(-1)
 
-        # Style: Dark Gray, Sharp Corners
+        # Style: Dark Gray, Sharp Corners; dashed when some values did not resolve
         pen = QPen(QColor("#546E7A"), 1.5)
         pen.setJoinStyle(Qt.RoundJoin)
+        if confidence is not None and confidence < 1.0:
+            pen.setStyle(Qt.DashLine)
         self.setPen(pen)
 
+        if confidence is not None:
+            self.setToolTip(
+                f"{start_item.name}.{fk_field} → {end_item.name}\n"
+                f"{confidence:.0%} of sampled values found · {cardinality or '?'}"
+            )
+
         self.arrow_head = QPolygonF()
         self.update_position()
 
@@ -125,13 +207,37 @@ class RelationshipLine(QGraphicsPathItem):
 
     def paint(self, painter, option, widget=None):
         super().paint(painter, option, widget)
+        # Arrow heads are sub-pixel when zoomed out
+        if option.levelOfDetailFromTransform(painter.worldTransform()) < LOD_TEXT:
+            return
         painter.setBrush(QBrush(QColor("#546E7A")))
         painter.setPen(Qt.NoPen)
         painter.drawPolygon(self.arrow_head)
 
 
 class TableItem(QGraphicsRectItem):
-    """ERD Node"""
+    """
+    ERD Node. Painted at three levels of detail and cached in device
+    coordinates, so panning a large diagram only blits pixmaps.
+    """
+
+    _fonts = None
+
+    @classmethod
+    def fonts(cls):
+        # Shared by every node; created on first paint (needs a QApplication)
+        if cls._fonts is None:
+            font_type = QFont("Consolas", 9)
+            font_type.setItalic(True)
+            font_id = QFont("Consolas", 10)
+            font_id.setBold(True)
+            cls._fonts = {
+                "header": QFont("Segoe UI", 11, QFont.Bold),
+                "field": QFont("Consolas", 10),
+                "id": font_id,
+                "type": font_type,
+            }
+        return cls._fonts
 
     def __init__(self, name, fields, x, y, color_index=0):
         field_count = len(fields) if fields else 1
@@ -149,29 +255,58 @@ class TableItem(QGraphicsRectItem):
         self.bg_color = QColor("#ffffff")
         self.border_color = QColor("#dce1e6")
 
-        self.font_header = QFont("Segoe UI", 11, QFont.Bold)
-        self.font_field = QFont("Consolas", 10)
-        self.font_type = QFont("Consolas", 9)
-        self.font_type.setItalic(True)
-
         self.setFlags(
             QGraphicsItem.ItemIsMovable
             | QGraphicsItem.ItemIsSelectable
             | QGraphicsItem.ItemSendsGeometryChanges
         )
-        self.setAcceptHoverEvents(True)
-        self.setGraphicsEffect(
-            QGraphicsDropShadowEffect(
-                blurRadius=15, xOffset=0, yOffset=4, color=QColor(0, 0, 0, 30)
-            )
-        )
+        # A painted offset shadow replaces QGraphicsDropShadowEffect, which
+        # re-blurs offscreen on every repaint and defeats item caching
+        self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+
+    def set_fields(self, fields):
+        """Replaces the field rows after a rescan; position and links stay."""
+        self.fields = fields if fields else {}
+        field_count = len(fields) if fields else 1
+        self.setRect(0, 0, NODE_WIDTH, HEADER_HEIGHT + (field_count * ROW_HEIGHT) + PADDING)
+        self.update()
+
+    def field_paths(self):
+        """Field names plus their dot-notation forms ("items[].sku" -> "items.sku")."""
+        return set(self.fields) | {f.replace("[]", "") for f in self.fields}
+
+    def boundingRect(self):
+        return self.rect().adjusted(-1, -1, 1, SHADOW_OFFSET + 1)
 
     def paint(self, painter, option, widget=None):
         r = self.rect()
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        fonts = self.fonts()
+
+        if lod < LOD_FIELDS:
+            # Header-only node: one filled box, the name while still legible
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(self.header_color)
+            painter.drawRect(r)
+            if lod >= LOD_TEXT:
+                painter.setPen(Qt.white)
+                painter.setFont(fonts["header"])
+                painter.drawText(r, Qt.AlignCenter, self.name)
+            if self.isSelected():
+                painter.setPen(QPen(Qt.black, 2 / max(lod, 0.05)))
+                painter.setBrush(Qt.NoBrush)
+                painter.drawRect(r)
+            return
+
+        # Shadow
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(SHADOW_COLOR)
+        painter.drawRoundedRect(r.translated(0, SHADOW_OFFSET), 8, 8)
 
         # Box
         painter.setBrush(self.bg_color)
-        painter.setPen(QPen(self.border_color, 1.5))
+        border = self.header_color if self.isSelected() else self.border_color
+        painter.setPen(QPen(border, 1.5))
         painter.drawRoundedRect(r, 8, 8)
 
         # Header
@@ -185,7 +320,7 @@ class TableItem(QGraphicsRectItem):
 
         # Text
         painter.setPen(Qt.white)
-        painter.setFont(self.font_header)
+        painter.setFont(fonts["header"])
         painter.drawText(
             QRectF(r.x() + PADDING, r.y(), r.width() - 2 * PADDING, HEADER_HEIGHT),
             Qt.AlignLeft | Qt.AlignVCenter,
@@ -196,7 +331,7 @@ class TableItem(QGraphicsRectItem):
         y = r.y() + HEADER_HEIGHT + 4
         if not self.fields:
             painter.setPen(QColor("#90A4AE"))
-            painter.setFont(self.font_type)
+            painter.setFont(fonts["type"])
             painter.drawText(
                 QRectF(r.x(), y, r.width(), ROW_HEIGHT), Qt.AlignCenter, "(No Fields)"
             )
@@ -209,17 +344,15 @@ class TableItem(QGraphicsRectItem):
                 is_id = field == "_id" or field.endswith("_id") or field.endswith("Id")
                 if is_id:
                     painter.setPen(self.header_color.darker(110))
-                    f = QFont(self.font_field)
-                    f.setBold(True)
-                    painter.setFont(f)
+                    painter.setFont(fonts["id"])
                 else:
                     painter.setPen(QColor("#37474F"))
-                    painter.setFont(self.font_field)
+                    painter.setFont(fonts["field"])
 
                 painter.drawText(row_rect, Qt.AlignLeft | Qt.AlignVCenter, str(field))
 
                 painter.setPen(QColor("#90A4AE"))
-                painter.setFont(self.font_type)
+                painter.setFont(fonts["type"])
                 painter.drawText(row_rect, Qt.AlignRight | Qt.AlignVCenter, str(f_type))
                 y += ROW_HEIGHT
 
@@ -228,15 +361,46 @@ class TableItem(QGraphicsRectItem):
             self.lines.append(line)
 
     def itemChange(self, change, value):
-        if change == QGraphicsItem.ItemPositionChange:
-            for line in self.lines:
-                line.update_position()
+        if change == QGraphicsItem.ItemPositionHasChanged and self.lines:
+            scene = self.scene()
+            if isinstance(scene, DiagramScene):
+                scene.mark_lines_dirty(self.lines)
+            else:
+                for line in self.lines:
+                    line.update_position()
         return super().itemChange(change, value)
 
 
 class DiagramScene(QGraphicsScene):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Edges touched during a drag are re-routed once per event-loop pass,
+        # not once per node per mouse move (multi-selection drags move many)
+        self._dirty_lines = set()
+        self._flush_timer = QTimer()
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self.flush_lines)
+
+    def mark_lines_dirty(self, lines):
+        self._dirty_lines.update(lines)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start(0)
+
+    def flush_lines(self):
+        lines, self._dirty_lines = self._dirty_lines, set()
+        for line in lines:
+            if line.scene() is self:
+                line.update_position()
+
+    def clear(self):
+        self._dirty_lines = set()
+        super().clear()
+
     def drawBackground(self, painter, rect):
         painter.fillRect(rect, QColor("#F5F7FA"))
+        # The dot grid is invisible when zoomed out but would cost a point per cell
+        if painter.worldTransform().m11() < LOD_FIELDS:
+            return
 
         left = int(rect.left()) - (int(rect.left()) % GRID_SIZE)
         top = int(rect.top()) - (int(rect.top()) % GRID_SIZE)
@@ -255,6 +419,10 @@ class InteractiveGraphicsView(QGraphicsView):
         super().__init__(scene)
         self.parent_erd = parent_erd
         self.setRenderHint(QPainter.Antialiasing)
+        self.setOptimizationFlags(
+            QGraphicsView.DontSavePainterState | QGraphicsView.DontAdjustForAntialiasing
+        )
+        self.setViewportUpdateMode(QGraphicsView.SmartViewportUpdate)
         self.setDragMode(QGraphicsView.ScrollHandDrag)
         self.viewport().setCursor(Qt.ArrowCursor)
         self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
@@ -298,8 +466,28 @@ class InteractiveGraphicsView(QGraphicsView):
         super().mouseReleaseEvent(event)
 
 
+class LayoutTask(QThread):
+    """Computes a layered layout off the GUI thread from plain node sizes and edges."""
+
+    done = Signal(int, object)
+
+    def __init__(self, generation, sizes, edges, parent=None):
+        super().__init__(parent)
+        self.generation = generation
+        self.sizes = sizes
+        self.edges = edges
+
+    def run(self):
+        try:
+            positions = layered_layout(self.sizes, self.edges, GAP_X, GAP_Y)
+        except Exception:
+            positions = None
+        self.done.emit(self.generation, positions)
+
+
 class ErdView(QWidget):
     request_schema_scan = Signal()
+    request_fk_scan = Signal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -313,15 +501,19 @@ class ErdView(QWidget):
 
         self.btn_auto_link = QPushButton("🔗 Auto-Map (FK)")
         self.btn_auto_link.setToolTip(
-            "Auto-connect fields and Separate Linked vs Isolated tables"
+            "Detect references by checking sampled values against each collection's _id"
         )
-        self.btn_auto_link.clicked.connect(self.auto_connect_fk)
+        self.btn_auto_link.clicked.connect(self.request_fk_scan.emit)
+
+        self.btn_layout = QPushButton("📐 Auto Layout")
+        self.btn_layout.setToolTip("Arrange linked tables in layers, isolated ones on the right")
+        self.btn_layout.clicked.connect(self.reorganize_layout)
 
         self.btn_mode_link = QPushButton("✏️ Draw Connection")
         self.btn_mode_link.setCheckable(True)
         self.btn_mode_link.clicked.connect(self.toggle_link_mode)
 
-        self.btn_export = QPushButton("📷 Export SVG")
+        self.btn_export = QPushButton("📷 Export Image")
         self.btn_export.clicked.connect(self.export_image_signal)
 
         self.btn_export_json = QPushButton("📄 Export JSON")
@@ -334,6 +526,7 @@ class ErdView(QWidget):
 
         toolbar.addWidget(self.btn_generate)
         toolbar.addWidget(self.btn_auto_link)
+        toolbar.addWidget(self.btn_layout)
         toolbar.addWidget(self.btn_mode_link)
         toolbar.addWidget(self.btn_export)
         toolbar.addWidget(self.btn_export_json)
@@ -351,6 +544,13 @@ class ErdView(QWidget):
         self.temp_line = None
         self.start_node = None
         self.nodes_map = {}
+        # Collection fingerprints of the last scan; unchanged ones are not rescanned
+        self.fingerprints = {}
+
+        # Background layout: results from an outdated generation are dropped
+        self.layout_generation = 0
+        self.layout_tasks = set()
+        self.layout_anim = None
 
     def emit_scan_request(self):
         self.request_schema_scan.emit()
@@ -359,14 +559,21 @@ class ErdView(QWidget):
         self.view.scale(factor, factor)
 
     def render_schema(self, schema_data):
+        self.stop_layout()
         self.scene.clear()
         self.nodes_map = {}
+        self.place_tables(flatten_schema(schema_data), GAP_X, GAP_Y)
+        self.scene.setSceneRect(
+            self.scene.itemsBoundingRect().adjusted(-50, -50, 50, 50)
+        )
 
-        # Initial standard Grid Layout (mixed)
+    def place_tables(self, tables, start_x, start_y):
+        """Adds one node per table in a 4-column grid starting at (start_x, start_y)."""
         COLUMNS = 4
-        sorted_tables = sorted(schema_data.items(), key=lambda x: x[0])
+        sorted_tables = sorted(tables.items(), key=lambda x: x[0])
+        first_color = len(self.nodes_map)
 
-        current_row_y = GAP_Y
+        current_row_y = start_y
         row_max_h = 0
 
         for i, (name, fields) in enumerate(sorted_tables):
@@ -375,22 +582,78 @@ class ErdView(QWidget):
                 current_row_y += row_max_h + GAP_Y
                 row_max_h = 0
 
-            x = GAP_X + (col * (NODE_WIDTH + GAP_X))
+            x = start_x + (col * (NODE_WIDTH + GAP_X))
             y = current_row_y
 
-            item = TableItem(name, fields, x, y, color_index=i)
+            item = TableItem(name, fields, x, y, color_index=first_color + i)
             self.scene.addItem(item)
             self.nodes_map[name] = item
 
             if item.rect().height() > row_max_h:
                 row_max_h = item.rect().height()
 
+    def apply_schema(self, result):
+        """
+        Applies an incremental scan (see worker_scan_schema). Rescanned tables
+        get new field rows and lose links whose field is gone, new ones are
+        placed below the diagram and dropped ones are removed. Everything else,
+        including positions and hand-drawn links, stays as it is.
+        """
+        self.fingerprints = dict(result.get("fingerprints", {}))
+        if not self.nodes_map:
+            self.render_schema(result.get("changed", {}))
+            return
+
+        for name in result.get("removed", []):
+            self.remove_table(name)
+
+        new_tables = {}
+        for name, fields in flatten_schema(result.get("changed", {})).items():
+            item = self.nodes_map.get(name)
+            if item is None:
+                new_tables[name] = fields
+                continue
+            item.set_fields(fields)
+            paths = item.field_paths()
+            for line in list(item.lines):
+                # Detected links whose field disappeared; manual links have no field
+                if line.start_item is item and line.fk_field and line.fk_field not in paths:
+                    self.remove_connection(line)
+            # The height changed, so do the edge anchors
+            self.scene.mark_lines_dirty(item.lines)
+
+        if new_tables:
+            bottom = self.scene.itemsBoundingRect().bottom() if self.nodes_map else 0
+            self.place_tables(new_tables, GAP_X, bottom + GAP_Y * 2)
+
+        self.scene.flush_lines()
         self.scene.setSceneRect(
             self.scene.itemsBoundingRect().adjusted(-50, -50, 50, 50)
         )
 
+    def remove_table(self, name):
+        item = self.nodes_map.pop(name, None)
+        if item is None:
+            return
+        for line in list(item.lines):
+            self.remove_connection(line)
+        self.scene.removeItem(item)
+
+    def remove_connection(self, line):
+        for node in (line.start_item, line.end_item):
+            if line in node.lines:
+                node.lines.remove(line)
+        self.scene.removeItem(line)
+
+    def reset(self):
+        """Empties the diagram, e.g. on disconnect; the next scan is a full one."""
+        self.stop_layout(wait=True)
+        self.scene.clear()
+        self.nodes_map = {}
+        self.fingerprints = {}
+
     def auto_connect_fk(self):
-        """Creates connections AND separates Mapped vs Isolated tables."""
+        """Offline fallback: connects fields by name and separates Mapped vs Isolated tables."""
         if not self.nodes_map:
             return
 
@@ -414,54 +677,104 @@ class ErdView(QWidget):
         # 2. Re-Layout: Separate Mapped vs Non-Mapped
         self.reorganize_layout()
 
+    def apply_relationships(self, edges):
+        """Draws value-verified references (see core.relationships) and re-lays out."""
+        for edge in edges:
+            source = self.nodes_map.get(edge["source"])
+            target = self.nodes_map.get(edge["target"])
+            if source is None or target is None:
+                continue
+            self.create_connection(
+                source,
+                target,
+                fk_field=edge["field"],
+                confidence=edge.get("confidence"),
+                cardinality=edge.get("cardinality"),
+            )
+        self.reorganize_layout()
+
     def reorganize_layout(self):
-        """Moves mapped items to Left, isolated items to Right."""
-        mapped_items = []
-        isolated_items = []
+        """
+        Layered layout of the linked tables (isolated ones in a grid on the
+        right), computed in a background thread and animated into place.
+        """
+        if not self.nodes_map:
+            return
+        self.stop_layout()
 
+        sizes = {}
+        edges = []
         for name, item in self.nodes_map.items():
-            if len(item.lines) > 0:
-                mapped_items.append(item)
-            else:
-                isolated_items.append(item)
-
-        def layout_group(items, start_x, start_y):
-            cols = 3
-            cur_y = start_y
-            row_h = 0
-            for i, item in enumerate(items):
-                c = i % cols
-                if c == 0 and i > 0:
-                    cur_y += row_h + GAP_Y
-                    row_h = 0
-
-                x = start_x + (c * (NODE_WIDTH + GAP_X))
-                y = cur_y
-
-                item.setPos(x, y)
-                if item.rect().height() > row_h:
-                    row_h = item.rect().height()
-            return start_x + (cols * (NODE_WIDTH + GAP_X))
-
-        next_x = layout_group(mapped_items, GAP_X, GAP_Y)
-        separator_x = next_x + 150
-        layout_group(isolated_items, separator_x, GAP_Y)
-
-        for item in self.nodes_map.values():
+            rect = item.rect()
+            sizes[name] = (rect.width(), rect.height())
             for line in item.lines:
-                line.update_position()
+                if line.start_item is item and line.end_item.name in self.nodes_map:
+                    edges.append((name, line.end_item.name))
+
+        task = LayoutTask(self.layout_generation, sizes, edges, self)
+        task.done.connect(self.apply_layout)
+        task.finished.connect(lambda: self.layout_tasks.discard(task))
+        task.finished.connect(task.deleteLater)
+        self.layout_tasks.add(task)
+        self.btn_layout.setEnabled(False)
+        task.start()
+
+    def stop_layout(self, wait=False):
+        """Invalidates pending layout results and halts a running animation."""
+        self.layout_generation += 1
+        if self.layout_anim is not None:
+            self.layout_anim.stop()
+            self.layout_anim = None
+        if wait:
+            # A QThread must not be destroyed while running (e.g. on tab close)
+            for task in list(self.layout_tasks):
+                task.wait()
+        self.btn_layout.setEnabled(True)
+
+    def apply_layout(self, generation, positions):
+        if generation != self.layout_generation:
+            return
+        self.btn_layout.setEnabled(True)
+        if not positions:
+            return
 
-        self.scene.setSceneRect(
-            self.scene.itemsBoundingRect().adjusted(-50, -50, 50, 50)
-        )
+        moves = []
+        for name, (x, y) in positions.items():
+            item = self.nodes_map.get(name)
+            if item is not None:
+                moves.append((item, item.pos(), QPointF(GAP_X + x, GAP_Y + y)))
+
+        anim = QVariantAnimation(self)
+        anim.setStartValue(0.0)
+        anim.setEndValue(1.0)
+        anim.setDuration(LAYOUT_ANIMATION_MS)
+        anim.setEasingCurve(QEasingCurve.OutCubic)
+
+        def step(t):
+            for item, start, end in moves:
+                item.setPos(start + (end - start) * t)
+
+        def done():
+            # setPos() queued every touched edge; route them all once
+            self.scene.flush_lines()
+            self.scene.setSceneRect(
+                self.scene.itemsBoundingRect().adjusted(-50, -50, 50, 50)
+            )
+            if self.layout_anim is anim:
+                self.layout_anim = None
+
+        anim.valueChanged.connect(step)
+        anim.finished.connect(done)
+        self.layout_anim = anim
+        anim.start(QVariantAnimation.DeleteWhenStopped)
 
-    def create_connection(self, start_item, end_item, fk_field=None):
-        # Prevent duplicate lines
+    def create_connection(self, start_item, end_item, fk_field=None, confidence=None, cardinality=None):
+        # Prevent duplicate lines (several referencing fields may share a target)
         for line in start_item.lines:
-            if line.end_item == end_item:
+            if line.end_item == end_item and (fk_field is None or line.fk_field in (None, fk_field)):
                 return
 
-        line = RelationshipLine(start_item, end_item, fk_field)
+        line = RelationshipLine(start_item, end_item, fk_field, confidence, cardinality)
         self.scene.addItem(line)
         start_item.add_connection(line)
         end_item.add_connection(line)
@@ -503,20 +816,46 @@ class ErdView(QWidget):
         self.start_node = None
 
     def export_image_signal(self):
-        path, _ = QFileDialog.getSaveFileName(
-            self, "Save Diagram", "erd_schema.svg", "SVG Files (*.svg)"
+        """PNG, PDF or SVG export, rendered in tiles/pages/regions so size is not limited by memory."""
+        path, selected = QFileDialog.getSaveFileName(
+            self,
+            "Save Diagram",
+            "erd_schema.png",
+            "PNG Image (*.png);;PDF Document (*.pdf);;SVG Files (*.svg)",
         )
-        if path:
-            generator = QSvgGenerator()
-            generator.setFileName(path)
-            generator.setSize(QSize(int(self.scene.width()), int(self.scene.height())))
-            generator.setViewBox(self.scene.sceneRect())
-
-            painter = QPainter()
-            painter.begin(generator)
-            self.scene.render(painter)
-            painter.end()
-            QMessageBox.information(self, "Export Successful", f"Saved to {path}")
+        if not path:
+            return
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in (".png", ".pdf", ".svg"):
+            ext = "." + selected.split("*.")[1].rstrip(")")
+            path += ext
+
+        scale = 1.0
+        if ext == ".png":
+            label, ok = QInputDialog.getItem(
+                self, "Export Resolution", "Scale:", list(EXPORT_SCALES), 0, False
+            )
+            if not ok:
+                return
+            scale = EXPORT_SCALES[label]
+
+        # Selection outlines are not part of the diagram
+        self.scene.clearSelection()
+        try:
+            if ext == ".png":
+                export_png_tiled(self.scene, path, scale, parent=self)
+                msg = f"Saved to {path}"
+            elif ext == ".pdf":
+                pages = export_pdf_pages(self.scene, path, parent=self)
+                msg = f"Saved {pages} page(s) to {path}"
+            else:
+                files = export_svg_regions(self.scene, path, parent=self)
+                msg = f"Saved to {path}" if len(files) == 1 else f"Saved {len(files)} region files next to {path}"
+        except ExportCancelled:
+            return
+        except Exception as e:
+            return QMessageBox.critical(self, "Export Failed", str(e))
+        QMessageBox.information(self, "Export Successful", msg)
 
     def export_json_signal(self):
         path, _ = QFileDialog.getSaveFileName(
@@ -548,6 +887,8 @@ class ErdView(QWidget):
                     "source": line.start_item.name,
                     "target": line.end_item.name,
                     "fk_field": line.fk_field,
+                    "confidence": line.confidence,
+                    "cardinality": line.cardinality,
                 }
                 data["relationships"].append(rel)
 
@@ -0,0 +1,213 @@
+import threading
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QSpinBox, QPushButton,
+    QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView, QMessageBox
+)
+from PySide6.QtCore import QThread, Signal, Qt
+from PySide6.QtGui import QColor
+from config.settings import PROFILER_POLL_SECONDS
+from core.profiler import LEVELS, RANKINGS, ProfileTail, ShapeStats, get_profiling, set_profiling
+from gui.views.current_op_view import COLLSCAN_COLOR
+
+
+class ProfileTailer(QThread):
+    """
+    Tails system.profile every `interval` seconds and folds new entries into
+    per-shape statistics, all off the GUI thread. Emits the ranked shapes
+    after each poll that brought something new.
+    """
+    stats = Signal(object, int)  # ranked shape rows, entries ingested
+    failed = Signal(str)
+
+    def __init__(self, db, interval=PROFILER_POLL_SECONDS, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.interval = interval
+        self.ranking = "Total Time"
+        self.paused = False
+        self.reset = False
+        self.stopping = False
+        self.wake = threading.Event()
+
+    def stop(self):
+        self.stopping = True
+        self.wake.set()
+
+    def poll_now(self):
+        self.wake.set()
+
+    def run(self):
+        tail, shapes = ProfileTail(), ShapeStats()
+        ranking = None
+        while not self.stopping:
+            if self.reset:
+                # Keep the tail position: only entries after the reset count
+                self.reset = False
+                shapes.clear()
+                ranking = None
+            if not self.paused:
+                try:
+                    entries = tail.poll(self.db)
+                    for entry in entries:
+                        shapes.add(entry)
+                    if (entries or ranking != self.ranking) and not self.stopping:
+                        ranking = self.ranking
+                        self.stats.emit(shapes.top(ranking), shapes.entries)
+                    if tail.more:
+                        continue
+                except Exception as e:
+                    if not self.stopping:
+                        self.failed.emit(str(e))
+            self.wake.wait(self.interval)
+            self.wake.clear()
+
+
+class ProfilerView(QWidget):
+    """
+    Database profiler: sets the profiling level and slowms of the current
+    database and ranks the profiled operations by query shape.
+    """
+
+    COLUMNS = [
+        "Namespace", "Operation", "Shape", "Count", "Total ms", "Mean ms",
+        "p50", "p95", "p99", "Examined / Returned", "Plan",
+    ]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.db = None
+        self.tailer = None
+        layout = QVBoxLayout(self)
+
+        # --- Profiling Settings ---
+        bar = QHBoxLayout()
+        bar.addWidget(QLabel("Profiling:"))
+        self.level_combo = QComboBox()
+        for label, level in LEVELS:
+            self.level_combo.addItem(label, level)
+        bar.addWidget(self.level_combo)
+        bar.addWidget(QLabel("slowms:"))
+        self.slowms_spin = QSpinBox()
+        self.slowms_spin.setRange(0, 3600 * 1000)
+        self.slowms_spin.setValue(100)
+        self.slowms_spin.setSuffix(" ms")
+        bar.addWidget(self.slowms_spin)
+        apply_btn = QPushButton("Apply")
+        apply_btn.setToolTip("Set the profiling level of this database (needs the dbAdmin role)")
+        apply_btn.clicked.connect(self.apply_profiling)
+        bar.addWidget(apply_btn)
+        bar.addStretch()
+        bar.addWidget(QLabel("Rank by:"))
+        self.rank_combo = QComboBox()
+        self.rank_combo.addItems(list(RANKINGS))
+        self.rank_combo.currentTextChanged.connect(self.ranking_changed)
+        bar.addWidget(self.rank_combo)
+        reset_btn = QPushButton("Reset")
+        reset_btn.setToolTip("Forget the statistics and count only operations profiled from now on")
+        reset_btn.clicked.connect(self.reset_stats)
+        bar.addWidget(reset_btn)
+        layout.addLayout(bar)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        self.status_lbl = QLabel("Not connected")
+        self.status_lbl.setStyleSheet("color: gray;")
+        layout.addWidget(self.status_lbl)
+
+    def set_db(self, db):
+        self.stop_tailer()
+        self.db = db
+        self.table.setRowCount(0)
+        if self.db is None:
+            self.status_lbl.setText("Not connected")
+            return
+        try:
+            level, slowms = get_profiling(self.db)
+            self.level_combo.setCurrentIndex(max(0, self.level_combo.findData(level)))
+            self.slowms_spin.setValue(int(slowms))
+        except Exception as e:
+            self.status_lbl.setText(f"Profiling level unavailable: {e}")
+        self.tailer = ProfileTailer(self.db, parent=self)
+        self.tailer.ranking = self.rank_combo.currentText()
+        self.tailer.stats.connect(self.show_stats)
+        self.tailer.failed.connect(self.tail_failed)
+        self.tailer.paused = not self.isVisible()
+        self.tailer.start()
+
+    def stop_tailer(self):
+        if self.tailer is not None:
+            self.tailer.stop()
+            self.tailer.wait()
+            self.tailer.deleteLater()
+            self.tailer = None
+
+    def apply_profiling(self):
+        if self.db is None:
+            return
+        try:
+            set_profiling(self.db, self.level_combo.currentData(), self.slowms_spin.value())
+        except Exception as e:
+            QMessageBox.critical(self, "Profiler", f"Could not set the profiling level:\n{e}")
+            return
+        self.status_lbl.setText(
+            f"Profiling set to '{self.level_combo.currentText()}' (slowms {self.slowms_spin.value()}) on {self.db.name}"
+        )
+
+    def ranking_changed(self, ranking):
+        if self.tailer is not None:
+            self.tailer.ranking = ranking
+            self.tailer.poll_now()
+
+    def reset_stats(self):
+        if self.tailer is not None:
+            self.tailer.reset = True
+            self.tailer.poll_now()
+        self.table.setRowCount(0)
+
+    def refresh_profile(self):
+        if self.tailer is not None:
+            self.tailer.poll_now()
+
+    # --- The tail resumes where it stopped, so pausing while hidden loses nothing ---
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.tailer is not None:
+            self.tailer.paused = False
+            self.tailer.poll_now()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        if self.tailer is not None:
+            self.tailer.paused = True
+
+    def show_stats(self, rows, entries):
+        self.table.setRowCount(len(rows))
+        for r, s in enumerate(rows):
+            ratio = f"{s['ratio']:,.1f}" if s["ratio"] is not None else "-"
+            cells = [
+                s["ns"], s["command"], s["shape"], f"{s['count']:,}", f"{s['total_ms']:,}",
+                f"{s['mean']:.1f}", f"{s['p50']:.0f}", f"{s['p95']:.0f}", f"{s['p99']:.0f}",
+                ratio, s["plan"],
+            ]
+            for c, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                if 3 <= c <= 9:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                if s["collscan"]:
+                    item.setBackground(QColor(COLLSCAN_COLOR))
+                self.table.setItem(r, c, item)
+            self.table.item(r, 2).setToolTip(s["shape"])
+            self.table.item(r, 9).setToolTip(
+                f"{s['examined']:,} documents and {s['keys']:,} keys examined for {s['returned']:,} returned"
+            )
+        self.status_lbl.setText(f"{entries:,} profiled operations in {len(rows)} query shapes")
+
+    def tail_failed(self, error):
+        self.status_lbl.setText(f"Error reading system.profile: {error}")
@@ -0,0 +1,88 @@
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from bson import json_util
+
+MAX_CELL_CHARS = 500  # longer values are cut in the cell; the tooltip has the rest
+
+
+class DocumentTableModel(QAbstractTableModel):
+    """
+    Documents as rows, top-level fields as columns. Rows can be appended
+    while a cursor is still being read; cells are only formatted when the
+    view paints them, so large results cost one list of dicts.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.docs = []
+        self.headers = []
+        self._known = set()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.docs)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def _text(self, index):
+        val = self.docs[index.row()].get(self.headers[index.column()], "")
+        if isinstance(val, (dict, list)):
+            return json_util.dumps(val)
+        return str(val)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            text = self._text(index)
+            return text if len(text) <= MAX_CELL_CHARS else text[:MAX_CELL_CHARS] + "…"
+        if role == Qt.ToolTipRole:
+            text = self._text(index)
+            return text if len(text) > 60 else None
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section] if section < len(self.headers) else None
+        return str(section + 1)
+
+    def set_docs(self, docs):
+        self.beginResetModel()
+        self.docs = []
+        self.headers = []
+        self._known = set()
+        self._collect_headers(docs)
+        self.docs = list(docs)
+        self.endResetModel()
+
+    def append_docs(self, docs):
+        if not docs:
+            return
+        new = list(self._new_keys(docs))
+        if new:
+            start = len(self.headers)
+            self.beginInsertColumns(QModelIndex(), start, start + len(new) - 1)
+            self.headers.extend(new)
+            self._known.update(new)
+            self.endInsertColumns()
+        start = len(self.docs)
+        self.beginInsertRows(QModelIndex(), start, start + len(docs) - 1)
+        self.docs.extend(docs)
+        self.endInsertRows()
+
+    def clear(self):
+        self.set_docs([])
+
+    def _new_keys(self, docs):
+        seen = set(self._known)
+        for d in docs:
+            for k in d:
+                if k not in seen:
+                    seen.add(k)
+                    yield k
+
+    def _collect_headers(self, docs):
+        new = list(self._new_keys(docs))
+        self.headers.extend(new)
+        self._known.update(new)
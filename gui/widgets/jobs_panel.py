@@ -0,0 +1,109 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+    QPushButton, QHeaderView, QAbstractItemView, QLabel
+)
+from PySide6.QtGui import QColor
+
+STATE_COLORS = {
+    "queued": "#6c757d",
+    "running": "#0d6efd",
+    "cancelling": "#fd7e14",
+    "restoring": "#6f42c1",
+    "done": "#198754",
+    "failed": "#dc3545",
+    "cancelled": "#6c757d",
+}
+
+
+def _fmt_duration(seconds):
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class JobsPanel(QWidget):
+    """Lists queued, running and finished jobs of a JobManager."""
+
+    COLUMNS = ["#", "Job", "Connection", "State", "Progress", "Throughput", "Elapsed", "ETA", "Status"]
+
+    def __init__(self, manager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        layout = QVBoxLayout(self)
+
+        top = QHBoxLayout()
+        self.summary_lbl = QLabel()
+        top.addWidget(self.summary_lbl)
+        top.addStretch()
+        self.cancel_btn = QPushButton("Cancel Selected")
+        self.cancel_btn.clicked.connect(self.cancel_selected)
+        top.addWidget(self.cancel_btn)
+        clear_btn = QPushButton("Clear Finished")
+        clear_btn.clicked.connect(self.manager.clear_finished)
+        top.addWidget(clear_btn)
+        layout.addLayout(top)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        self.manager.jobs_changed.connect(self.refresh)
+        self.refresh()
+
+    def selected_jobs(self):
+        rows = {i.row() for i in self.table.selectedIndexes()}
+        ids = {int(self.table.item(r, 0).text()) for r in rows if self.table.item(r, 0)}
+        return [j for j in self.manager.jobs if j.id in ids]
+
+    def cancel_selected(self):
+        for job in self.selected_jobs():
+            if not job.finished:
+                self.manager.cancel(job)
+
+    def refresh(self):
+        jobs = list(reversed(self.manager.jobs))
+        selected = {j.id for j in self.selected_jobs()}
+        self.table.setRowCount(len(jobs))
+        for row, job in enumerate(jobs):
+            docs_s, mb_s = job.throughput()
+            rate = "-"
+            if job.last["docs"]:
+                rate = f"{docs_s:,.0f} docs/s"
+                if job.last["bytes"]:
+                    rate += f", {mb_s:.1f} MB/s"
+            pct = job.last["pct"] if job.state != "done" else 100
+            values = [
+                str(job.id),
+                job.name,
+                job.label,
+                job.state,
+                f"{pct}%" if job.started else "-",
+                rate,
+                _fmt_duration(job.elapsed()) if job.started else "-",
+                _fmt_duration(job.eta()),
+                job.message if job.finished else job.last["status"],
+            ]
+            for col, text in enumerate(values):
+                item = QTableWidgetItem(text)
+                if col == 3:
+                    item.setForeground(QColor(STATE_COLORS.get(job.state, "#000")))
+                self.table.setItem(row, col, item)
+            if job.id in selected:
+                self.table.selectRow(row)
+
+        running = len(self.manager.running())
+        queued = sum(1 for j in self.manager.jobs if j.state == "queued")
+        self.summary_lbl.setText(
+            f"<b>{running}</b> running / <b>{queued}</b> queued (limit {self.manager.limit})"
+        )
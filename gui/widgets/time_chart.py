@@ -0,0 +1,152 @@
+import math
+import time
+import numpy as np
+from PySide6.QtWidgets import QWidget, QSizePolicy
+from PySide6.QtCore import Qt, QPointF, QRectF
+from PySide6.QtGui import QPainter, QPen, QColor, QFont, QPainterPath
+
+MARGIN_LEFT = 56
+MARGIN_RIGHT = 10
+MARGIN_TOP = 24
+MARGIN_BOTTOM = 20
+
+
+def fmt_number(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "-"
+    for unit, size in (("G", 1e9), ("M", 1e6), ("k", 1e3)):
+        if abs(value) >= size:
+            return f"{value / size:.1f}{unit}"
+    return f"{value:.0f}" if abs(value) >= 10 or value == int(value) else f"{value:.2f}"
+
+
+def fmt_bytes(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "-"
+    for unit, size in (("GB", 1024 ** 3), ("MB", 1024 ** 2), ("KB", 1024)):
+        if abs(value) >= size:
+            return f"{value / size:.1f} {unit}"
+    return f"{value:.0f} B"
+
+
+class TimeSeriesChart(QWidget):
+    """
+    Rolling line chart painted directly with QPainter: one polyline per
+    series over a fixed time window, NaN gaps left open. `series` is a list
+    of (field, label, color); `fmt` formats axis values.
+    """
+
+    def __init__(self, title, series, fmt=fmt_number, parent=None):
+        super().__init__(parent)
+        self.title = title
+        self.series = series
+        self.fmt = fmt
+        self.t = np.empty(0)
+        self.values = {}
+        self.window = 300
+        self.now = time.time()
+        self.thresholds = []  # (value, color) reference lines
+        self.markers = []  # timestamps of events (e.g. server restarts) drawn as vertical lines
+        self.setMinimumHeight(160)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+    def fields(self):
+        return [s[0] for s in self.series]
+
+    def plot_width(self):
+        return max(10, self.width() - MARGIN_LEFT - MARGIN_RIGHT)
+
+    def set_data(self, t, values, window, now, markers=None):
+        self.t = t
+        self.values = values
+        self.window = window
+        self.now = now
+        self.markers = markers or []
+        self.update()
+
+    def paintEvent(self, event):
+        p = QPainter(self)
+        p.setRenderHint(QPainter.Antialiasing)
+        p.fillRect(self.rect(), QColor("white"))
+        plot = QRectF(
+            MARGIN_LEFT, MARGIN_TOP,
+            self.width() - MARGIN_LEFT - MARGIN_RIGHT, self.height() - MARGIN_TOP - MARGIN_BOTTOM,
+        )
+
+        # Title and legend with the latest values
+        p.setFont(QFont("Arial", 9, QFont.Bold))
+        p.setPen(QColor("#495057"))
+        p.drawText(QPointF(6, 15), self.title)
+        x = 6 + p.fontMetrics().horizontalAdvance(self.title) + 14
+        p.setFont(QFont("Arial", 8))
+        for field, label, color in self.series:
+            arr = self.values.get(field)
+            last = arr[~np.isnan(arr)][-1] if arr is not None and np.any(~np.isnan(arr)) else None
+            text = f"{label} {self.fmt(last)}"
+            p.fillRect(QRectF(x, 7, 10, 8), QColor(color))
+            p.setPen(QColor("#495057"))
+            p.drawText(QPointF(x + 13, 15), text)
+            x += 13 + p.fontMetrics().horizontalAdvance(text) + 12
+
+        # Y range from the visible data (and thresholds), starting at zero
+        top = 0.0
+        for field in self.fields():
+            arr = self.values.get(field)
+            if arr is not None and np.any(~np.isnan(arr)):
+                top = max(top, float(np.nanmax(arr)))
+        for value, _ in self.thresholds:
+            top = max(top, value)
+        top = top * 1.1 if top > 0 else 1.0
+
+        # Grid and axes
+        p.setPen(QPen(QColor("#e9ecef"), 1))
+        for i in range(5):
+            y = plot.bottom() - plot.height() * i / 4
+            p.drawLine(QPointF(plot.left(), y), QPointF(plot.right(), y))
+            p.setPen(QColor("#6c757d"))
+            p.drawText(QRectF(0, y - 7, MARGIN_LEFT - 6, 14), Qt.AlignRight | Qt.AlignVCenter, self.fmt(top * i / 4))
+            p.setPen(QPen(QColor("#e9ecef"), 1))
+        p.setPen(QColor("#6c757d"))
+        p.drawText(QRectF(plot.left(), plot.bottom() + 3, 120, 14), Qt.AlignLeft, self._fmt_window())
+        p.drawText(QRectF(plot.right() - 60, plot.bottom() + 3, 60, 14), Qt.AlignRight, "now")
+
+        def to_point(ts, value):
+            x = plot.left() + plot.width() * (1 - (self.now - ts) / self.window)
+            y = plot.bottom() - plot.height() * value / top
+            return QPointF(x, y)
+
+        for value, color in self.thresholds:
+            p.setPen(QPen(QColor(color), 1, Qt.DashLine))
+            y = to_point(self.now, value).y()
+            p.drawLine(QPointF(plot.left(), y), QPointF(plot.right(), y))
+
+        # Series; a NaN (no sample, or a counter reset) breaks the line
+        p.setClipRect(plot)
+        p.setPen(QPen(QColor("#dc3545"), 1, Qt.DotLine))
+        for ts in self.markers:
+            x = to_point(ts, 0).x()
+            p.drawLine(QPointF(x, plot.top()), QPointF(x, plot.bottom()))
+        for field, _, color in self.series:
+            arr = self.values.get(field)
+            if arr is None or not len(arr):
+                continue
+            path = QPainterPath()
+            pen_down = False
+            for ts, value in zip(self.t, arr):
+                if np.isnan(value):
+                    pen_down = False
+                    continue
+                point = to_point(ts, value)
+                if pen_down:
+                    path.lineTo(point)
+                else:
+                    path.moveTo(point)
+                    pen_down = True
+            p.setPen(QPen(QColor(color), 1.5))
+            p.drawPath(path)
+        p.end()
+
+    def _fmt_window(self):
+        if self.window >= 3600:
+            return f"-{self.window // 3600:.0f} h"
+        return f"-{self.window // 60:.0f} min"
@@ -0,0 +1,269 @@
+"""
+Layered (Sugiyama-style) graph layout for the ERD.
+
+Pure Python with no Qt, so it can run off the GUI thread. Edges point from
+the referencing collection to the referenced one; layers run left to right.
+"""
+
+from bisect import bisect_right, insort
+
+# Down-and-up barycenter passes for crossing reduction
+SWEEPS = 6
+
+
+def _components(node_ids, adj):
+    seen, comps = set(), []
+    for start in node_ids:
+        if start in seen:
+            continue
+        comp, stack = [], [start]
+        seen.add(start)
+        while stack:
+            v = stack.pop()
+            comp.append(v)
+            for w in adj[v]:
+                if w not in seen:
+                    seen.add(w)
+                    stack.append(w)
+        comps.append(comp)
+    return comps
+
+
+def _acyclic(nodes, edges):
+    """
+    Greedy feedback arc set (Eades-Lin-Smyth): sinks go last, sources first,
+    otherwise the node with the largest out-in degree surplus. Edges pointing
+    backwards in that order are reversed, which keeps the layering shallow.
+    """
+    out = {v: set() for v in nodes}
+    inc = {v: set() for v in nodes}
+    for a, b in edges:
+        out[a].add(b)
+        inc[b].add(a)
+    left, right = [], []
+    remaining = set(nodes)
+
+    def drop(v):
+        remaining.discard(v)
+        for w in out[v]:
+            inc[w].discard(v)
+        for w in inc[v]:
+            out[w].discard(v)
+
+    while remaining:
+        changed = True
+        while changed:
+            changed = False
+            for v in [v for v in remaining if not out[v]]:
+                right.append(v)
+                drop(v)
+                changed = True
+            for v in [v for v in remaining if not inc[v]]:
+                left.append(v)
+                drop(v)
+                changed = True
+        if remaining:
+            v = max(remaining, key=lambda u: len(out[u]) - len(inc[u]))
+            left.append(v)
+            drop(v)
+    rank = {v: i for i, v in enumerate(left + right[::-1])}
+    return [(a, b) if rank[a] < rank[b] else (b, a) for a, b in edges]
+
+
+def _assign_layers(nodes, edges):
+    """
+    Longest path from the sources (Kahn order), then every node is pulled
+    right next to its nearest successor so edges span as few layers as possible.
+    """
+    indeg = {v: 0 for v in nodes}
+    out = {v: [] for v in nodes}
+    for a, b in edges:
+        out[a].append(b)
+        indeg[b] += 1
+    layer = {v: 0 for v in nodes}
+    ready = [v for v in nodes if indeg[v] == 0]
+    topo = []
+    while ready:
+        v = ready.pop()
+        topo.append(v)
+        for w in out[v]:
+            layer[w] = max(layer[w], layer[v] + 1)
+            indeg[w] -= 1
+            if indeg[w] == 0:
+                ready.append(w)
+    for v in reversed(topo):
+        if out[v]:
+            layer[v] = min(layer[w] for w in out[v]) - 1
+    return layer
+
+
+def _add_dummies(layer, edges):
+    """Splits edges spanning several layers into chains of dummy nodes."""
+    links = []
+    dummy = 0
+    for a, b in edges:
+        prev = a
+        for lv in range(layer[a] + 1, layer[b]):
+            d = ("__dummy__", dummy)
+            dummy += 1
+            layer[d] = lv
+            links.append((prev, d))
+            prev = d
+        links.append((prev, b))
+    return links
+
+
+def _count_crossings(upper, lower, down):
+    """Crossings between two adjacent layers (inversions of the edge endpoints)."""
+    pos = {v: i for i, v in enumerate(lower)}
+    seen = []
+    crossings = 0
+    for v in upper:
+        ends = sorted(pos[w] for w in down[v])
+        # Edges already seen that end further down cross these ones
+        for p in ends:
+            crossings += len(seen) - bisect_right(seen, p)
+        for p in ends:
+            insort(seen, p)
+    return crossings
+
+
+def _total_crossings(layers, down):
+    return sum(_count_crossings(layers[i], layers[i + 1], down) for i in range(len(layers) - 1))
+
+
+def _order_layers(layers, up, down):
+    """Barycenter sweeps, keeping the ordering with the fewest crossings."""
+    best = [list(l) for l in layers]
+    best_crossings = _total_crossings(layers, down)
+    for _ in range(SWEEPS):
+        if best_crossings == 0:
+            break
+        # One sweep down then one up; crossings are only counted after both
+        for downward in (True, False):
+            indices = range(1, len(layers)) if downward else range(len(layers) - 2, -1, -1)
+            neighbours = up if downward else down
+            for i in indices:
+                ref = layers[i - 1] if downward else layers[i + 1]
+                pos = {v: k for k, v in enumerate(ref)}
+                keys = {}
+                for k, v in enumerate(layers[i]):
+                    ns = neighbours[v]
+                    # Unconnected nodes keep their place
+                    keys[v] = sum(pos[w] for w in ns) / len(ns) if ns else k
+                layers[i].sort(key=keys.__getitem__)
+        crossings = _total_crossings(layers, down)
+        if crossings < best_crossings:
+            best_crossings = crossings
+            best = [list(l) for l in layers]
+    return best
+
+
+def _place_layer(order, sizes, desired, gap):
+    """Y positions near `desired` centres, keeping order and `gap` between nodes."""
+    ys = []
+    for v in order:
+        h = sizes[v][1]
+        y = desired[v] - h / 2
+        if ys:
+            prev = order[len(ys) - 1]
+            y = max(y, ys[-1] + sizes[prev][1] + gap)
+        ys.append(y)
+    # The forward pass only pushes down; shift the layer back to centre on its targets
+    if ys:
+        shift = sum(desired[v] - (y + sizes[v][1] / 2) for v, y in zip(order, ys)) / len(ys)
+        ys = [y + shift for y in ys]
+    return dict(zip(order, ys))
+
+
+def _layout_component(nodes, edges, sizes, gap_x, gap_y):
+    edges = _acyclic(nodes, [(a, b) for a, b in edges if a != b])
+    layer = _assign_layers(nodes, edges)
+    links = _add_dummies(layer, edges)
+
+    depth = max(layer.values()) + 1
+    layers = [[] for _ in range(depth)]
+    for v in list(layer):
+        layers[layer[v]].append(v)
+        if v not in sizes:
+            sizes[v] = (0, 0)  # dummies take no room
+    up = {v: [] for v in layer}
+    down = {v: [] for v in layer}
+    for a, b in links:
+        down[a].append(b)
+        up[b].append(a)
+
+    layers = _order_layers(layers, up, down)
+
+    # Stack every layer first, then pull nodes towards their neighbours
+    y = {}
+    for order in layers:
+        cur = 0.0
+        for v in order:
+            y[v] = cur
+            cur += sizes[v][1] + gap_y
+    for _ in range(2):
+        for i, order in enumerate(layers):
+            desired = {}
+            for v in order:
+                ns = up[v] + down[v]
+                centres = sorted(y[w] + sizes[w][1] / 2 for w in ns)
+                desired[v] = centres[len(centres) // 2] if centres else y[v] + sizes[v][1] / 2
+            y.update(_place_layer(order, sizes, desired, gap_y))
+
+    positions = {}
+    x = 0.0
+    for order in layers:
+        width = max((sizes[v][0] for v in order), default=0)
+        for v in order:
+            if not (isinstance(v, tuple) and v[:1] == ("__dummy__",)):
+                positions[v] = (x, y[v])
+        x += width + gap_x
+
+    # Normalise to a top-left origin of (0, 0)
+    min_y = min(p[1] for p in positions.values())
+    return {v: (px, py - min_y) for v, (px, py) in positions.items()}
+
+
+def layered_layout(sizes, edges, gap_x=100, gap_y=60, grid_columns=4):
+    """
+    sizes: {node: (width, height)}, edges: [(source, target)].
+    Returns {node: (x, y)} top-left positions. Connected components are
+    stacked vertically; nodes without edges go in a grid on the right.
+    """
+    sizes = dict(sizes)
+    nodes = list(sizes)
+    adj = {v: set() for v in nodes}
+    edges = [(a, b) for a, b in edges if a in adj and b in adj]
+    for a, b in edges:
+        adj[a].add(b)
+        adj[b].add(a)
+
+    linked = [v for v in nodes if adj[v] - {v}]
+    isolated = [v for v in nodes if not adj[v] - {v}]
+
+    positions = {}
+    top = 0.0
+    right = 0.0
+    comps = sorted(_components(linked, adj), key=len, reverse=True)
+    for comp in comps:
+        members = set(comp)
+        comp_edges = [(a, b) for a, b in edges if a in members]
+        placed = _layout_component(comp, comp_edges, sizes, gap_x, gap_y)
+        for v, (x, y) in placed.items():
+            positions[v] = (x, y + top)
+        top = max(positions[v][1] + sizes[v][1] for v in comp) + gap_y * 2
+        right = max(right, max(positions[v][0] + sizes[v][0] for v in comp))
+
+    # Isolated collections: a grid to the right of the graph, as before
+    start_x = right + gap_x * 2 if linked else 0.0
+    col_width = max((sizes[v][0] for v in isolated), default=0) + gap_x
+    y, row_h = 0.0, 0.0
+    for i, v in enumerate(sorted(isolated, key=str)):
+        col = i % grid_columns
+        if col == 0 and i > 0:
+            y += row_h + gap_y
+            row_h = 0.0
+        positions[v] = (start_x + col * col_width, y)
+        row_h = max(row_h, sizes[v][1])
+    return positions
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import time
+from bson import json_util
+
+STATE_DIR = "index_state"
+
+
+class IndexState:
+    """
+    Persists the index definitions a bulk load dropped, one small file per
+    collection, until they are rebuilt. A job killed before its rebuild
+    leaves its file behind; the next connect or import restores from it.
+    """
+
+    @staticmethod
+    def key(conn, db_name, coll_name):
+        raw = f"{conn}|{db_name}|{coll_name}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _path(key):
+        return os.path.join(STATE_DIR, f"{key}.json")
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f, object_hook=json_util.object_hook)
+        except Exception:
+            return None
+
+    @staticmethod
+    def load(key):
+        path = IndexState._path(key)
+        if not os.path.exists(path):
+            return None
+        data = IndexState._read(path)
+        return data.get("specs") if data else None
+
+    @staticmethod
+    def save(key, specs, info=None):
+        os.makedirs(STATE_DIR, exist_ok=True)
+        path = IndexState._path(key)
+        data = {"specs": specs, "updated": time.time()}
+        if info:
+            data.update(info)
+        # Write-then-rename: the file must be complete before any index is dropped
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, default=json_util.default)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def retain(key, specs):
+        """Keeps only `specs` in an existing snapshot; clears it when none are left."""
+        if not specs:
+            IndexState.clear(key)
+            return
+        path = IndexState._path(key)
+        data = IndexState._read(path) if os.path.exists(path) else None
+        if data is None:
+            return
+        info = {k: v for k, v in data.items() if k not in ("specs", "updated")}
+        IndexState.save(key, specs, info)
+
+    @staticmethod
+    def clear(key):
+        path = IndexState._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    @staticmethod
+    def pending(conn, db_name):
+        """[(key, collection name, specs)] left behind for one database."""
+        if not os.path.isdir(STATE_DIR):
+            return []
+        found = []
+        for fname in sorted(os.listdir(STATE_DIR)):
+            if not fname.endswith(".json"):
+                continue
+            data = IndexState._read(os.path.join(STATE_DIR, fname))
+            if data and data.get("conn") == conn and data.get("db") == db_name:
+                found.append((fname[: -len(".json")], data["collection"], data["specs"]))
+        return found
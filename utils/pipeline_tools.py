@@ -0,0 +1,261 @@
+import hashlib
+import json
+from bson import json_util
+
+# Stages emitting exactly one document per input document, in order: a
+# $limit can be moved in front of them without changing the first N results
+ONE_TO_ONE_STAGES = {
+    "$project",
+    "$addFields",
+    "$set",
+    "$unset",
+    "$replaceRoot",
+    "$replaceWith",
+    "$lookup",
+    "$graphLookup",
+}
+# Stages that must see their whole input before emitting anything
+BLOCKING_STAGES = {
+    "$group",
+    "$sort",
+    "$count",
+    "$bucket",
+    "$bucketAuto",
+    "$facet",
+    "$sortByCount",
+    "$sample",
+    "$setWindowFields",
+    "$densify",
+    "$fill",
+    "$unionWith",
+}
+# Never executed by previews
+WRITE_STAGES = {"$out", "$merge"}
+
+
+def parse_pipeline(pipeline_data):
+    """[{'type': '$match', 'json': '{...}'}] (the builder's rows) -> list of stage dicts."""
+    pipeline = []
+    for item in pipeline_data:
+        stage_key = item["type"]
+        stage_content_str = item["json"]
+        try:
+            content = json.loads(stage_content_str, object_hook=json_util.object_hook)
+        except json.JSONDecodeError:
+            # Allow simple integers for $limit/$skip
+            if stage_key in ["$limit", "$skip", "$count"] and stage_content_str.strip().isdigit():
+                content = int(stage_content_str.strip())
+            else:
+                raise ValueError(f"Invalid JSON in {stage_key}")
+        pipeline.append({stage_key: content})
+    return pipeline
+
+
+def stage_name(stage):
+    return next(iter(stage))
+
+
+def prefix_key(namespace, stages):
+    """Stable hash of a pipeline prefix on one collection."""
+    raw = json_util.dumps([namespace, stages], sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def limit_safe_tail(stages):
+    """Index where the trailing run of one-to-one stages starts."""
+    i = len(stages)
+    while i > 0 and stage_name(stages[i - 1]) in ONE_TO_ONE_STAGES:
+        i -= 1
+    return i
+
+
+def inject_limit(stages, n):
+    """
+    The same first `n` results, with the $limit placed as early as possible:
+    in front of the trailing one-to-one stages, so $lookup/$project only run
+    for the documents that are shown.
+    """
+    at = limit_safe_tail(stages)
+    return stages[:at] + [{"$limit": n}] + stages[at:]
+
+
+# --- OPTIMIZER ---
+# Stages a $match may move in front of when it does not read the fields they write
+RESHAPING_STAGES = {"$project", "$addFields", "$set", "$unset", "$lookup", "$unwind"}
+MAX_PASSES = 20
+
+
+def match_fields(query):
+    """Top-level field paths a $match filter reads; None when it uses $expr/$where/$text."""
+    fields = set()
+    for key, value in query.items():
+        if key in ("$and", "$or", "$nor"):
+            for sub in value:
+                inner = match_fields(sub)
+                if inner is None:
+                    return None
+                fields |= inner
+        elif key.startswith("$"):
+            return None
+        else:
+            fields.add(key)
+    return fields
+
+
+def _is_flag(value):
+    return isinstance(value, (bool, int)) and value in (0, 1)
+
+
+def _under(path, paths):
+    return any(path == p or path.startswith(p + ".") for p in paths)
+
+
+def _overlaps(paths, written):
+    return any(_under(p, written) or _under(w, paths) for p in paths for w in written)
+
+
+def _can_pass(reads, stage):
+    """
+    True when a stage that reads only the field paths `reads` gives the same
+    result in front of `stage`: `stage` must leave all of them untouched.
+    """
+    if reads is None:
+        return False
+    name = stage_name(stage)
+    spec = stage[name]
+    if name in ("$addFields", "$set"):
+        written = set(spec)
+    elif name == "$unset":
+        written = {spec} if isinstance(spec, str) else set(spec)
+    elif name == "$lookup":
+        written = {spec["as"]}
+    elif name == "$unwind":
+        spec = {"path": spec} if isinstance(spec, str) else spec
+        written = {spec["path"].lstrip("$")}
+        if spec.get("includeArrayIndex"):
+            written.add(spec["includeArrayIndex"])
+    elif name == "$project":
+        computed = {k for k, v in spec.items() if not _is_flag(v)}
+        included = {k for k, v in spec.items() if _is_flag(v) and v and k != "_id"}
+        if not included and not computed:
+            # Exclusion mode: only the listed fields change
+            written = set(spec)
+        else:
+            # Inclusion mode: every field read must be kept as it is
+            if spec.get("_id", 1) and "_id" not in computed:
+                included.add("_id")
+            return all(_under(p, included) for p in reads) and not _overlaps(reads, computed)
+    else:
+        return False
+    return not _overlaps(reads, written)
+
+
+def _conjuncts(query):
+    """A filter as a list of single-condition filters that all must hold."""
+    parts = []
+    for key, value in query.items():
+        if key == "$and":
+            for sub in value:
+                parts += _conjuncts(sub)
+        else:
+            parts.append({key: value})
+    return parts
+
+
+def _combine(parts):
+    """Inverse of _conjuncts: one dict when the keys are distinct, else $and."""
+    keys = [next(iter(p)) for p in parts]
+    if len(set(keys)) == len(keys) and "$and" not in keys:
+        return {k: p[k] for k, p in zip(keys, parts)}
+    return {"$and": parts}
+
+
+def _split_match(query, stage):
+    """(conditions that can move in front of `stage`, conditions that stay) or None."""
+    parts = _conjuncts(query)
+    movable = [p for p in parts if _can_pass(match_fields(p), stage)]
+    if not movable or len(movable) == len(parts):
+        return None
+    return _combine(movable), _combine([p for p in parts if p not in movable])
+
+
+def _sort_fields(spec):
+    return set(spec) if not any(isinstance(v, dict) for v in spec.values()) else None
+
+
+def optimize_pipeline(stages):
+    """
+    Semantically equivalent rewrite that lets the server use indexes and
+    drop work early. Returns (stages, notes).
+      - $match moves in front of $project, $addFields, $set, $unset, $lookup
+        and $unwind stages that do not write the fields it reads; when only
+        some of its conditions qualify, the $match is split and those move
+        alone. $sort does the same for one-to-one stages
+      - $match moves in front of $sort
+      - adjacent $match stages are merged with $and, $limit/$skip coalesce
+      - a $sort made redundant by a later $sort is dropped
+      - $limit moves up to the $sort it follows (top-k sort)
+    $project stages are left where they are: the server already works out
+    which fields a pipeline needs and fetches only those.
+    """
+    stages = [dict(s) for s in stages]
+    notes = []
+    for _ in range(MAX_PASSES):
+        changed = False
+        for i in range(1, len(stages)):
+            prev, cur = stages[i - 1], stages[i]
+            a, b = stage_name(prev), stage_name(cur)
+
+            if b == "$match" and (a == "$sort" or (a in RESHAPING_STAGES and _can_pass(match_fields(cur[b]), prev))):
+                stages[i - 1], stages[i] = cur, prev
+                notes.append(f"Moved $match in front of {a}.")
+            elif b == "$match" and a in RESHAPING_STAGES and _split_match(cur[b], prev):
+                early, late = _split_match(cur[b], prev)
+                stages[i - 1 : i + 1] = [{"$match": early}, prev, {"$match": late}]
+                notes.append(f"Split $match: conditions on {', '.join(sorted(match_fields(early)))} moved in front of {a}.")
+            elif b == "$sort" and a in ONE_TO_ONE_STAGES and _can_pass(_sort_fields(cur[b]), prev):
+                stages[i - 1], stages[i] = cur, prev
+                notes.append(f"Moved $sort in front of {a}.")
+            elif a == b == "$match":
+                stages[i - 1 : i + 1] = [{"$match": {"$and": [prev[a], cur[b]]}}]
+                notes.append("Merged adjacent $match stages.")
+            elif a == b == "$limit":
+                stages[i - 1 : i + 1] = [{"$limit": min(prev[a], cur[b])}]
+                notes.append("Merged adjacent $limit stages.")
+            elif a == b == "$skip":
+                stages[i - 1 : i + 1] = [{"$skip": prev[a] + cur[b]}]
+                notes.append("Merged adjacent $skip stages.")
+            elif a == b == "$sort":
+                del stages[i - 1]
+                notes.append("Dropped a $sort overridden by the next $sort.")
+            elif b in ("$limit", "$skip") and a in ONE_TO_ONE_STAGES:
+                stages[i - 1], stages[i] = cur, prev
+                notes.append(f"Moved {b} in front of {a}.")
+            else:
+                continue
+            changed = True
+            break
+        if not changed:
+            break
+    return stages, notes
+
+
+def lint_pipeline(stages):
+    """Warnings about patterns the optimizer cannot rewrite."""
+    warnings = []
+    names = [stage_name(s) for s in stages]
+    if names and names[0] in ("$group", "$sort", "$unwind", "$lookup") and "$match" not in names:
+        warnings.append(f"The pipeline starts with {names[0]} and has no $match: every document is read.")
+    for i, stage in enumerate(stages):
+        name = names[i]
+        if name == "$match" and match_fields(stage[name]) is None:
+            warnings.append(f"Stage {i + 1}: $expr/$where/$text filters often cannot use an index.")
+        if (
+            name == "$match" and i > 0 and names[i - 1] in RESHAPING_STAGES
+            and not _can_pass(match_fields(stage[name]), stages[i - 1])
+            and not _split_match(stage[name], stages[i - 1])
+        ):
+            warnings.append(f"Stage {i + 1}: this $match reads fields the {names[i - 1]} before it changes or drops, so it cannot move earlier.")
+        if name == "$sort" and i > 0 and names[i - 1] == "$group":
+            warnings.append(f"Stage {i + 1}: sorting $group output always happens in memory.")
+    return warnings
@@ -0,0 +1,68 @@
+import struct
+import zlib
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Compressed bytes buffered before an IDAT chunk is written
+IDAT_CHUNK = 256 * 1024
+
+
+class PngWriter:
+    """
+    Streams an 8-bit RGB PNG to disk one scanline at a time, so an image of
+    any height is written with only the compressor's buffer in memory.
+    """
+
+    def __init__(self, path, width, height, level=6):
+        self.width = width
+        self.height = height
+        self.rows = 0
+        self.file = open(path, "wb")
+        self.zlib = zlib.compressobj(level)
+        self.pending = []
+        self.pending_size = 0
+        self.file.write(PNG_SIGNATURE)
+        # 8 bits per channel, colour type 2 (RGB), no interlace
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+    def _chunk(self, tag, data):
+        self.file.write(struct.pack(">I", len(data)))
+        self.file.write(tag)
+        self.file.write(data)
+        self.file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(tag)) & 0xFFFFFFFF))
+
+    def _emit(self, data):
+        if data:
+            self.pending.append(data)
+            self.pending_size += len(data)
+        if self.pending_size >= IDAT_CHUNK:
+            self._flush_idat()
+
+    def _flush_idat(self):
+        if self.pending:
+            self._chunk(b"IDAT", b"".join(self.pending))
+            self.pending = []
+            self.pending_size = 0
+
+    def write_row(self, row):
+        """One scanline of width * 3 RGB bytes."""
+        if len(row) != self.width * 3:
+            raise ValueError(f"Row has {len(row)} bytes, expected {self.width * 3}.")
+        # Filter type 0 (None) per scanline
+        self._emit(self.zlib.compress(b"\x00" + bytes(row)))
+        self.rows += 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        try:
+            if self.rows != self.height:
+                raise ValueError(f"Wrote {self.rows} of {self.height} rows.")
+            self._emit(self.zlib.flush())
+            self._flush_idat()
+            self._chunk(b"IEND", b"")
+        finally:
+            self.file.close()
+
+    def abort(self):
+        """Closes the file without finishing it (the caller removes it)."""
+        self.file.close()
@@ -0,0 +1,52 @@
+import json
+
+# Sort and hint specs are kept verbatim: their values change the plan
+KEEP_LITERALS = {"$sort", "sort", "$hint", "hint"}
+
+
+def query_shape(value, keep=False):
+    """
+    A filter, pipeline or command with its literal values replaced by "?",
+    so queries that differ only in their parameters compare equal. Field
+    names, operators and "$field" references stay; keys are sorted, as
+    the order of fields in a filter does not change its meaning.
+    """
+    if isinstance(value, dict):
+        keys = list(value) if keep else sorted(value)
+        return {k: query_shape(value[k], keep or k in KEEP_LITERALS) for k in keys}
+    if isinstance(value, (list, tuple)):
+        shapes = [query_shape(item, keep) for item in value]
+        if all(not isinstance(s, (dict, list)) for s in shapes):
+            # $in lists of any length share a shape
+            return sorted(set(shapes), key=str)
+        return shapes
+    if keep or (isinstance(value, str) and value.startswith("$")):
+        return value if isinstance(value, (str, int, float, bool)) or value is None else "?"
+    return "?"
+
+
+def shape_text(shape):
+    """Compact, stable text of a shape, usable as a grouping key."""
+    return json.dumps(shape, separators=(",", ":"))
+
+
+def command_shape(command):
+    """
+    (command name, shape text) of a command document as found in
+    currentOp and system.profile: the filter, pipeline or update/delete
+    predicates, plus the sort. Commands without a query (insert,
+    createIndexes, ...) have an empty shape.
+    """
+    if not isinstance(command, dict) or not command:
+        return "", ""
+    name = next(iter(command))
+    parts = {}
+    for key in ("filter", "query", "q", "pipeline", "sort"):
+        if key in command:
+            parts[key] = command[key]
+    for key in ("updates", "deletes"):
+        if isinstance(command.get(key), list):
+            parts[key] = [s.get("q") for s in command[key] if isinstance(s, dict)]
+    if not parts:
+        return name, ""
+    return name, shape_text(query_shape(parts))
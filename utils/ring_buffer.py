@@ -0,0 +1,110 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-size time series of float samples: one timestamp column and one
+    column per field, preallocated, so appending never allocates and memory
+    stays constant however long the dashboard runs. Missing values are NaN.
+    """
+
+    def __init__(self, capacity, fields):
+        self.capacity = capacity
+        self.fields = list(fields)
+        self.index = {f: i for i, f in enumerate(self.fields)}
+        self.t = np.full(capacity, np.nan)
+        self.v = np.full((capacity, len(self.fields)), np.nan)
+        self.head = 0  # next row to write
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, ts, values):
+        row = self.head
+        self.t[row] = ts
+        self.v[row, :] = np.nan
+        for key, value in values.items():
+            i = self.index.get(key)
+            if i is not None and value is not None:
+                self.v[row, i] = value
+        self.head = (row + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def clear(self):
+        self.t[:] = np.nan
+        self.v[:] = np.nan
+        self.head = 0
+        self.size = 0
+
+    def ordered(self):
+        """(timestamps, values) oldest first."""
+        if self.size < self.capacity:
+            return self.t[: self.size], self.v[: self.size]
+        return (
+            np.concatenate((self.t[self.head :], self.t[: self.head])),
+            np.concatenate((self.v[self.head :], self.v[: self.head])),
+        )
+
+    def latest(self, field):
+        if not self.size:
+            return None
+        value = self.v[(self.head - 1) % self.capacity, self.index[field]]
+        return None if np.isnan(value) else float(value)
+
+    def window(self, seconds, fields=None, max_points=None, now=None):
+        """
+        Samples of the last `seconds` for `fields` (all by default):
+        (timestamps, {field: values}). With more than `max_points` samples
+        the result is min/max decimated, so spikes survive downsampling.
+        """
+        cols = [self.index[f] for f in (fields or self.fields)]
+        t, v = self._since(now, seconds, cols)
+        if max_points and len(t) > max_points:
+            t, v = decimate_minmax(t, v, max(1, max_points // 2))
+        return t, {f: v[:, i] for i, f in enumerate(fields or self.fields)}
+
+    def _since(self, now, seconds, cols):
+        """
+        Rows with a timestamp >= now - seconds, oldest first, of columns
+        `cols` only. The start is found by binary search over the two sorted
+        segments (head..end, 0..head), so only the window is copied.
+        """
+        if not self.size:
+            return np.empty(0), np.empty((0, len(cols)))
+        if self.size < self.capacity:
+            segments = [(0, self.size)]
+        else:
+            segments = [(self.head, self.capacity), (0, self.head)]
+        if now is None:
+            now = self.t[(self.head - 1) % self.capacity]
+        cutoff = now - seconds
+        parts = []
+        for lo, hi in segments:
+            start = lo + np.searchsorted(self.t[lo:hi], cutoff)
+            if start < hi:
+                parts.append((start, hi))
+        if not parts:
+            return np.empty(0), np.empty((0, len(cols)))
+        t = np.concatenate([self.t[a:b] for a, b in parts])
+        v = np.concatenate([self.v[a:b, cols] for a, b in parts])
+        return t, v
+
+
+def decimate_minmax(t, v, buckets):
+    """
+    Two points per bucket, the minimum and the maximum of each column, at
+    the bucket's first and last timestamp. NaNs are ignored.
+    """
+    edges = np.linspace(0, len(t), buckets + 1).astype(int)
+    starts, ends = edges[:-1], edges[1:] - 1
+    with np.errstate(invalid="ignore"):
+        lows = np.fmin.reduceat(v, starts, axis=0)
+        highs = np.fmax.reduceat(v, starts, axis=0)
+    out_t = np.empty(2 * buckets)
+    out_t[0::2] = t[starts]
+    out_t[1::2] = t[ends]
+    out_v = np.empty((2 * buckets, v.shape[1]))
+    out_v[0::2] = lows
+    out_v[1::2] = highs
+    return out_t, out_v
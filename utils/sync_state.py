@@ -0,0 +1,54 @@
+import hashlib
+import json
+import os
+import time
+from bson import json_util
+
+STATE_DIR = "sync_state"
+
+
+class SyncState:
+    """
+    Persists change-stream resume tokens, one small file per sync job,
+    so concurrent sync jobs never write the same file.
+    """
+
+    @staticmethod
+    def key(src_uri, src_name, dst_uri, dst_name):
+        raw = f"{src_uri}|{src_name}|{dst_uri}|{dst_name}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _path(key):
+        return os.path.join(STATE_DIR, f"{key}.json")
+
+    @staticmethod
+    def load(key):
+        path = SyncState._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                data = json.load(f, object_hook=json_util.object_hook)
+                return data.get("token")
+        except Exception:
+            return None
+
+    @staticmethod
+    def save(key, token, info=None):
+        os.makedirs(STATE_DIR, exist_ok=True)
+        path = SyncState._path(key)
+        data = {"token": token, "updated": time.time()}
+        if info:
+            data.update(info)
+        # Write-then-rename so a crash never leaves a half-written token
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, default=json_util.default)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def clear(key):
+        path = SyncState._path(key)
+        if os.path.exists(path):
+            os.remove(path)